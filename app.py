@@ -4,7 +4,7 @@ from src.entity.api_model import HeartAttackData  # noqa: E402
 from src.entity.config_entity import HeartAttackPredictorConfig  # noqa: E402
 from src.logger import logging  # noqa: E402
 from src.pipline.prediction_pipeline import HeartAttackClaassifier  # noqa: E402
-from src.pipline.training_pipeline import TrainingPipeline  # noqa: E402
+from src.pipline.training_jobs import JOB_FAILED, JOB_SUCCEEDED, TrainingJobRunner  # noqa: E402
 
 
 def ui() -> None:
@@ -40,17 +40,26 @@ def ui() -> None:
                 "troponin": troponin,
             }
             data = HeartAttackData(**input_data)
-            df = data.to_dataframe()
             classifier = HeartAttackClaassifier(prediction_pipeline_config=HeartAttackPredictorConfig())
-            prediction = classifier.predict(df)
+            prediction = classifier.predict_one(data)
             st.success(f"Predicted: {'Heart Attack' if prediction == 1 else 'No Heart Attack'}")
     with st.sidebar:
         st.header("Admin Tools")
-        if st.button("Retrain Model"):
+        runner = TrainingJobRunner.get_instance()
+        if st.button("Retrain Model", disabled=runner.active_job_id is not None):
             logging.info("Retraining model")
-            training_pipeline = TrainingPipeline()
-            training_pipeline.run_pipeline()
-            st.success("Model retrained successfully!")
+            st.session_state["training_job_id"] = runner.submit()
+
+        job_id = st.session_state.get("training_job_id") or runner.active_job_id
+        if job_id:
+            job = runner.get_status(job_id)
+            st.progress(job.progress, text=f"Job {job.job_id}: {job.status}" + (f" ({job.stage})" if job.stage else ""))
+            if job.status == JOB_SUCCEEDED:
+                st.success("Model retrained and deployed!" if job.model_pushed else "Model retrained, but not better than the production model.")
+            elif job.status == JOB_FAILED:
+                st.error(f"Retraining failed: {job.error}")
+            elif st.button("Refresh status"):
+                st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+"""
+Inference micro-benchmarks for every serving stage.
+
+    uv run python -m benchmarks.inference_benchmark --output bench.json
+    uv run python -m benchmarks.inference_benchmark --baseline benchmarks/baseline.json
+
+Stages are timed separately (pydantic validation, to_dataframe, preprocessing transform,
+booster predict, compiled-ensemble predict, single-row fast path, model deserialization and
+S3 fetch through a local S3 stand-in) for each batch size. Results are written as JSON; with
+--baseline, every (stage, batch_size) median is compared against the stored run and the
+process exits with status 1 when one is slower than the allowed tolerance.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost as xgb
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.local_s3 import install_local_s3
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.constants import MODEL_BUCKET_NAME, MODEL_FILE_NAME, SCHEMA_FILE_PATH
+from src.entity.api_model import HeartAttackData
+from src.entity.config_entity import ModelTrainerConfig
+from src.entity.estimator import MyModel
+from src.utils.main_utils import read_yaml_file
+
+DEFAULT_BATCH_SIZES = (1, 64, 1_000, 100_000)
+DEFAULT_TOLERANCE = 0.25
+
+
+def generate_records(n_rows: int, seed: int = 0) -> list[dict]:
+    """
+    Random raw request payloads within the HeartAttackData field bounds.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, field in HeartAttackData.model_fields.items():
+        bounds = {type(m).__name__: m for m in field.metadata}
+        low = getattr(bounds.get("Ge"), "ge", 0)
+        high = getattr(bounds.get("Le"), "le", 1)
+        if field.annotation is bool:
+            columns[name] = rng.integers(0, 2, n_rows).astype(bool)
+        elif field.annotation is int:
+            columns[name] = rng.integers(low, high + 1, n_rows)
+        else:
+            columns[name] = rng.uniform(low, high, n_rows).round(3)
+    return pd.DataFrame(columns).to_dict("records")
+
+
+def build_model(n_train_rows: int = 5_000) -> MyModel:
+    """
+    Fits a MyModel with the same preprocessing layout and XGBoost parameters as the training pipeline.
+    """
+    frame = HeartAttackData.batch_to_dataframe([HeartAttackData(**r) for r in generate_records(n_train_rows, seed=1)])
+    target = ((frame["troponin"] > 0.5) | (frame["ck_mb"] > 25)).astype(int)
+    preprocessor = Pipeline(
+        steps=[
+            ("Preprocessor", ColumnTransformer([("cont", StandardScaler(), read_yaml_file(SCHEMA_FILE_PATH)["mm_columns"])], remainder="passthrough"))
+        ]
+    )
+    config = ModelTrainerConfig()
+    model = xgb.XGBClassifier(
+        n_estimators=config._n_estimators,
+        learning_rate=config._learning_rate,
+        subsample=config._subsample,
+        scale_pos_weight=config._scale_pos_weight,
+        random_state=config._random_state,
+    )
+    model.fit(preprocessor.fit_transform(frame), target)
+    return MyModel(preprocessing_object=preprocessor, trained_model_object=model)
+
+
+def measure(fn: Callable[[], object], min_time: float, max_repeats: int) -> list[float]:
+    """
+    Calls fn until min_time seconds have elapsed (at least 3, at most max_repeats times) and returns per-call seconds.
+    """
+    fn()  # warm-up
+    timings, started = [], time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < 3 or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def summarize(stage: str, batch_size: int, timings: list[float]) -> dict:
+    ordered = sorted(timings)
+    median = statistics.median(ordered)
+    return {
+        "stage": stage,
+        "batch_size": batch_size,
+        "repeats": len(ordered),
+        "median_us": median * 1e6,
+        "p95_us": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e6,
+        "min_us": ordered[0] * 1e6,
+        "per_row_us": median * 1e6 / max(1, batch_size),
+    }
+
+
+def run_benchmarks(batch_sizes: tuple[int, ...], min_time: float, max_repeats: int) -> list[dict]:
+    model = build_model()
+    compiled = model.compile()
+    fast_predictor = model.get_fast_predictor()
+    results = []
+
+    for batch_size in batch_sizes:
+        payloads = generate_records(batch_size, seed=batch_size)
+        records = [HeartAttackData(**payload) for payload in payloads]
+        frame = records[0].to_dataframe() if batch_size == 1 else HeartAttackData.batch_to_dataframe(records)
+        transformed = model.preprocessing_object.transform(frame)
+        stages: dict[str, Callable[[], object]] = {
+            "pydantic_validation": lambda payloads=payloads: [HeartAttackData(**payload) for payload in payloads],
+            "to_dataframe": (lambda r=records[0]: r.to_dataframe())
+            if batch_size == 1
+            else (lambda records=records: HeartAttackData.batch_to_dataframe(records)),
+            "preprocessing_transform": lambda frame=frame: model.preprocessing_object.transform(frame),
+            "booster_predict": lambda x=transformed: model.trained_model_object.predict_proba(x),
+            "compiled_predict": lambda x=transformed: compiled.trained_model_object.predict_proba(x),
+            "end_to_end_batch": lambda records=records: model.predict_proba_batch(records),
+        }
+        if batch_size == 1 and fast_predictor is not None:
+            stages["fast_path_single_row"] = lambda r=records[0]: fast_predictor.predict_proba(r)
+        for stage, fn in stages.items():
+            repeats = max_repeats if batch_size < 10_000 else max(3, max_repeats // 50)
+            results.append(summarize(stage, batch_size, measure(fn, min_time, repeats)))
+            print(f"{stage:>26} batch={batch_size:<7} median={results[-1]['median_us']:>12.1f}us", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        install_local_s3(root_dir)
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        model_bytes = buffer.getvalue()
+        storage = SimpleStorageService(model_cache_dir=None)
+        storage.s3_client.put_object(Bucket=MODEL_BUCKET_NAME, Key=MODEL_FILE_NAME, Body=model_bytes)
+        cached_storage = SimpleStorageService(model_cache_dir=os.path.join(root_dir, "model_cache"))
+
+        stages = {
+            "model_deserialization": lambda: joblib.load(io.BytesIO(model_bytes)),
+            "s3_fetch": lambda: storage.read_object(bucket_name=MODEL_BUCKET_NAME, model_file=MODEL_FILE_NAME),
+            "s3_load_model": lambda: storage.load_model(model_name=MODEL_FILE_NAME, bucket_name=MODEL_BUCKET_NAME),
+            "cached_load_model": lambda: cached_storage.load_model(model_name=MODEL_FILE_NAME, bucket_name=MODEL_BUCKET_NAME),
+        }
+        for stage, fn in stages.items():
+            results.append(summarize(stage, 1, measure(fn, min_time, max(3, max_repeats // 10))))
+            print(f"{stage:>26} model={len(model_bytes) / 1e6:.1f}MB median={results[-1]['median_us']:>12.1f}us", file=sys.stderr)
+    return results
+
+
+def compare_to_baseline(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns one message per (stage, batch_size) whose median is slower than baseline * (1 + tolerance).
+    """
+    reference = {(r["stage"], r["batch_size"]): r["median_us"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = (result["stage"], result["batch_size"])
+        if key not in reference:
+            continue
+        ratio = result["median_us"] / reference[key]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{key[0]} batch={key[1]}: {reference[key]:.1f}us -> {result['median_us']:.1f}us ({ratio:.2f}x)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds spent per stage and batch size")
+    parser.add_argument("--max-repeats", type=int, default=1000)
+    parser.add_argument("--output", help="Write results as JSON to this path (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown vs baseline, e.g. 0.25 = 25%%")
+    args = parser.parse_args()
+
+    # Per-call info logs in the prediction path would otherwise flood the console
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = run_benchmarks(tuple(args.batch_sizes), args.min_time, args.max_repeats)
+    report = {
+        "metadata": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "xgboost": xgb.__version__,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
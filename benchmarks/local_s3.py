@@ -0,0 +1,71 @@
+import hashlib
+import os
+from io import BytesIO
+
+from src.configuration.aws_connection import S3Client
+
+
+class LocalStreamingBody:
+    """
+    Minimal stand-in for botocore's StreamingBody.
+    """
+
+    def __init__(self, data: bytes):
+        self._buffer = BytesIO(data)
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._buffer.read(amt)
+
+    def iter_chunks(self, chunk_size: int = 1024):
+        while chunk := self._buffer.read(chunk_size):
+            yield chunk
+
+
+class LocalS3Client:
+    """
+    Directory-backed stand-in for the boto3 S3 client, implementing the calls SimpleStorageService
+    makes on the model-loading path (get_object, head_object, upload_file, put_object).
+    Objects live at <root_dir>/<bucket>/<key>; the ETag is the MD5 of the content, as for S3 single-part uploads.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root_dir, bucket, key)
+
+    def _read(self, bucket: str, key: str) -> tuple[bytes, str]:
+        with open(self._path(bucket, key), "rb") as file_obj:
+            data = file_obj.read()
+        return data, hashlib.md5(data, usedforsecurity=False).hexdigest()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes = b"") -> dict:  # noqa: N803
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file_obj:
+            file_obj.write(Body)
+        return {"ETag": f'"{hashlib.md5(Body, usedforsecurity=False).hexdigest()}"'}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str) -> None:  # noqa: N803
+        with open(Filename, "rb") as file_obj:
+            self.put_object(Bucket=Bucket, Key=Key, Body=file_obj.read())
+
+    def head_object(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        _, etag = self._read(Bucket, Key)
+        return {"ETag": f'"{etag}"'}
+
+    def get_object(self, Bucket: str, Key: str, IfMatch: str | None = None) -> dict:  # noqa: N803
+        data, etag = self._read(Bucket, Key)
+        if IfMatch is not None and IfMatch.strip('"') != etag:
+            raise RuntimeError(f"PreconditionFailed: {Bucket}/{Key} etag {etag} != {IfMatch}")
+        return {"Body": LocalStreamingBody(data), "ETag": f'"{etag}"'}
+
+
+def install_local_s3(root_dir: str) -> LocalS3Client:
+    """
+    Points every S3Client (and therefore SimpleStorageService) in this process at a local directory.
+    """
+    client = LocalS3Client(root_dir)
+    S3Client.s3_client = client
+    S3Client.s3_resource = client
+    return client
@@ -0,0 +1,9 @@
+# uv run --env-file .env scoring_api.py
+import uvicorn
+
+from src.entity.config_entity import ScoringServiceConfig
+from src.pipline.scoring_service import create_app
+
+if __name__ == "__main__":
+    scoring_service_config = ScoringServiceConfig()
+    uvicorn.run(create_app(), host=scoring_service_config.host, port=scoring_service_config.port)
@@ -7,7 +7,9 @@ from botocore.exceptions import ClientError
 from mypy_boto3_s3.service_resource import Bucket
 from pandas import DataFrame, read_csv
 
+from src.cloud_storage.model_cache import LocalModelCache
 from src.configuration.aws_connection import S3Client
+from src.constants import MODEL_CACHE_DIR, MODEL_CACHE_MAX_VERSIONS
 from src.exception import MyException
 from src.logger import logging
 
@@ -18,14 +20,18 @@ class SimpleStorageService:
     data uploads, and data retrieval in S3 buckets.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, model_cache_dir: str | None = MODEL_CACHE_DIR) -> None:
         """
         Initializes the SimpleStorageService instance with S3 resource and client
         from the S3Client class.
+
+        Args:
+            model_cache_dir (str | None): Local directory for the shared model cache, falsy to disable it.
         """
         s3_client = S3Client()
         self.s3_resource = s3_client.s3_resource
         self.s3_client = s3_client.s3_client
+        self.model_cache = LocalModelCache(model_cache_dir, max_versions=MODEL_CACHE_MAX_VERSIONS) if model_cache_dir else None
 
     def s3_key_path_available(self, bucket_name: str, s3_key: str) -> bool:
         """
@@ -45,6 +51,23 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def get_object_etag(self, bucket_name: str, s3_key: str) -> str:
+        """
+        Fetches the ETag of an S3 object with a HEAD request, without downloading its body.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key path of the object.
+
+        Returns:
+            str: The ETag of the object (quotes stripped).
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+            return response["ETag"].strip('"')
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def read_object(self, bucket_name: str, model_file: str) -> str | BytesIO:
         """
         Reads the specified S3 object with optional decoding and formatting.
@@ -65,6 +88,24 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def download_object_version(self, bucket_name: str, s3_key: str, etag: str, to_filename: str) -> None:
+        """
+        Streams one specific version of an S3 object to a local file.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key path of the object.
+            etag (str): Expected ETag; S3 rejects the request if the object has changed since.
+            to_filename (str): Local destination path.
+        """
+        try:
+            s3_object = self.s3_client.get_object(Bucket=bucket_name, Key=s3_key, IfMatch=etag)
+            with open(to_filename, "wb") as file_obj:
+                for chunk in s3_object["Body"].iter_chunks(chunk_size=1024 * 1024):
+                    file_obj.write(chunk)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def get_bucket(self, bucket_name: str) -> Bucket:
         """
         Retrieves the S3 bucket object based on the provided bucket name.
@@ -109,20 +150,35 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
-    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
+    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None, etag: str | None = None) -> object:
         """
         Loads a serialized model from the specified S3 bucket.
+        When the local model cache is enabled, each (bucket, key, etag) is downloaded once per host
+        and every later load is a local disk read.
 
         Args:
             model_name (str): Name of the model file in the bucket.
             bucket_name (str): Name of the S3 bucket.
             model_dir (str): Directory path within the bucket.
+            etag (str | None): ETag of the version to load, looked up when not given.
 
         Returns:
             object: The deserialized model object.
         """
         try:
             model_file = model_dir + "/" + model_name if model_dir else model_name
+            if self.model_cache is not None:
+                etag = etag or self.get_object_etag(bucket_name=bucket_name, s3_key=model_file)
+                cached_path = self.model_cache.fetch(
+                    bucket_name=bucket_name,
+                    s3_key=model_file,
+                    etag=etag,
+                    download_fn=lambda to_filename: self.download_object_version(bucket_name, model_file, etag, to_filename),
+                )
+                model = joblib.load(cached_path)
+                logging.info(f"Production model loaded from local cache {cached_path}.")
+                return model
+
             model_buffer = self.read_object(bucket_name=bucket_name, model_file=model_file)
 
             # Load the model directly from the stream
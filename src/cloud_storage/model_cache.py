@@ -0,0 +1,110 @@
+import fcntl
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from src.exception import MyException
+from src.logger import logging
+
+
+class LocalModelCache:
+    """
+    Content-addressed on-disk cache for model objects stored in S3, shared by all processes on a host.
+
+    Layout: <cache_dir>/<sha256(bucket/key)[:16]>/<etag>.joblib
+
+    A cached file is only ever written once per (bucket, key, etag): the first process takes an
+    exclusive file lock and downloads into a temp file that is atomically renamed into place,
+    while other processes block on the same lock and then read the finished file.
+    """
+
+    def __init__(self, cache_dir: str, max_versions: int = 2):
+        """
+        :param cache_dir: Directory holding the cached model files
+        :param max_versions: Number of versions kept per (bucket, key); older ones are pruned
+        """
+        self.cache_dir = cache_dir
+        self.max_versions = max(1, max_versions)
+
+    def _key_dir(self, bucket_name: str, s3_key: str) -> str:
+        digest = hashlib.sha256(f"{bucket_name}/{s3_key}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, digest)
+
+    @staticmethod
+    def _safe_etag(etag: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_-]", "_", etag.strip('"'))
+
+    def get_path(self, bucket_name: str, s3_key: str, etag: str) -> str:
+        """
+        Returns the cache file path for one version of an S3 object (it may not exist yet).
+        """
+        return os.path.join(self._key_dir(bucket_name, s3_key), f"{self._safe_etag(etag)}.joblib")
+
+    @staticmethod
+    @contextmanager
+    def _file_lock(lock_path: str) -> Iterator[None]:
+        # flock locks belong to the open file description, so this serializes threads as well as processes
+        with open(lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def fetch(self, bucket_name: str, s3_key: str, etag: str, download_fn: Callable[[str], None]) -> str:
+        """
+        Returns the local path of the given object version, downloading it at most once across processes.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key path of the object.
+            etag (str): ETag of the version to fetch.
+            download_fn (Callable[[str], None]): Writes that exact version to the given local path.
+
+        Returns:
+            str: Path of the cached file.
+        """
+        try:
+            path = self.get_path(bucket_name, s3_key, etag)
+            if os.path.exists(path):
+                logging.info(f"Model cache hit: s3://{bucket_name}/{s3_key} ({etag})")
+                return path
+
+            key_dir = os.path.dirname(path)
+            os.makedirs(key_dir, exist_ok=True)
+            with self._file_lock(f"{path}.lock"):
+                # Another process may have finished the download while we waited for the lock
+                if os.path.exists(path):
+                    logging.info(f"Model cache filled by another process: s3://{bucket_name}/{s3_key} ({etag})")
+                    return path
+                logging.info(f"Model cache miss, downloading s3://{bucket_name}/{s3_key} ({etag})")
+                fd, tmp_path = tempfile.mkstemp(dir=key_dir, suffix=".part")
+                os.close(fd)
+                try:
+                    download_fn(tmp_path)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            self._prune(key_dir)
+            return path
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _prune(self, key_dir: str) -> None:
+        try:
+            versions = sorted(
+                (os.path.join(key_dir, name) for name in os.listdir(key_dir) if name.endswith(".joblib")),
+                key=os.path.getmtime,
+                reverse=True,
+            )
+            for stale in versions[self.max_versions :]:
+                os.remove(stale)
+                logging.info(f"Pruned stale cached model {stale}")
+        except OSError:
+            # A concurrent prune may already have removed a file; pruning is best effort
+            logging.debug(f"Skipped pruning model cache {key_dir}", exc_info=True)
@@ -1,30 +1,38 @@
 import os
 import sys
+from collections import Counter
 
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from src.data_access.feature_store import IncrementalFeatureStore
 from src.data_access.proj1_data import Proj1Data
 from src.entity.artifact_entity import DataIngestionArtifact
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import DataIngestionConfig
 from src.exception import MyException
 from src.logger import logging
+from src.utils.deduplication import StreamingDeduplicator, row_fingerprints
+from src.utils.main_utils import ChunkedDataFrameWriter, save_dataframe
 
 
 class DataIngestion:
-    def __init__(self, data_ingestion_config: DataIngestionConfig):
+    def __init__(self, data_ingestion_config: DataIngestionConfig, artifact_store: ArtifactStore | None = None):
         """
         :param data_ingestion_config: configuration for data ingestion
+        :param artifact_store: run-scoped store handing outputs to later stages (default: write to disk only)
         """
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_store = artifact_store or ArtifactStore(keep_in_memory=False, async_writes=False)
         except Exception as e:
             raise MyException(e, sys)  # noqa: B904
 
     def export_data_into_feature_store(self) -> pd.DataFrame:
         """
         Method Name :   export_data_into_feature_store
-        Description :   This method exports data from mongodb to csv file
+        Description :   This method exports data from mongodb to the feature store file
 
         Output      :   data is returned as artifact of data ingestion components
         On Failure  :   Write an exception log and then raise an exception
@@ -32,17 +40,142 @@ class DataIngestion:
         try:
             logging.info("Exporting data from mongodb to feature store")
             my_data = Proj1Data()
-            datframe = my_data.export_collection_as_dataframe(collection_name=self.data_ingestion_config.collection_name)
+            datframe = my_data.export_collection_as_dataframe(
+                collection_name=self.data_ingestion_config.collection_name,
+                chunk_size=self.data_ingestion_config.export_batch_size,
+                num_partitions=self.data_ingestion_config.export_partitions,
+                max_workers=self.data_ingestion_config.export_workers,
+            )
             logging.info(f"Shape of dataframe is: {datframe.shape}")
             feature_store_file_path = self.data_ingestion_config.feature_store_file_path
             dir_path = os.path.dirname(feature_store_file_path)
             os.makedirs(dir_path, exist_ok=True)
             logging.info(f"Saving exported data into feature store file path: {feature_store_file_path}")
-            datframe.to_csv(feature_store_file_path, index=False, header=True)
+            self.artifact_store.put(feature_store_file_path, datframe, save_dataframe)
+            return datframe
+        except Exception as e:
+            raise MyException(e, sys)  # noqa: B904
+
+    def export_new_data_into_feature_store(self) -> pd.DataFrame:
+        """
+        Method Name :   export_new_data_into_feature_store
+        Description :   This method exports only the documents added since the last ingestion (past the stored
+                        high-watermark), appends them to the persistent feature store and returns all data ingested so far
+
+        Output      :   previously ingested and new data is returned as one dataframe
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            feature_store = IncrementalFeatureStore(
+                store_dir=self.data_ingestion_config.incremental_store_dir, watermark_field=self.data_ingestion_config.watermark_field
+            )
+            field, watermark = self.data_ingestion_config.watermark_field, feature_store.watermark
+            logging.info(f"Exporting data from mongodb past watermark {field}={watermark} into feature store")
+            my_data = Proj1Data()
+            new_data_query = {} if watermark is None else {field: {"$gt": watermark}}
+            # Fix the upper bound first so documents inserted during the export are left for the next run
+            upper_watermark = my_data.get_max_value(collection_name=self.data_ingestion_config.collection_name, field=field, query=new_data_query)
+            if upper_watermark is None:
+                logging.info("No new documents since the last ingestion")
+            else:
+                new_dataframe = my_data.export_collection_as_dataframe(
+                    collection_name=self.data_ingestion_config.collection_name,
+                    chunk_size=self.data_ingestion_config.export_batch_size,
+                    num_partitions=self.data_ingestion_config.export_partitions,
+                    max_workers=self.data_ingestion_config.export_workers,
+                    query={field: new_data_query.get(field, {}) | {"$lte": upper_watermark}},
+                )
+                feature_store.append(new_dataframe, watermark=upper_watermark)
+            datframe = feature_store.load()
+            feature_store.compact(datframe)
+            logging.info(f"Shape of dataframe is: {datframe.shape}")
             return datframe
         except Exception as e:
             raise MyException(e, sys)  # noqa: B904
 
+    def is_test_row(self, dataframe: pd.DataFrame, fingerprints: np.ndarray | None = None) -> np.ndarray:
+        """
+        Method Name :   is_test_row
+        Description :   This method deterministically assigns rows to the test set by their 64-bit fingerprint
+                        (a hash of the row values, see row_fingerprints), so a row is assigned the same way whichever
+                        chunk it arrives in. The stratify column is part of the hashed key, so the rows of every class
+                        are split independently by the same threshold and each class lands in the test set at the split ratio
+
+        Output      :   boolean mask of the rows belonging to the test set
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            row_hashes = row_fingerprints(dataframe) if fingerprints is None else fingerprints
+            threshold = np.uint64(min(int(self.data_ingestion_config.train_test_split_ratio * 2**64), 2**64 - 1))
+            return row_hashes < threshold
+        except Exception as e:
+            raise MyException(e, sys)  # noqa: B904
+
+    def drop_duplicates(self, dataframe: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+        """
+        Method Name :   drop_duplicates
+        Description :   This method drops rows whose schema columns exactly repeat an earlier row (e.g. readings
+                        re-inserted by a backfill), comparing 64-bit row fingerprints
+
+        Output      :   dataframe without duplicates and the number of rows dropped
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            deduplicator = StreamingDeduplicator()
+            dataframe = deduplicator.drop_duplicates(dataframe)
+            logging.info(f"Dropped {deduplicator.num_duplicates} duplicate rows, {deduplicator.num_unique} rows left")
+            return dataframe, deduplicator.num_duplicates
+        except Exception as e:
+            raise MyException(e, sys)  # noqa: B904
+
+    def split_collection_as_train_test(self) -> int:
+        """
+        Method Name :   split_collection_as_train_test
+        Description :   This method streams the collection from mongodb and writes the feature store, train and test files
+                        chunk by chunk, assigning rows with is_test_row. Duplicate rows are dropped on the way unless
+                        deduplication is disabled. Memory use is bounded by the export batch size plus 8 bytes per unique row
+
+        Output      :   Feature store, train and test files are written; returns the number of duplicate rows dropped
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logging.info("Entered split_collection_as_train_test method of Data_Ingestion class")
+        try:
+            my_data = Proj1Data()
+            columns = list(my_data.read_schema_columns())
+            stratify_column = self.data_ingestion_config.stratify_column
+            class_counts: dict[str, Counter] = {"train": Counter(), "test": Counter()}
+            deduplicator = StreamingDeduplicator()
+            with (
+                ChunkedDataFrameWriter(self.data_ingestion_config.feature_store_file_path, columns) as feature_store_writer,
+                ChunkedDataFrameWriter(self.data_ingestion_config.training_file_path, columns) as train_writer,
+                ChunkedDataFrameWriter(self.data_ingestion_config.testing_file_path, columns) as test_writer,
+            ):
+                for chunk in my_data.iter_collection_chunks(
+                    collection_name=self.data_ingestion_config.collection_name, chunk_size=self.data_ingestion_config.export_batch_size
+                ):
+                    chunk = chunk.reindex(columns=columns)
+                    feature_store_writer.write(chunk)
+                    fingerprints = row_fingerprints(chunk)
+                    if self.data_ingestion_config.deduplicate:
+                        unique_rows = deduplicator.unique_mask(fingerprints)
+                        chunk, fingerprints = chunk[unique_rows], fingerprints[unique_rows]
+                    test_rows = self.is_test_row(chunk, fingerprints)
+                    train_writer.write(chunk[~test_rows])
+                    test_writer.write(chunk[test_rows])
+                    class_counts["train"].update(chunk[stratify_column][~test_rows].to_numpy())
+                    class_counts["test"].update(chunk[stratify_column][test_rows].to_numpy())
+            logging.info(
+                f"Streamed {feature_store_writer.num_rows} rows: {deduplicator.num_duplicates} duplicates dropped, "
+                f"{train_writer.num_rows} train, {test_writer.num_rows} test"
+            )
+            for label in class_counts["train"].keys() | class_counts["test"].keys():
+                total = class_counts["train"][label] + class_counts["test"][label]
+                logging.info(f"{stratify_column}={label}: {class_counts['test'][label]} of {total} rows in the test set")
+            logging.info("Exited split_collection_as_train_test method of Data_Ingestion class")
+            return deduplicator.num_duplicates
+        except Exception as e:
+            raise MyException(e, sys)  # noqa: B904
+
     def split_data_as_train_test(self, dataframe: pd.DataFrame) -> None:
         """
         Method Name :   split_data_as_train_test
@@ -53,15 +186,20 @@ class DataIngestion:
         """
         logging.info("Entered split_data_as_train_test method of Data_Ingestion class")
         try:
-            train_set, test_set = train_test_split(dataframe, test_size=self.data_ingestion_config.train_test_split_ratio)
+            if self.data_ingestion_config.streaming_split:
+                # Same assignment as the streaming split: a row stays on its side as the feature store grows
+                test_rows = self.is_test_row(dataframe)
+                train_set, test_set = dataframe[~test_rows], dataframe[test_rows]
+            else:
+                train_set, test_set = train_test_split(dataframe, test_size=self.data_ingestion_config.train_test_split_ratio)
             logging.info("Performed train test split on the dataframe")
             logging.info("Exited split_data_as_train_test method of Data_Ingestion class")
             dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
             os.makedirs(dir_path, exist_ok=True)
 
             logging.info("Exporting train and test file path.")
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index=False, header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path, index=False, header=True)
+            self.artifact_store.put(self.data_ingestion_config.training_file_path, train_set, save_dataframe)
+            self.artifact_store.put(self.data_ingestion_config.testing_file_path, test_set, save_dataframe)
 
             logging.info(
                 f"Exported train {self.data_ingestion_config.training_file_path} and test file path {self.data_ingestion_config.testing_file_path}"
@@ -79,13 +217,24 @@ class DataIngestion:
         """
         logging.info("Entered initiate_data_ingestion method of Data_Ingestion class")
         try:
-            dataframe = self.export_data_into_feature_store()
-            logging.info("Got the data from mongodb")
-            self.split_data_as_train_test(dataframe=dataframe)
+            num_duplicates_removed = 0
+            if self.data_ingestion_config.streaming_split and not self.data_ingestion_config.incremental:
+                num_duplicates_removed = self.split_collection_as_train_test()
+            else:
+                if self.data_ingestion_config.incremental:
+                    dataframe = self.export_new_data_into_feature_store()
+                else:
+                    dataframe = self.export_data_into_feature_store()
+                logging.info("Got the data from mongodb")
+                if self.data_ingestion_config.deduplicate:
+                    dataframe, num_duplicates_removed = self.drop_duplicates(dataframe)
+                self.split_data_as_train_test(dataframe=dataframe)
             logging.info("Performed train test split on the dataset")
             logging.info("Exited initiate_data_ingestion method of Data_Ingestion class")
             data_ingestion_artifact = DataIngestionArtifact(
-                trained_file_path=self.data_ingestion_config.training_file_path, test_file_path=self.data_ingestion_config.testing_file_path
+                trained_file_path=self.data_ingestion_config.training_file_path,
+                test_file_path=self.data_ingestion_config.testing_file_path,
+                num_duplicates_removed=num_duplicates_removed,
             )
             logging.info(f"Data ingestion artifact: {data_ingestion_artifact}")
             return data_ingestion_artifact
@@ -2,17 +2,19 @@ import sys
 
 import numpy as np
 import pandas as pd
-from imblearn.combine import SMOTEENN
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import MinMaxScaler, OrdinalEncoder, StandardScaler
 
 from src.constants import CURRENT_YEAR, SCHEMA_FILE_PATH, TARGET_COLUMN
 from src.entity.artifact_entity import DataIngestionArtifact, DataTransformationArtifact, DataValidationArtifact
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import DataTransformationConfig
+from src.entity.resampler import CachedResampler
+from src.entity.task_graph import TaskGraph
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import read_yaml_file, save_numpy_array_data, save_object
+from src.utils.main_utils import load_dataframe, read_yaml_file, save_numpy_array_data, save_object
 
 
 class DataTransformation:
@@ -21,10 +23,12 @@ class DataTransformation:
         data_ingestion_artifact: DataIngestionArtifact,
         data_transformation_config: DataTransformationConfig,
         data_validation_artifact: DataValidationArtifact,
+        artifact_store: ArtifactStore | None = None,
     ):
         self.data_ingestion_artifact = data_ingestion_artifact
         self.data_transformation_config = data_transformation_config
         self.data_validation_artifact = data_validation_artifact
+        self.artifact_store = artifact_store or ArtifactStore(keep_in_memory=False, async_writes=False)
         try:
             self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
         except Exception as e:
@@ -33,11 +37,13 @@ class DataTransformation:
     @staticmethod
     def read_data(file_path) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path)
         except Exception as e:
             raise MyException(e, sys)
 
     def rename_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Rename on a shallow copy: the input may be shared with other stages through the artifact store
+        df = df.copy(deep=False)
         df.columns = df.columns.str.lower().str.replace(" ", "_", regex=False).str.replace("-", "_", regex=False)
         return df
 
@@ -76,6 +82,34 @@ class DataTransformation:
         col = col.map({"negative": 0, "positive": 1}).astype(int)
         return col
 
+    def load_input_and_target(self, file_path: str) -> tuple[pd.DataFrame, pd.Series]:
+        """
+        Loads a split and returns its input features and its target mapped to 0/1.
+        """
+        df = self.rename_columns(df=self.artifact_store.get(file_path, self.read_data))
+        return df.drop(columns=[TARGET_COLUMN], axis=1), self._map_result_column(col=df[TARGET_COLUMN])
+
+    def fit_preprocessor(self, input_feature_train_df: pd.DataFrame) -> tuple[Pipeline, np.ndarray]:
+        """
+        Fits the preprocessor on the training features and returns it with the transformed features.
+        """
+        preprocessor = self.get_data_transformer_object()
+        logging.info("Initializing transformation for Training-data")
+        return preprocessor, preprocessor.fit_transform(input_feature_train_df)
+
+    @staticmethod
+    def transform_test_data(
+        preprocessor: Pipeline, test_data: tuple[pd.DataFrame, pd.Series], resampler: CachedResampler | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Transforms the test features with the fitted preprocessor and resamples them when a resampler is given.
+        """
+        logging.info("Initializing transformation for Testing-data")
+        input_feature_test_arr = preprocessor.transform(test_data[0])
+        if resampler is None:
+            return input_feature_test_arr, np.asarray(test_data[1])
+        return resampler.fit_resample(input_feature_test_arr, test_data[1])
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         """
         Initiates the data transformation component for the pipeline.
@@ -85,49 +119,45 @@ class DataTransformation:
             if not self.data_validation_artifact.validation_status:
                 raise Exception(self.data_validation_artifact.message)
 
-            # Load train and test data
-            train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
-            test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path)
-            logging.info("Train-Test data loaded")
-            train_df = self.rename_columns(df=train_df)
-            test_df = self.rename_columns(df=test_df)
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
-            target_feature_train_df = train_df[TARGET_COLUMN]
-
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
-            target_feature_test_df = test_df[TARGET_COLUMN]
-            logging.info("Input and Target cols defined for both train and test df.")
-
-            # Preprocessing
-            target_feature_train_df = self._map_result_column(col=target_feature_train_df)
-
-            target_feature_test_df = self._map_result_column(col=target_feature_test_df)
-
-            logging.info("Custom transformations applied to train and test data")
-
-            logging.info("Starting data transformation")
-            preprocessor = self.get_data_transformer_object()
-            logging.info("Got the preprocessor object")
-
-            logging.info("Initializing transformation for Training-data")
-            input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
-            logging.info("Initializing transformation for Testing-data")
-            input_feature_test_arr = preprocessor.transform(input_feature_test_df)
-            logging.info("Transformation done end to end to train-test df.")
+            config = self.data_transformation_config
+            logging.info(f"Applying {config.resampler} for handling imbalanced dataset.")
+            resampler = CachedResampler(
+                method=config.resampler,
+                n_jobs=config.resampler_n_jobs,
+                random_state=config.resampler_random_state,
+                cache_dir=config.resampler_cache_dir,
+                max_cache_entries=config.resampler_cache_size,
+            )
 
-            logging.info("Applying SMOTEENN for handling imbalanced dataset.")
-            smt = SMOTEENN(sampling_strategy="minority")
-            input_feature_train_final, target_feature_train_final = smt.fit_resample(input_feature_train_arr, target_feature_train_df)
-            input_feature_test_final, target_feature_test_final = smt.fit_resample(input_feature_test_arr, target_feature_test_df)
-            logging.info("SMOTEENN applied to train-test df.")
+            # The test branch (load, transform, resample) only waits for the preprocessor fit on the training data,
+            # so it overlaps the training branch's resampling, usually the longest step
+            graph = TaskGraph(max_threads=config.max_workers)
+            graph.add("train_data", lambda: self.load_input_and_target(self.data_ingestion_artifact.trained_file_path))
+            graph.add("test_data", lambda: self.load_input_and_target(self.data_ingestion_artifact.test_file_path))
+            graph.add("preprocessor", lambda train_data: self.fit_preprocessor(train_data[0]), inputs=("train_data",))
+            graph.add(
+                "train_final",
+                lambda train_data, preprocessor: resampler.fit_resample(preprocessor[1], train_data[1]),
+                inputs=("train_data", "preprocessor"),
+            )
+            graph.add(
+                "test_final",
+                lambda test_data, preprocessor: self.transform_test_data(preprocessor[0], test_data, resampler if config.resample_test else None),
+                inputs=("test_data", "preprocessor"),
+            )
+            results = graph.run()
+            preprocessor = results["preprocessor"][0]
+            input_feature_train_final, target_feature_train_final = results["train_final"]
+            input_feature_test_final, target_feature_test_final = results["test_final"]
+            logging.info(f"{config.resampler} applied to train{'-test' if config.resample_test else ''} df.")
 
             train_arr = np.c_[input_feature_train_final, np.array(target_feature_train_final)]
             test_arr = np.c_[input_feature_test_final, np.array(target_feature_test_final)]
             logging.info("feature-target concatenation done for train-test df.")
 
-            save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+            self.artifact_store.put(self.data_transformation_config.transformed_object_file_path, preprocessor, save_object)
+            self.artifact_store.put(self.data_transformation_config.transformed_train_file_path, train_arr, save_numpy_array_data)
+            self.artifact_store.put(self.data_transformation_config.transformed_test_file_path, test_arr, save_numpy_array_data)
             logging.info("Saving transformation object and transformed files.")
 
             logging.info("Data transformation completed successfully")
@@ -1,29 +1,41 @@
 import json
 import os
 import sys
+from collections.abc import Callable, Iterable
 from math import log
 
-import pandas as pd
 from pandas import DataFrame
 
+from src.cloud_storage.aws_storage import SimpleStorageService
 from src.constants import SCHEMA_FILE_PATH
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import DataValidationConfig
+from src.entity.reference_profile import DriftScorer, ReferenceProfile, ReferenceProfileBuilder
+from src.entity.schema_validator import SchemaValidator, iter_chunks
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import read_yaml_file
+from src.utils.main_utils import iter_dataframe_chunks, load_dataframe, read_yaml_file
 
 
 class DataValidation:
-    def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact):
+    def __init__(
+        self,
+        data_validation_config: DataValidationConfig,
+        data_ingestion_artifact: DataIngestionArtifact,
+        artifact_store: ArtifactStore | None = None,
+    ):
         """
         :param data_ingestion_artifact: Output reference of data ingestion artifact stage
         :param data_validation_config: configuration for data validation
+        :param artifact_store: run-scoped store holding the ingested data (default: read from disk)
         """
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
+            self.artifact_store = artifact_store or ArtifactStore(keep_in_memory=False, async_writes=False)
             self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            self.schema_validator = SchemaValidator({name: dtype for column in self._schema_config["columns"] for name, dtype in column.items()})
         except Exception as e:
             raise MyException(e, sys)
 
@@ -35,40 +47,88 @@ class DataValidation:
         except Exception as e:
             raise MyException(e, sys)
 
-    def is_column_exists(self, df: DataFrame) -> bool:
+    @staticmethod
+    def read_data(file_path) -> DataFrame:
+        try:
+            return load_dataframe(file_path)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def validate_data(self, file_path: str, consumers: Iterable[Callable[[DataFrame], None]] = ()) -> dict:
         """
-        Method Name :   is_column_exist
-        Description :   This method validates the existence of a numerical and categorical columns
+        Method Name :   validate_data
+        Description :   This method checks the data set stored at file_path against the schema columns and the
+                        HeartAttackData bounds. Data held by the artifact store is checked in place, otherwise
+                        the file is read chunk by chunk. Every chunk is also handed to the consumers, so
+                        drift scoring and profiling share the same single pass over the data
 
-        Output      :   Returns bool value based on validation results
+        Output      :   Returns the validation report of the data set
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            chunk_size = self.data_validation_config.chunk_size
+            data = self.artifact_store.get(file_path, lambda path: iter_dataframe_chunks(path, chunk_size))
+            consumers = list(consumers)
+
+            def chunks():
+                for chunk in iter_chunks(data, chunk_size):
+                    for consumer in consumers:
+                        consumer(chunk)
+                    yield chunk
+
+            return self.schema_validator.validate(chunks(), chunk_size=chunk_size)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_production_reference_profile(self) -> ReferenceProfile | None:
+        """
+        Method Name :   get_production_reference_profile
+        Description :   This method fetches the reference profile stored next to the production model in s3
+
+        Output      :   Returns the reference profile, or None when no profile has been pushed yet
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            dataframe_columns = df.columns
-            missing_numerical_columns = []
-            missing_categorical_columns = []
-            for column in self._schema_config["numerical_columns"]:
-                if column not in dataframe_columns:
-                    missing_numerical_columns.append(column)
-            if len(missing_numerical_columns) > 0:
-                logging.info(f"Missing numerical columns: {missing_numerical_columns}")
-            for column in self._schema_config["categorical_columns"]:
-                if column not in dataframe_columns:
-                    missing_categorical_columns.append(column)
-
-            if len(missing_categorical_columns) > 0:
-                logging.info(f"Missing categorical column: {missing_categorical_columns}")
-
-            return not (len(missing_categorical_columns) > 0 or len(missing_numerical_columns) > 0)
+            s3 = SimpleStorageService()
+            bucket_name, key = self.data_validation_config.bucket_name, self.data_validation_config.s3_reference_profile_key_path
+            if not s3.s3_key_path_available(bucket_name=bucket_name, s3_key=key):
+                logging.info(f"No reference profile at s3://{bucket_name}/{key}, skipping drift detection")
+                return None
+            return ReferenceProfile.from_json(s3.read_object(bucket_name=bucket_name, model_file=key).getvalue())
         except Exception as e:
             raise MyException(e, sys) from e
 
     @staticmethod
-    def read_data(file_path) -> DataFrame:
+    def report_errors(data_set: str, report: dict) -> str:
+        """
+        Method Name :   report_errors
+        Description :   This method turns the problems of a validation report that make the data unusable
+                        (missing or unexpected columns, non-numeric values) into an error message and logs
+                        the ones that do not (nulls, dtype changes, out-of-range values)
+
+        Output      :   Returns the error message, empty when the data set is usable
+        On Failure  :   Write an exception log and then raise an exception
+        """
         try:
-            return pd.read_csv(file_path)
+            error_msg = ""
+            if report["missing_columns"] or report["unexpected_columns"]:
+                error_msg += (
+                    f"{data_set} dataframe does not match the schema columns "
+                    f"(missing: {report['missing_columns']}, unexpected: {report['unexpected_columns']}).\n"
+                )
+            for name, column_report in report["columns"].items():
+                if column_report.get("invalid_count"):
+                    error_msg += f"{data_set} column {name} has {column_report['invalid_count']} non-numeric values.\n"
+                if column_report.get("out_of_range_count"):
+                    logging.warning(
+                        f"{data_set} column {name}: {column_report['out_of_range_count']} values outside "
+                        f"[{column_report['lower_bound']}, {column_report['upper_bound']}]"
+                    )
+                if column_report["null_count"] or column_report["dtype_mismatch"]:
+                    logging.info(f"{data_set} column {name}: {column_report['null_count']} nulls, dtypes {column_report['dtypes']}")
+            return error_msg
         except Exception as e:
-            raise MyException(e, sys)
+            raise MyException(e, sys) from e
 
     def initiate_data_validation(self) -> DataValidationArtifact:
         """
@@ -81,28 +141,40 @@ class DataValidation:
         try:
             validation_error_msg = ""
             logging.info("Entered initiate_data_validation method of Data_Validation class")
-            train_df, test_df = (
-                DataValidation.read_data(self.data_ingestion_artifact.trained_file_path),
-                DataValidation.read_data(self.data_ingestion_artifact.test_file_path),
+            rules = self.schema_validator.rules
+            profile_builder = ReferenceProfileBuilder(
+                numeric_columns=[rule.name for rule in rules if rule.is_numeric],
+                categorical_columns=[rule.name for rule in rules if not rule.is_numeric],
+                n_bins=self.data_validation_config.reference_bins,
+                sample_size=self.data_validation_config.reference_sample_size,
             )
-            # Checking col len of dataframe for train/test df
-            status = self.validate_number_of_columns(dataframe=train_df)
-            if not status:
-                validation_error_msg += "Train dataframe does not contain all columns.\n"
-            else:
-                logging.info("Train dataframe contains all columns")
-            status = self.validate_number_of_columns(dataframe=test_df)
-
-            if not status:
-                validation_error_msg += " Columns are missing in test dataframe. "
-            else:
-                logging.info(f"All required columns present in testing dataframe: {status}")
+            production_profile = self.get_production_reference_profile() if self.data_validation_config.drift_detection else None
+            drift_scorer = None if production_profile is None else DriftScorer(production_profile, self.data_validation_config.psi_threshold)
+            drift_consumers = [] if drift_scorer is None else [drift_scorer.update]
+
+            # The profile describes the data the model is trained on; drift is scored over all newly ingested data
+            train_report = self.validate_data(self.data_ingestion_artifact.trained_file_path, [profile_builder.update, *drift_consumers])
+            validation_error_msg += self.report_errors("Train", train_report)
+            test_report = self.validate_data(self.data_ingestion_artifact.test_file_path, drift_consumers)
+            validation_error_msg += self.report_errors("Test", test_report)
+
+            profile_builder.build().save(self.data_validation_config.reference_profile_file_path)
+            drift_report = None if drift_scorer is None else drift_scorer.scores()
+            if drift_report is not None:
+                logging.info(
+                    f"Drift detected: {drift_report['drift_detected']}, max PSI {drift_report['max_psi']:.4f}, "
+                    f"drifted: {drift_report['drifted_features']}"
+                )
+            if not validation_error_msg:
+                logging.info("Train and test dataframes match the schema")
             validation_status = len(validation_error_msg) == 0
 
             data_validation_artifact = DataValidationArtifact(
                 validation_status=validation_status,
                 message=validation_error_msg,
                 validation_report_file_path=self.data_validation_config.validation_report_file_path,
+                reference_profile_file_path=self.data_validation_config.reference_profile_file_path,
+                drift_detected=None if drift_report is None else drift_report["drift_detected"],
             )
 
             # Ensure the directory for validation_report_file_path exists
@@ -110,7 +182,13 @@ class DataValidation:
             os.makedirs(report_dir, exist_ok=True)
 
             # Save validation status and message to a JSON file
-            validation_report = {"validation_status": validation_status, "message": validation_error_msg.strip()}
+            validation_report = {
+                "validation_status": validation_status,
+                "message": validation_error_msg.strip(),
+                "train": train_report,
+                "test": test_report,
+                "drift": drift_report,
+            }
 
             with open(self.data_validation_config.validation_report_file_path, "w") as report_file:
                 json.dump(validation_report, report_file, indent=4)
@@ -2,12 +2,13 @@ import sys
 from dataclasses import dataclass
 from typing import Optional
 
-import pandas as pd
+import numpy as np
 from sklearn.metrics import f1_score
 
 from src.components.data_transformation import DataTransformation
 from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
 from src.entity.artifact_entity import DataIngestionArtifact, ModelEvaluationArtifact, ModelTrainerArtifact
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import ModelEvaluationConfig
 from src.entity.s3_estimator import S3Estimator
 from src.exception import MyException
@@ -24,12 +25,30 @@ class EvaluateModelResponse:
     difference: float
 
 
+@dataclass
+class ProductionModelScore:
+    # f1_score is None when no model is in production yet
+    f1_score: float | None
+    y_true: np.ndarray | None = None
+    y_pred: np.ndarray | None = None
+
+
+def render_production_model_plots(production_model_score: ProductionModelScore) -> None:
+    """
+    Renders the confusion matrix and ROC curve of the production model on the test set.
+    Module-level so it can run in a worker process (matplotlib is not thread-safe).
+    """
+    plot_confusion_matrix(production_model_score.y_true, production_model_score.y_pred)
+    plot_roc_curve(y=production_model_score.y_true, y_hat=production_model_score.y_pred)
+
+
 class ModelEvaluation(DataTransformation):
     def __init__(
         self,
         model_evaluation_config: ModelEvaluationConfig,
         data_ingestion_artifact: DataIngestionArtifact,
-        model_trainer_artifact: ModelTrainerArtifact,
+        model_trainer_artifact: ModelTrainerArtifact | None,
+        artifact_store: ArtifactStore | None = None,
     ):
         try:
             self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
@@ -38,6 +57,7 @@ class ModelEvaluation(DataTransformation):
         self.model_eval_config = model_evaluation_config
         self.data_ingestion_artifact = data_ingestion_artifact
         self.model_trainer_artifact = model_trainer_artifact
+        self.artifact_store = artifact_store or ArtifactStore(keep_in_memory=False, async_writes=False)
 
     def get_best_model(self) -> Optional[S3Estimator]:
         """
@@ -58,38 +78,51 @@ class ModelEvaluation(DataTransformation):
         except Exception as e:
             raise MyException(e, sys)
 
-    def evaluate_model(self) -> EvaluateModelResponse:
+    def score_production_model(self) -> ProductionModelScore:
         """
-        Method Name :   evaluate_model
-        Description :   This function is used to evaluate trained model
-                        with production model and choose best model
+        Method Name :   score_production_model
+        Description :   This function scores the production model (if any) on the test set.
+                        It does not depend on the trained model, so it can run while training is in progress.
 
-        Output      :   Returns bool value based on validation results
+        Output      :   Returns the production model's F1 score with its test labels and predictions
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            best_model = self.get_best_model()
+            if not best_model:
+                return ProductionModelScore(f1_score=None)
+
+            test_df = self.artifact_store.get(self.data_ingestion_artifact.test_file_path, self.read_data)
             test_df = self.rename_columns(df=test_df)
             x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
-            logging.info("Splitting data into train and test set")
             y = self._map_result_column(col=y)
 
-            logging.info("Trained model loaded/exists.")
-            trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
-            logging.info(f"F1_Score for this model: {trained_model_f1_score}")
+            logging.info("Computing F1_Score for production model..")
+            y_hat_best_model = best_model.predict(x)
+            return ProductionModelScore(f1_score=f1_score(y, y_hat_best_model), y_true=y.to_numpy(), y_pred=np.asarray(y_hat_best_model))
+        except Exception as e:
+            raise MyException(e, sys) from e
 
-            best_model_f1_score = None
-            best_model = self.get_best_model()
-            if best_model:
-                logging.info("Computing F1_Score for production model..")
-                y_hat_best_model = best_model.predict(x)
-                best_model_f1_score = f1_score(y, y_hat_best_model)
+    def evaluate_model(self, production_model_score: ProductionModelScore | None = None) -> EvaluateModelResponse:
+        """
+        Method Name :   evaluate_model
+        Description :   This function is used to evaluate trained model
+                        with production model and choose best model
 
-                # --- Plots
-                # confusion matrix
-                plot_confusion_matrix(y, y_hat_best_model)  # Close the figure to free memory
-                plot_roc_curve(y=y.to_numpy(), y_hat=y_hat_best_model)
+        Output      :   Returns bool value based on validation results
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
+            logging.info(f"F1_Score for this model: {trained_model_f1_score}")
 
+            if production_model_score is None:
+                # Scored here when the caller did not score the production model ahead of time
+                production_model_score = self.score_production_model()
+                if production_model_score.f1_score is not None:
+                    render_production_model_plots(production_model_score)
+            best_model_f1_score = production_model_score.f1_score
+            if best_model_f1_score is not None:
                 logging.info(f"F1_Score-Production Model: {best_model_f1_score}, F1_Score-New Trained Model: {trained_model_f1_score}")
 
             tmp_best_model_score = 0 if best_model_f1_score is None else best_model_f1_score
@@ -105,10 +138,11 @@ class ModelEvaluation(DataTransformation):
         except Exception as e:
             raise MyException(e, sys)
 
-    def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
+    def initiate_model_evaluation(self, production_model_score: ProductionModelScore | None = None) -> ModelEvaluationArtifact:
         """
         Method Name :   initiate_model_evaluation
         Description :   This function is used to initiate all steps of the model evaluation
+                        production_model_score: result of score_production_model, computed here when not given
 
         Output      :   Returns model evaluation artifact
         On Failure  :   Write an exception log and then raise an exception
@@ -116,7 +150,7 @@ class ModelEvaluation(DataTransformation):
         try:
             print("------------------------------------------------------------------------------------------------")
             logging.info("Initialized Model Evaluation Component.")
-            evaluate_model_response = self.evaluate_model()
+            evaluate_model_response = self.evaluate_model(production_model_score=production_model_score)
             s3_model_path = self.model_eval_config.s3_model_key_path
 
             model_evaluation_artifact = ModelEvaluationArtifact(
@@ -1,7 +1,8 @@
 import sys
 
 from src.cloud_storage.aws_storage import SimpleStorageService
-from src.entity.artifact_entity import ModelEvaluationArtifact, ModelPusherArtifact
+from src.entity.artifact_entity import DataValidationArtifact, ModelEvaluationArtifact, ModelPusherArtifact
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import ModelPusherConfig
 from src.entity.s3_estimator import S3Estimator
 from src.exception import MyException
@@ -9,12 +10,22 @@ from src.logger import logging
 
 
 class ModelPusher:
-    def __init__(self, model_evaluation_artifact: ModelEvaluationArtifact, model_pusher_config: ModelPusherConfig):
+    def __init__(
+        self,
+        model_evaluation_artifact: ModelEvaluationArtifact,
+        model_pusher_config: ModelPusherConfig,
+        artifact_store: ArtifactStore | None = None,
+        data_validation_artifact: DataValidationArtifact | None = None,
+    ):
         """
         :param model_evaluation_artifact: Output reference of data evaluation artifact stage
         :param model_pusher_config: Configuration for model pusher
+        :param artifact_store: run-scoped store that may still be writing the trained model file
+        :param data_validation_artifact: Output reference of data validation stage, whose reference profile is pushed with the model
         """
+        self.data_validation_artifact = data_validation_artifact
         self.s3 = SimpleStorageService()
+        self.artifact_store = artifact_store or ArtifactStore(keep_in_memory=False, async_writes=False)
         self.model_evaluation_artifact = model_evaluation_artifact
         self.model_pusher_config = model_pusher_config
         self.proj1_estimator = S3Estimator(bucket_name=model_pusher_config.bucket_name, model_path=model_pusher_config.s3_model_key_path)
@@ -34,7 +45,19 @@ class ModelPusher:
             logging.info("Uploading artifacts folder to s3 bucket")
 
             logging.info("Uploading new model to S3 bucket....")
+            # The upload reads the model file, which may still be being written in the background
+            self.artifact_store.wait(self.model_evaluation_artifact.trained_model_path)
             self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
+            # Pushed after the model: if this upload fails, new data is compared with an older profile and
+            # drift is over- rather than under-reported
+            if self.data_validation_artifact is not None and self.data_validation_artifact.reference_profile_file_path is not None:
+                logging.info("Uploading reference profile next to the model....")
+                self.s3.upload_file(
+                    self.data_validation_artifact.reference_profile_file_path,
+                    to_filename=self.model_pusher_config.s3_reference_profile_key_path,
+                    bucket_name=self.model_pusher_config.bucket_name,
+                    remove=False,
+                )
             model_pusher_artifact = ModelPusherArtifact(
                 bucket_name=self.model_pusher_config.bucket_name, s3_model_path=self.model_pusher_config.s3_model_key_path
             )
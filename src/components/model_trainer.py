@@ -1,57 +1,141 @@
 import sys
 
 import numpy as np
-import xgboost as xgb
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 
-from src.entity.artifact_entity import ClassificationMetricArtifact, DataTransformationArtifact, ModelTrainerArtifact
+from src.entity.artifact_entity import ClassificationMetricArtifact, CrossValidationMetricArtifact, DataTransformationArtifact, ModelTrainerArtifact
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import ModelTrainerConfig
+from src.entity.cross_validation import CrossValidation
 from src.entity.estimator import MyModel
+from src.entity.hist_training import HistTrainingSet
+from src.entity.hyperparameter_search import HyperparameterSearch
 from src.exception import MyException
 from src.logger import logging
 from src.utils.main_utils import load_numpy_array_data, load_object, save_object
 
 
 class ModelTrainer:
-    def __init__(self, data_transformation_artifact: DataTransformationArtifact, model_trainer_config: ModelTrainerConfig):
+    def __init__(
+        self,
+        data_transformation_artifact: DataTransformationArtifact,
+        model_trainer_config: ModelTrainerConfig,
+        artifact_store: ArtifactStore | None = None,
+    ):
         """
         :param data_transformation_artifact: Output reference of data transformation artifact stage
         :param model_trainer_config: Configuration for model training
+        :param artifact_store: run-scoped store holding the transformed data and preprocessor (default: read from disk)
         """
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.artifact_store = artifact_store or ArtifactStore(keep_in_memory=False, async_writes=False)
 
-    def get_model_object_and_report(self, train_array: np.ndarray, test_array: np.ndarray) -> tuple:
+    def tune_hyperparameters(self) -> dict:
+        """
+        Method Name :   tune_hyperparameters
+        Description :   This function runs the budgeted optuna search of XGBoost hyperparameters
+                        on the transformed training data, with trials spread over a process pool
+
+        Output      :   Returns the best hyperparameters found
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.model_trainer_config
+            train_file_path = self.data_transformation_artifact.transformed_train_file_path
+            # The workers memory-map the training data from disk, so it must have been written
+            self.artifact_store.wait(train_file_path)
+            logging.info(f"Tuning hyperparameters: {config.tuning_trials} trials on {config.tuning_workers} workers")
+            search = HyperparameterSearch(
+                journal_file_path=config.tuning_journal_file_path,
+                validation_size=config.validation_size,
+                n_trials=config.tuning_trials,
+                timeout=config.tuning_timeout,
+                n_workers=config.tuning_workers,
+                threads_per_trial=config.tuning_threads_per_trial,
+                early_stopping_rounds=config.early_stopping_rounds or None,
+                max_bin=config.max_bin,
+                random_state=config._random_state,
+            )
+            best_params, best_score = search.run(train_file_path)
+            logging.info(f"Best hyperparameters: {best_params} (validation ROC AUC {best_score:.5f})")
+            return best_params
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def cross_validate(self, params: dict | None = None) -> CrossValidationMetricArtifact:
+        """
+        Method Name :   cross_validate
+        Description :   This function cross-validates the model (the configured parameters, overridden by params)
+                        with stratified k-fold on the transformed training data, folds trained in a process pool
+
+        Output      :   Returns the mean and variance of each metric over the folds
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.model_trainer_config
+            train_file_path = self.data_transformation_artifact.transformed_train_file_path
+            # The workers memory-map the training data from disk, so it must have been written
+            self.artifact_store.wait(train_file_path)
+            logging.info(f"Cross-validating: {config.cv_folds} folds on {config.cv_workers} workers")
+            cross_validation = CrossValidation(
+                n_splits=config.cv_folds,
+                n_workers=config.cv_workers,
+                threads_per_fold=config.cv_threads_per_fold,
+                early_stopping_rounds=config.early_stopping_rounds or None,
+                validation_size=config.validation_size,
+                max_bin=config.max_bin,
+                random_state=config._random_state,
+            )
+            cv_metric_artifact = cross_validation.run(train_file_path, {**self._model_params(), **(params or {})})
+            logging.info(f"Cross-validation metrics: {cv_metric_artifact}")
+            return cv_metric_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _model_params(self) -> dict:
+        config = self.model_trainer_config
+        return {
+            "n_estimators": config._n_estimators,
+            "learning_rate": config._learning_rate,
+            "subsample": config._subsample,
+            "scale_pos_weight": config._scale_pos_weight,
+            "random_state": config._random_state,
+        }
+
+    def get_model_object_and_report(self, train_array: np.ndarray, test_array: np.ndarray, params: dict | None = None) -> tuple:
         """
         Method Name :   get_model_object_and_report
-        Description :   This function trains a RandomForestClassifier with specified parameters
+        Description :   This function trains an XGBClassifier with specified parameters (the configured ones,
+                        overridden by params) on quantized hist matrices, stopping early on a validation split
 
-        Output      :   Returns metric artifact object and trained model object
+        Output      :   Returns trained model object, metric artifact object and training accuracy
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
+            config = self.model_trainer_config
             logging.info("Training Classifier")
-            # Splitting the train and test data into features and target variables
-            x_train, y_train, x_test, y_test = train_array[:, :-1], train_array[:, -1], test_array[:, :-1], test_array[:, -1]
-            logging.info("train-test split done.")
-
-            # Initialize RandomForestClassifier with specified parameters
-            model = xgb.XGBClassifier(
-                n_estimators=self.model_trainer_config._n_estimators,
-                learning_rate=self.model_trainer_config._learning_rate,
-                subsample=self.model_trainer_config._subsample,
-                scale_pos_weight=self.model_trainer_config._scale_pos_weight,
-                random_state=self.model_trainer_config._random_state,
+            # The validation split is only needed to decide when to stop boosting
+            training_set = HistTrainingSet.from_array(
+                train_array,
+                validation_size=config.validation_size if config.early_stopping_rounds else 0.0,
+                random_state=config._random_state,
+                max_bin=config.max_bin,
+                n_jobs=config.n_jobs,
             )
+            x_test, y_test = test_array[:, :-1], test_array[:, -1]
+            logging.info("Training matrices built.")
+
+            # Initialize XGBClassifier parameters
+            model_params = {**self._model_params(), "n_jobs": config.n_jobs, **(params or {})}
 
             # Fit the model
             logging.info("Model training going on...")
-            model.fit(x_train, y_train)
-            logging.info("Model training done.")
+            result = training_set.fit(model_params, early_stopping_rounds=config.early_stopping_rounds or None)
+            logging.info(f"Model training done: kept {result.best_iteration + 1} of at most {model_params['n_estimators']} trees.")
 
             # Predictions and evaluation metrics
-            y_pred = model.predict(x_test)
+            y_pred = result.model.predict(x_test)
             accuracy = accuracy_score(y_test, y_pred)
             f1 = f1_score(y_test, y_pred)
             precision = precision_score(y_test, y_pred)
@@ -60,7 +144,7 @@ class ModelTrainer:
             # Creating metric artifact
             metric_artifact = ClassificationMetricArtifact(f1_score=f1, precision_score=precision, recall_score=recall, accuracy_score=accuracy)
 
-            return model, metric_artifact
+            return result.model, metric_artifact, result.train_accuracy
 
         except Exception as e:
             raise MyException(e, sys) from e
@@ -78,33 +162,42 @@ class ModelTrainer:
             logging.info("------------------------------------------------------------------------------------------------")
             logging.info("Starting Model Trainer Component")
             # Load transformed train and test data
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            train_arr = self.artifact_store.get(self.data_transformation_artifact.transformed_train_file_path, load_numpy_array_data)
+            test_arr = self.artifact_store.get(self.data_transformation_artifact.transformed_test_file_path, load_numpy_array_data)
             logging.info("train-test data loaded")
 
+            best_params = self.tune_hyperparameters() if self.model_trainer_config.tuning else None
+            cv_metric_artifact = self.cross_validate(best_params) if self.model_trainer_config.cross_validation else None
+
             # Train model and get metrics
-            trained_model, metric_artifact = self.get_model_object_and_report(train_array=train_arr, test_array=test_arr)
+            trained_model, metric_artifact, train_accuracy = self.get_model_object_and_report(
+                train_array=train_arr, test_array=test_arr, params=best_params
+            )
             logging.info("Model object and artifact loaded.")
 
             # Load preprocessing object
-            preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            preprocessing_obj = self.artifact_store.get(self.data_transformation_artifact.transformed_object_file_path, load_object)
             logging.info("Preprocessing obj loaded.")
 
-            # Check if the model's accuracy meets the expected threshold
-            if accuracy_score(train_arr[:, -1], trained_model.predict(train_arr[:, :-1])) < self.model_trainer_config.expected_accuracy:
+            # Check if the model's accuracy meets the expected threshold: cross-validated when available,
+            # otherwise the training accuracy measured during training
+            accuracy = cv_metric_artifact.mean.accuracy_score if cv_metric_artifact is not None else train_accuracy
+            if accuracy < self.model_trainer_config.expected_accuracy:
                 logging.info("No model found with score above the base score")
                 raise Exception("No model found with score above the base score")
 
             # Save the final model object that includes both preprocessing and the trained model
             logging.info("Saving new model as performance is better than previous one.")
             my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
-            save_object(self.model_trainer_config.trained_model_file_path, my_model)
+            self.artifact_store.put(self.model_trainer_config.trained_model_file_path, my_model, save_object)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
                 metric_artifact=metric_artifact,
+                best_params=best_params,
+                cv_metric_artifact=cv_metric_artifact,
             )
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
             return model_trainer_artifact
@@ -12,12 +12,26 @@ MONGODB_URL_KEY = "DB_CONNECTION_URL"
 
 PIPELINE_NAME: str = ""
 ARTIFACT_DIR: str = "artifact"
+# Hand stage outputs to the next stage in memory and write them to the artifact directory in the background
+TRAINING_PIPELINE_IN_MEMORY_ARTIFACTS: bool = os.environ.get("TRAINING_PIPELINE_IN_MEMORY_ARTIFACTS", "true").lower() in ("1", "true", "yes")
+# Stop after data validation when the new data has not drifted from the production model's training data
+TRAINING_PIPELINE_SKIP_WITHOUT_DRIFT: bool = os.environ.get("TRAINING_PIPELINE_SKIP_WITHOUT_DRIFT", "false").lower() in ("1", "true", "yes")
+# Reuse the outputs of stages whose config and inputs match an earlier run (content-addressed, shared by all runs)
+TRAINING_PIPELINE_STAGE_CACHE: bool = os.environ.get("TRAINING_PIPELINE_STAGE_CACHE", "false").lower() in ("1", "true", "yes")
+TRAINING_PIPELINE_STAGE_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "stage_cache")
+# ID (artifact directory name) of an earlier run to resume from its first incomplete stage
+TRAINING_PIPELINE_RUN_ID: str | None = os.environ.get("TRAINING_PIPELINE_RUN_ID") or None
+RUN_MANIFEST_FILE_NAME: str = "run_manifest.json"
+# Threads running independent pipeline tasks concurrently (1: run every task sequentially)
+TRAINING_PIPELINE_MAX_WORKERS: int = int(os.environ.get("TRAINING_PIPELINE_MAX_WORKERS", 4))
 
 README_ASSETS = "readme_assets"
 
 TIMESTAMP: str = f"timestamp-{date.today()}"
 
 MODEL_FILE_NAME = "model.joblib"
+# Per-feature histograms of the training data, stored next to the model to detect drift in new data
+REFERENCE_PROFILE_FILE_NAME = "reference_profile.json"
 
 TARGET_COLUMN = "result"
 CURRENT_YEAR = date.today().year
@@ -27,6 +41,11 @@ FILE_NAME: str = "data.csv"
 TRAIN_FILE_NAME: str = "train.csv"
 TEST_FILE_NAME: str = "test.csv"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
+# Storage format of the ingestion artifacts (feature store, train and test files): "csv",
+# "parquet" (requires pyarrow) or "npy" (one memory-mapped .npy file per column)
+DATA_FILE_FORMAT: str = os.environ.get("DATA_FILE_FORMAT", "csv")
+DATA_FILE_EXTENSIONS: dict[str, str] = {"csv": ".csv", "parquet": ".parquet", "npy": ".cols"}
+DATA_FILE_EXTENSION: str = DATA_FILE_EXTENSIONS[DATA_FILE_FORMAT]
 
 # --- AWS S3 related constant start with AWS VAR NAME
 AWS_ACCESS_KEY_ID_ENV_KEY = "AWS_ACCESS_KEY_ID"  # nosec B105
@@ -40,16 +59,49 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
+# Documents fetched per cursor round-trip (and rows per chunk) when exporting the collection
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = int(os.environ.get("DATA_INGESTION_EXPORT_BATCH_SIZE", 10_000))
+# '_id' ranges read concurrently by the export (1 = single cursor) and how many run at once
+DATA_INGESTION_EXPORT_PARTITIONS: int = int(os.environ.get("DATA_INGESTION_EXPORT_PARTITIONS", 1))
+DATA_INGESTION_EXPORT_WORKERS: int = int(os.environ.get("DATA_INGESTION_EXPORT_WORKERS", 4))
+# Incremental ingestion: only documents past the stored high-watermark are exported and appended
+# to a feature store that persists across training runs
+DATA_INGESTION_INCREMENTAL: bool = os.environ.get("DATA_INGESTION_INCREMENTAL", "false").lower() in ("1", "true", "yes")
+DATA_INGESTION_INCREMENTAL_STORE_DIR: str = os.path.join(ARTIFACT_DIR, "feature_store")
+DATA_INGESTION_WATERMARK_FIELD: str = os.environ.get("DATA_INGESTION_WATERMARK_FIELD", "_id")
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.json"
+DATA_INGESTION_INCREMENTAL_MAX_PARTS: int = 32
+# Streaming split: rows are assigned to train/test by a hash of their values as they arrive from MongoDB,
+# stratified on DATA_INGESTION_STRATIFY_COLUMN, and written chunk by chunk instead of materializing the collection
+DATA_INGESTION_STREAMING_SPLIT: bool = os.environ.get("DATA_INGESTION_STREAMING_SPLIT", "false").lower() in ("1", "true", "yes")
+DATA_INGESTION_STRATIFY_COLUMN: str = "Result"
+# Drop rows that exactly repeat an earlier row (e.g. re-inserted by a backfill) before the split
+DATA_INGESTION_DEDUPLICATE: bool = os.environ.get("DATA_INGESTION_DEDUPLICATE", "true").lower() in ("1", "true", "yes")
 
 # --- Data Validation related constant start with DATA_VALIDATION VAR NAME
 
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_REPORT_FILE_NAME: str = "report.yaml"
+# Rows checked per chunk when validating data read from disk
+DATA_VALIDATION_CHUNK_SIZE: int = int(os.environ.get("DATA_VALIDATION_CHUNK_SIZE", 1_000_000))
+# Drift detection against the reference profile of the production model
+DATA_VALIDATION_DRIFT_DETECTION: bool = os.environ.get("DATA_VALIDATION_DRIFT_DETECTION", "true").lower() in ("1", "true", "yes")
+DATA_VALIDATION_PSI_THRESHOLD: float = float(os.environ.get("DATA_VALIDATION_PSI_THRESHOLD", 0.2))
+DATA_VALIDATION_REFERENCE_BINS: int = 20
+DATA_VALIDATION_REFERENCE_SAMPLE_SIZE: int = 200_000
 
 # --- Data Transformation related constant start with DATA_TRANSFORMATION VAR NAME
 DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"
+# Class rebalancing: "smoteenn", "smote", "random_over", "random_under" or "none"
+DATA_TRANSFORMATION_RESAMPLER: str = os.environ.get("DATA_TRANSFORMATION_RESAMPLER", "smoteenn")
+DATA_TRANSFORMATION_RESAMPLER_N_JOBS: int = int(os.environ.get("DATA_TRANSFORMATION_RESAMPLER_N_JOBS", -1))
+DATA_TRANSFORMATION_RESAMPLE_TEST: bool = os.environ.get("DATA_TRANSFORMATION_RESAMPLE_TEST", "true").lower() in ("1", "true", "yes")
+DATA_TRANSFORMATION_RESAMPLER_RANDOM_STATE: int = 42
+# Resampled arrays are cached across training runs, keyed by the input arrays and the sampler settings
+DATA_TRANSFORMATION_RESAMPLER_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "resample_cache")
+DATA_TRANSFORMATION_RESAMPLER_CACHE_SIZE: int = 8
 
 # --- MODEL TRAINER related constant start with MODEL_TRAINER var name
 MODEL_TRAINER_DIR_NAME: str = "model_trainer"
@@ -62,13 +114,55 @@ MODEL_TRAINER_LEARNING_RATE = 0.007659266705050152
 MIN_SAMPLES_SPLIT_RANDOM_STATE: int = 101
 MODEL_TRAINER_SUBSAMPLE = 0.8638068341586023
 MODEL_TRAINER_SCALE_POS_WEIGHT = 3.0839016606865917
-
+# Stop boosting once the validation logloss has not improved for this many rounds (0: always build all the trees)
+MODEL_TRAINER_EARLY_STOPPING_ROUNDS: int = int(os.environ.get("MODEL_TRAINER_EARLY_STOPPING_ROUNDS", 50))
+# Share of the training data held out as validation set for early stopping
+MODEL_TRAINER_VALIDATION_SIZE: float = 0.1
+# Histogram bins per feature of the quantized training matrices, and XGBoost threads of the final fit
+MODEL_TRAINER_MAX_BIN: int = 256
+MODEL_TRAINER_N_JOBS: int = int(os.environ.get("MODEL_TRAINER_N_JOBS", os.cpu_count() or 1))
+# Optional optuna search replacing the hyperparameters above (needs the dev dependencies)
+MODEL_TRAINER_TUNING: bool = os.environ.get("MODEL_TRAINER_TUNING", "false").lower() in ("1", "true", "yes")
+MODEL_TRAINER_TUNING_TRIALS: int = int(os.environ.get("MODEL_TRAINER_TUNING_TRIALS", 50))
+MODEL_TRAINER_TUNING_TIMEOUT: float | None = (
+    float(os.environ["MODEL_TRAINER_TUNING_TIMEOUT"]) if os.environ.get("MODEL_TRAINER_TUNING_TIMEOUT") else None
+)
+MODEL_TRAINER_TUNING_WORKERS: int = int(os.environ.get("MODEL_TRAINER_TUNING_WORKERS", os.cpu_count() or 1))
+MODEL_TRAINER_TUNING_THREADS_PER_TRIAL: int = int(os.environ.get("MODEL_TRAINER_TUNING_THREADS_PER_TRIAL", 1))
+MODEL_TRAINER_TUNING_JOURNAL_FILE_NAME: str = "tuning_journal.log"
+# Optional stratified k-fold cross-validation of the model on the training data, folds trained in parallel processes
+MODEL_TRAINER_CV: bool = os.environ.get("MODEL_TRAINER_CV", "false").lower() in ("1", "true", "yes")
+MODEL_TRAINER_CV_FOLDS: int = int(os.environ.get("MODEL_TRAINER_CV_FOLDS", 5))
+MODEL_TRAINER_CV_WORKERS: int = int(os.environ.get("MODEL_TRAINER_CV_WORKERS", min(MODEL_TRAINER_CV_FOLDS, os.cpu_count() or 1)))
+MODEL_TRAINER_CV_THREADS_PER_FOLD: int = int(
+    os.environ.get("MODEL_TRAINER_CV_THREADS_PER_FOLD", max(1, (os.cpu_count() or 1) // MODEL_TRAINER_CV_WORKERS))
+)
+
+
+# --- Background training jobs related constants
+TRAINING_JOBS_DIR: str = os.path.join(ARTIFACT_DIR, "training_jobs")
+TRAINING_JOBS_LOCK_FILE_NAME: str = "training.lock"
 
 # --- MODEL Evaluation related constants
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_BUCKET_NAME = "heart-attack-predictor"
 MODEL_PUSHER_S3_KEY = "model-registry"
 
+# --- Prediction related constants
+# How often (in seconds) the in-memory model registry checks the S3 ETag for a newer model
+MODEL_REGISTRY_REFRESH_INTERVAL_SECONDS: float = float(os.environ.get("MODEL_REGISTRY_REFRESH_INTERVAL_SECONDS", 300))
+# Host-wide on-disk cache of models downloaded from S3; set MODEL_CACHE_DIR="" to disable
+MODEL_CACHE_DIR: str = os.environ.get("MODEL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "heart-attack-predictor", "models"))
+# Serve an array-backed CompiledTreeEnsemble instead of the XGBoost classifier
+USE_COMPILED_MODEL: bool = os.environ.get("USE_COMPILED_MODEL", "false").lower() in ("1", "true", "yes")
+MODEL_CACHE_MAX_VERSIONS: int = int(os.environ.get("MODEL_CACHE_MAX_VERSIONS", 2))
+
 
 APP_HOST = os.environ.get("APP_HOST")
 APP_PORT = os.environ.get("APP_PORT")
+
+# --- HTTP scoring service related constants
+SCORING_SERVICE_DEFAULT_HOST: str = "0.0.0.0"  # nosec B104
+SCORING_SERVICE_DEFAULT_PORT: int = 8000
+SCORING_MAX_BATCH_SIZE: int = int(os.environ.get("SCORING_MAX_BATCH_SIZE", 64))
+SCORING_MAX_WAIT_MS: float = float(os.environ.get("SCORING_MAX_WAIT_MS", 2))
@@ -0,0 +1,148 @@
+import glob
+import os
+import shutil
+import sys
+
+import pandas as pd
+from bson import json_util
+
+from src.constants import DATA_FILE_EXTENSION, DATA_INGESTION_INCREMENTAL_MAX_PARTS, DATA_INGESTION_WATERMARK_FILE_NAME
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import load_dataframe, save_dataframe
+
+PART_FILE_PREFIX = "part-"
+
+
+class IncrementalFeatureStore:
+    """
+    Append-only feature store that outlives individual training runs.
+
+    Every ingestion appends the newly exported documents as a new part file and advances a
+    high-watermark (the largest value of `watermark_field` ingested so far). The watermark file
+    also lists the committed part files: a part is written first and only becomes visible once the
+    watermark file referencing it has been replaced, so an interrupted ingestion neither loses
+    nor duplicates rows. The watermark field must grow monotonically with insertion order
+    (e.g. ObjectId `_id` or an insertion timestamp).
+
+    Layout:
+        <store_dir>/watermark.json
+        <store_dir>/part-00000<ext>, part-00001<ext>, ...   (<ext> = .csv, .parquet or .cols)
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        watermark_field: str = "_id",
+        max_parts: int = DATA_INGESTION_INCREMENTAL_MAX_PARTS,
+        file_extension: str = DATA_FILE_EXTENSION,
+    ):
+        """
+        :param store_dir: Directory holding the part files and the watermark file
+        :param watermark_field: Document field used as the high-watermark
+        :param max_parts: Number of part files above which the store is compacted into one
+        :param file_extension: Storage format of new part files, see save_dataframe
+        """
+        self.store_dir = store_dir
+        self.watermark_field = watermark_field
+        self.max_parts = max_parts
+        self.file_extension = file_extension
+        self.watermark_file_path = os.path.join(store_dir, DATA_INGESTION_WATERMARK_FILE_NAME)
+        self._state = self._read_state()
+
+    def _read_state(self) -> dict:
+        empty_state = {"watermark_field": self.watermark_field, "watermark": None, "parts": [], "num_rows": 0}
+        try:
+            if not os.path.exists(self.watermark_file_path):
+                return empty_state
+            with open(self.watermark_file_path) as watermark_file:
+                state = json_util.loads(watermark_file.read())
+            if state.get("watermark_field") != self.watermark_field:
+                logging.warning(f"Watermark field changed from {state.get('watermark_field')} to {self.watermark_field}, re-ingesting everything")
+                return empty_state
+            if not all(os.path.exists(os.path.join(self.store_dir, part)) for part in state["parts"]):
+                logging.warning(f"Feature store {self.store_dir} is missing part files, re-ingesting everything")
+                return empty_state
+            return state
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _write_state(self, state: dict) -> None:
+        tmp_path = f"{self.watermark_file_path}.tmp"
+        with open(tmp_path, "w") as watermark_file:
+            watermark_file.write(json_util.dumps(state, indent=4))
+        os.replace(tmp_path, self.watermark_file_path)
+        self._state = state
+
+    def _remove_part(self, part: str) -> None:
+        part_path = os.path.join(self.store_dir, part)
+        if os.path.isdir(part_path):
+            shutil.rmtree(part_path)
+        else:
+            os.remove(part_path)
+
+    def _write_part(self, dataframe: pd.DataFrame) -> str:
+        # Parts not listed in the watermark file were left behind by an interrupted run: delete them, so they
+        # neither leak nor collide with the new part, which takes the number after the last committed one
+        committed = set(self._state["parts"])
+        for path in glob.glob(os.path.join(self.store_dir, f"{PART_FILE_PREFIX}*")):
+            if os.path.basename(path) not in committed:
+                logging.info(f"Removing uncommitted feature store part {path}")
+                self._remove_part(os.path.basename(path))
+        start = len(PART_FILE_PREFIX)
+        next_index = 1 + max((int(part[start : start + 5]) for part in committed), default=-1)
+        part_name = f"{PART_FILE_PREFIX}{next_index:05d}{self.file_extension}"
+        save_dataframe(os.path.join(self.store_dir, part_name), dataframe)
+        return part_name
+
+    @property
+    def watermark(self) -> object | None:
+        return self._state["watermark"]
+
+    @property
+    def num_rows(self) -> int:
+        return self._state["num_rows"]
+
+    def append(self, dataframe: pd.DataFrame, watermark: object) -> None:
+        """
+        Stores the newly ingested rows as a new part file and advances the watermark.
+        """
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            parts = list(self._state["parts"])
+            if len(dataframe) > 0:
+                parts.append(self._write_part(dataframe))
+            self._write_state(
+                {"watermark_field": self.watermark_field, "watermark": watermark, "parts": parts, "num_rows": self.num_rows + len(dataframe)}
+            )
+            logging.info(f"Appended {len(dataframe)} rows to feature store {self.store_dir}, watermark is now {watermark}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load(self) -> pd.DataFrame:
+        """
+        Returns every row ingested so far, oldest first.
+        """
+        try:
+            parts = [load_dataframe(os.path.join(self.store_dir, part)) for part in self._state["parts"]]
+            return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def compact(self, dataframe: pd.DataFrame | None = None) -> None:
+        """
+        Rewrites the store as a single part file once it has more than max_parts parts.
+        Pass the already loaded store contents to avoid reading them again.
+        """
+        try:
+            old_parts = self._state["parts"]
+            if len(old_parts) <= self.max_parts:
+                return
+            dataframe = self.load() if dataframe is None else dataframe
+            part_name = self._write_part(dataframe)
+            self._write_state(self._state | {"parts": [part_name], "num_rows": len(dataframe)})
+            for part in old_parts:
+                self._remove_part(part)
+            logging.info(f"Compacted {len(old_parts)} feature store parts into {part_name}")
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -1,12 +1,25 @@
 import logging
 import sys
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
+import pymongo
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import (
+    DATA_INGESTION_EXPORT_BATCH_SIZE,
+    DATA_INGESTION_EXPORT_PARTITIONS,
+    DATA_INGESTION_EXPORT_WORKERS,
+    DATABASE_NAME,
+    SCHEMA_FILE_PATH,
+)
 from src.exception import MyException
+from src.utils.main_utils import read_yaml_file
+
+# Values stored in the collection that stand for a missing reading
+MISSING_VALUES = (None, "na")
 
 
 class Proj1Data:
@@ -17,37 +30,223 @@ class Proj1Data:
     def __init__(self) -> None:
         try:
             self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            self._schema_columns = self.read_schema_columns()
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def read_schema_columns() -> dict[str, str]:
+        """
+        Returns {column name: dtype} for the columns listed in the schema file, in schema order.
+        """
+        schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        return {name: dtype for column in schema_config["columns"] for name, dtype in column.items()}
+
+    def _get_collection(self, collection_name: str, database_name: str | None = None):
+        return self.mongo_client.database[collection_name] if database_name is None else self.mongo_client.client[database_name][collection_name]
+
+    def _iter_document_batches(self, collection, columns: list[str], batch_size: int, query: dict | None = None) -> Iterator[list[dict]]:
+        """
+        Iterates the documents matching query in lists of at most batch_size documents, carrying only
+        the requested fields (projection applied server-side, '_id' excluded).
+        """
+        projection = dict.fromkeys(columns, 1) | {"_id": 0}
+        batch = []
+        for document in collection.find(query or {}, projection=projection, batch_size=batch_size):
+            batch.append(document)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _column_values(documents: list[dict], column: str, dtype: str) -> np.ndarray:
+        values = [document.get(column) for document in documents]
+        if dtype == "object":
+            return np.array([np.nan if value in MISSING_VALUES else value for value in values], dtype=object)
+        # Numeric columns are filled as float64 so missing readings can be NaN; cast back once complete
+        return np.array([np.nan if value in MISSING_VALUES else value for value in values], dtype=np.float64)
+
+    @staticmethod
+    def _finalize_column(values: np.ndarray, dtype: str) -> np.ndarray:
+        if dtype.startswith("int") and not np.isnan(values).any():
+            return values.astype(dtype)
+        return values
+
+    def iter_collection_chunks(
+        self, collection_name: str, database_name: str | None = None, chunk_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streams a MongoDB collection as DataFrame chunks of at most chunk_size rows.
+
+        Only the schema columns are fetched. Columns absent from a whole chunk are left out of it,
+        and 'na' values are replaced with NaN.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            columns = list(self._schema_columns)
+            for documents in self._iter_document_batches(collection, columns, chunk_size):
+                present = {key for document in documents for key in document}
+                yield pd.DataFrame(
+                    {
+                        column: self._finalize_column(self._column_values(documents, column, dtype), dtype)
+                        for column, dtype in self._schema_columns.items()
+                        if column in present
+                    }
+                )
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _export_columns(self, collection, query: dict, chunk_size: int, capacity: int) -> tuple[dict[str, np.ndarray], set[str]]:
+        """
+        Streams the documents matching query into preallocated NumPy columns (numeric columns as float64).
+        Returns the columns trimmed to the number of documents read, and the set of fields seen.
+        """
+        columns = list(self._schema_columns)
+        capacity = max(capacity, chunk_size)
+        arrays = {column: np.empty(capacity, dtype=object if dtype == "object" else np.float64) for column, dtype in self._schema_columns.items()}
+        seen_columns: set[str] = set()
+        n_rows = 0
+        for documents in self._iter_document_batches(collection, columns, chunk_size, query):
+            end = n_rows + len(documents)
+            if end > capacity:
+                capacity = max(end, 2 * capacity)
+                for column, values in arrays.items():
+                    arrays[column] = np.resize(values, capacity)
+            for column, dtype in self._schema_columns.items():
+                arrays[column][n_rows:end] = self._column_values(documents, column, dtype)
+            seen_columns.update(key for document in documents for key in document)
+            n_rows = end
+        return {column: values[:n_rows] for column, values in arrays.items()}, seen_columns
+
+    @staticmethod
+    def _count_documents(collection, query: dict) -> int:
+        # Metadata estimate for whole-collection exports, an exact (indexed) count for filtered ones
+        return int(collection.count_documents(query) if query else collection.estimated_document_count())
+
+    def get_max_value(self, collection_name: str, field: str, query: dict | None = None, database_name: str | None = None) -> object | None:
+        """
+        Returns the largest value of field among the documents matching query, or None when nothing matches.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            cursor = collection.find(query or {}, projection={field: 1}).sort(field, pymongo.DESCENDING).limit(1)
+            document = next(iter(cursor), None)
+            return None if document is None else document.get(field)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_collection_version(self, collection_name: str, database_name: str | None = None) -> dict:
+        """
+        Returns a cheap version stamp of a collection: its document count and largest '_id'.
+        Inserts and deletes change it; updates of existing documents do not.
+        """
+        try:
+            collection = self._get_collection(collection_name, database_name)
+            max_id = self.get_max_value(collection_name=collection_name, field="_id", database_name=database_name)
+            return {"count": self._count_documents(collection, {}), "max_id": None if max_id is None else str(max_id)}
         except Exception as e:
             raise MyException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name: str, database_name: str | None = None) -> pd.DataFrame:
+    @classmethod
+    def _partition_queries(cls, collection, num_partitions: int, query: dict) -> list[dict]:
+        """
+        Splits the documents matching query into num_partitions contiguous '_id' ranges of roughly equal size.
+        Split points are read by skipping along the '_id' index (no $sample, no full document scan).
+        """
+        total = cls._count_documents(collection, query)
+        num_partitions = max(1, min(num_partitions, total))
+        split_points = []
+        for index in range(1, num_partitions):
+            cursor = collection.find(query, projection={"_id": 1}).sort("_id", pymongo.ASCENDING).skip(index * total // num_partitions).limit(1)
+            document = next(iter(cursor), None)
+            if document is not None and (not split_points or document["_id"] > split_points[-1]):
+                split_points.append(document["_id"])
+        bounds = [None, *split_points, None]
+        queries = []
+        for lower, upper in zip(bounds[:-1], bounds[1:], strict=True):
+            id_range = {}
+            if lower is not None:
+                id_range["$gte"] = lower
+            if upper is not None:
+                id_range["$lt"] = upper
+            if not id_range:
+                queries.append(query)
+            else:
+                queries.append({"$and": [query, {"_id": id_range}]} if query else {"_id": id_range})
+        return queries
+
+    def export_collection_as_dataframe(
+        self,
+        collection_name: str,
+        database_name: str | None = None,
+        chunk_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+        num_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS,
+        max_workers: int = DATA_INGESTION_EXPORT_WORKERS,
+        query: dict | None = None,
+    ) -> pd.DataFrame:
         """
         Exports an entire MongoDB collection as a pandas DataFrame.
 
+        Documents are streamed in batches of chunk_size and copied straight into preallocated,
+        typed NumPy columns, so peak memory stays close to the size of the final DataFrame
+        instead of holding every document as a Python dict. With num_partitions > 1 the collection
+        is split into '_id' ranges that are read concurrently over the shared MongoClient pool
+        and concatenated in '_id' order.
+
         Parameters:
         ----------
         collection_name : str
             The name of the MongoDB collection to export.
         database_name : Optional[str]
             Name of the database (optional). Defaults to DATABASE_NAME.
+        chunk_size : int
+            Number of documents fetched per cursor round-trip.
+        num_partitions : int
+            Number of '_id' ranges to read; 1 reads the collection over a single cursor.
+        max_workers : int
+            Number of partitions read at the same time.
+        query : Optional[dict]
+            Filter restricting the export, e.g. to documents past an ingestion watermark.
 
         Returns:
         -------
         pd.DataFrame
-            DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
+            DataFrame with the schema columns found in the collection, 'na' values replaced with NaN.
         """
 
         try:
-            # Access specified collection from the default or specified database
-            collection = self.mongo_client.database[collection_name] if database_name is None else self.mongo_client[database_name][collection_name]
-
-            # Convert collection data to DataFrame and preprocess
-            print("Fetching data from mongoDB")
-            df = pd.DataFrame(list(collection.find()))
-            print(f"Data fecthed with len: {len(df)}")
-            if "_id" in df.columns.to_list():
-                df = df.drop(columns=["_id"], axis=1)
-            df.replace({"na": np.nan}, inplace=True)
+            collection = self._get_collection(collection_name, database_name)
+
+            logging.info("Fetching data from mongoDB")
+            query = query or {}
+            # Arrays grow if more documents arrive while the export runs
+            estimated_count = self._count_documents(collection, query)
+            queries = self._partition_queries(collection, num_partitions, query) if num_partitions > 1 else [query]
+            capacity = estimated_count // len(queries) + 1
+
+            if len(queries) == 1:
+                partitions = [self._export_columns(collection, queries[0], chunk_size, capacity)]
+            else:
+                logging.info(f"Exporting {len(queries)} partitions with {max_workers} workers")
+                with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="mongo-export") as executor:
+                    futures = [
+                        executor.submit(self._export_columns, collection, partition_query, chunk_size, capacity) for partition_query in queries
+                    ]
+                    partitions = [future.result() for future in futures]
+
+            seen_columns = set().union(*(seen for _, seen in partitions))
+            df = pd.DataFrame(
+                {
+                    column: self._finalize_column(
+                        partitions[0][0][column] if len(partitions) == 1 else np.concatenate([arrays[column] for arrays, _ in partitions]), dtype
+                    )
+                    for column, dtype in self._schema_columns.items()
+                    if column in seen_columns
+                }
+            )
+            logging.info(f"Data fecthed with len: {len(df)}")
             return df
 
         except Exception as e:
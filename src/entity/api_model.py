@@ -14,3 +14,11 @@ class HeartAttackData(BaseModel):
 
     def to_dataframe(self) -> pd.DataFrame:
         return pd.DataFrame([self.model_dump()])
+
+    @classmethod
+    def batch_to_dataframe(cls, records: list["HeartAttackData"]) -> pd.DataFrame:
+        """
+        Builds one DataFrame for many already-validated records, column by column,
+        instead of dumping every record to a dict.
+        """
+        return pd.DataFrame({name: [getattr(record, name) for record in records] for name in cls.model_fields})
@@ -7,6 +7,7 @@ import numpy as np
 class DataIngestionArtifact:
     trained_file_path: str
     test_file_path: str
+    num_duplicates_removed: int = 0
 
 
 @dataclass
@@ -14,6 +15,8 @@ class DataValidationArtifact:
     validation_status: bool
     message: str
     validation_report_file_path: str
+    reference_profile_file_path: str | None = None
+    drift_detected: bool | None = None
 
 
 @dataclass
@@ -31,10 +34,22 @@ class ClassificationMetricArtifact:
     accuracy_score: float
 
 
+@dataclass
+class CrossValidationMetricArtifact:
+    n_splits: int
+    # Mean and sample variance of each metric over the folds
+    mean: ClassificationMetricArtifact
+    variance: ClassificationMetricArtifact
+
+
 @dataclass
 class ModelTrainerArtifact:
     trained_model_file_path: str
     metric_artifact: ClassificationMetricArtifact
+    # Hyperparameters found by the tuning stage, None when tuning is disabled
+    best_params: dict | None = None
+    # Cross-validated metrics on the training data, None when cross-validation is disabled
+    cv_metric_artifact: CrossValidationMetricArtifact | None = None
 
 
 @dataclass
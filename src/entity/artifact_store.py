@@ -0,0 +1,93 @@
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.exception import MyException
+from src.logger import logging
+
+
+class ArtifactStore:
+    """
+    Run-scoped store of stage outputs, keyed by the artifact file path.
+
+    `put` keeps the object in memory and writes it to its file path on a background thread, so the
+    artifact directory stays a complete, reproducible record of the run. `get` hands the in-memory
+    object to downstream stages and only falls back to reading the file when the object is not held
+    (e.g. a stage run on its own). Objects handed out are shared: consumers must not modify them in place.
+
+    With keep_in_memory=False and async_writes=False the store degrades to plain synchronous
+    save/load calls, which is what components use when no store is passed to them.
+    """
+
+    def __init__(self, keep_in_memory: bool = True, async_writes: bool = True, max_workers: int = 2):
+        """
+        :param keep_in_memory: Hand stored objects to later stages without re-reading them
+        :param async_writes: Write artifacts on background threads instead of blocking the stage
+        :param max_workers: Number of artifacts written at the same time
+        """
+        self.keep_in_memory = keep_in_memory
+        self._objects: dict[str, object] = {}
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-writer") if async_writes else None
+
+    def put(self, file_path: str, obj: object, writer: Callable[[str, object], None]) -> None:
+        """
+        Stores obj for later stages and persists it with writer(file_path, obj).
+        """
+        try:
+            if self.keep_in_memory:
+                self._objects[file_path] = obj
+            if self._executor is None:
+                writer(file_path, obj)
+                return
+            # A path written twice must end up holding the latest object
+            self.wait(file_path)
+            with self._lock:
+                self._pending[file_path] = self._executor.submit(writer, file_path, obj)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get(self, file_path: str, reader: Callable[[str], object]) -> object:
+        """
+        Returns the object stored under file_path, or reader(file_path) once its file has been written.
+        """
+        try:
+            if file_path in self._objects:
+                return self._objects[file_path]
+            self.wait(file_path)
+            return reader(file_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def wait(self, file_path: str) -> None:
+        """
+        Blocks until the pending write of file_path (if any) has finished, re-raising its error.
+        """
+        with self._lock:
+            future = self._pending.get(file_path)
+        if future is not None:
+            future.result()
+
+    def flush(self) -> None:
+        """
+        Blocks until every pending write has finished, re-raising the first error.
+        """
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """
+        Flushes all writes and releases the in-memory objects.
+        """
+        try:
+            self.flush()
+            logging.info(f"Artifact store flushed {len(self._pending)} artifacts to disk")
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._objects.clear()
+            self._pending.clear()
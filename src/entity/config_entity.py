@@ -1,10 +1,16 @@
 import os
-from dataclasses import dataclass
+import posixpath
+from dataclasses import dataclass, field
 from datetime import datetime
 
 import src.constants as CONST
 
 TIMESTAMP: str = datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
+# The reference profile lives next to the model in the bucket
+S3_REFERENCE_PROFILE_KEY_PATH: str = posixpath.join(posixpath.dirname(CONST.MODEL_FILE_NAME), CONST.REFERENCE_PROFILE_FILE_NAME)
+# Metadata of config fields that only set how many threads or processes do the work, not the output,
+# so that StageCache leaves them out of the cache key
+NOT_IN_CACHE_KEY = {"cache_key": False}
 
 
 @dataclass
@@ -12,6 +18,12 @@ class TrainingPipelineConfig:
     pipeline_name: str = CONST.PIPELINE_NAME
     artifact_dir: str = os.path.join(CONST.ARTIFACT_DIR, TIMESTAMP)
     timestamp: str = TIMESTAMP
+    in_memory_artifacts: bool = CONST.TRAINING_PIPELINE_IN_MEMORY_ARTIFACTS
+    skip_without_drift: bool = CONST.TRAINING_PIPELINE_SKIP_WITHOUT_DRIFT
+    stage_cache: bool = CONST.TRAINING_PIPELINE_STAGE_CACHE
+    stage_cache_dir: str = CONST.TRAINING_PIPELINE_STAGE_CACHE_DIR
+    resume_run_id: str | None = CONST.TRAINING_PIPELINE_RUN_ID
+    max_workers: int = field(default=CONST.TRAINING_PIPELINE_MAX_WORKERS, metadata=NOT_IN_CACHE_KEY)
 
 
 training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
@@ -20,17 +32,40 @@ training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
 @dataclass
 class DataIngestionConfig:
     data_ingestion_dir: str = os.path.join(training_pipeline_config.artifact_dir, CONST.DATA_INGESTION_DIR_NAME)
-    feature_store_file_path: str = os.path.join(data_ingestion_dir, CONST.DATA_INGESTION_FEATURE_STORE_DIR, CONST.FILE_NAME)
-    training_file_path: str = os.path.join(data_ingestion_dir, CONST.DATA_INGESTION_INGESTED_DIR, CONST.TRAIN_FILE_NAME)
-    testing_file_path: str = os.path.join(data_ingestion_dir, CONST.DATA_INGESTION_INGESTED_DIR, CONST.TEST_FILE_NAME)
+    feature_store_file_path: str = os.path.join(
+        data_ingestion_dir, CONST.DATA_INGESTION_FEATURE_STORE_DIR, CONST.FILE_NAME.replace(".csv", CONST.DATA_FILE_EXTENSION)
+    )
+    training_file_path: str = os.path.join(
+        data_ingestion_dir, CONST.DATA_INGESTION_INGESTED_DIR, CONST.TRAIN_FILE_NAME.replace(".csv", CONST.DATA_FILE_EXTENSION)
+    )
+    testing_file_path: str = os.path.join(
+        data_ingestion_dir, CONST.DATA_INGESTION_INGESTED_DIR, CONST.TEST_FILE_NAME.replace(".csv", CONST.DATA_FILE_EXTENSION)
+    )
     train_test_split_ratio: float = CONST.DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     collection_name: str = CONST.DATA_INGESTION_COLLECTION_NAME
+    export_batch_size: int = CONST.DATA_INGESTION_EXPORT_BATCH_SIZE
+    export_partitions: int = CONST.DATA_INGESTION_EXPORT_PARTITIONS
+    export_workers: int = field(default=CONST.DATA_INGESTION_EXPORT_WORKERS, metadata=NOT_IN_CACHE_KEY)
+    incremental: bool = CONST.DATA_INGESTION_INCREMENTAL
+    incremental_store_dir: str = CONST.DATA_INGESTION_INCREMENTAL_STORE_DIR
+    watermark_field: str = CONST.DATA_INGESTION_WATERMARK_FIELD
+    streaming_split: bool = CONST.DATA_INGESTION_STREAMING_SPLIT
+    stratify_column: str = CONST.DATA_INGESTION_STRATIFY_COLUMN
+    deduplicate: bool = CONST.DATA_INGESTION_DEDUPLICATE
 
 
 @dataclass
 class DataValidationConfig:
     data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir, CONST.DATA_VALIDATION_DIR_NAME)
     validation_report_file_path: str = os.path.join(data_validation_dir, CONST.DATA_VALIDATION_REPORT_FILE_NAME)
+    chunk_size: int = CONST.DATA_VALIDATION_CHUNK_SIZE
+    reference_profile_file_path: str = os.path.join(data_validation_dir, CONST.REFERENCE_PROFILE_FILE_NAME)
+    drift_detection: bool = CONST.DATA_VALIDATION_DRIFT_DETECTION
+    psi_threshold: float = CONST.DATA_VALIDATION_PSI_THRESHOLD
+    reference_bins: int = CONST.DATA_VALIDATION_REFERENCE_BINS
+    reference_sample_size: int = CONST.DATA_VALIDATION_REFERENCE_SAMPLE_SIZE
+    bucket_name: str = CONST.MODEL_BUCKET_NAME
+    s3_reference_profile_key_path: str = S3_REFERENCE_PROFILE_KEY_PATH
 
 
 @dataclass
@@ -45,6 +80,13 @@ class DataTransformationConfig:
     transformed_object_file_path: str = os.path.join(
         data_transformation_dir, CONST.DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR, CONST.PREPROCSSING_OBJECT_FILE_NAME
     )
+    resampler: str = CONST.DATA_TRANSFORMATION_RESAMPLER
+    resampler_n_jobs: int = field(default=CONST.DATA_TRANSFORMATION_RESAMPLER_N_JOBS, metadata=NOT_IN_CACHE_KEY)
+    resample_test: bool = CONST.DATA_TRANSFORMATION_RESAMPLE_TEST
+    resampler_random_state: int = CONST.DATA_TRANSFORMATION_RESAMPLER_RANDOM_STATE
+    resampler_cache_dir: str = CONST.DATA_TRANSFORMATION_RESAMPLER_CACHE_DIR
+    resampler_cache_size: int = CONST.DATA_TRANSFORMATION_RESAMPLER_CACHE_SIZE
+    max_workers: int = field(default=CONST.TRAINING_PIPELINE_MAX_WORKERS, metadata=NOT_IN_CACHE_KEY)
 
 
 @dataclass
@@ -58,6 +100,20 @@ class ModelTrainerConfig:
     _subsample = CONST.MODEL_TRAINER_SUBSAMPLE
     _scale_pos_weight = CONST.MODEL_TRAINER_SCALE_POS_WEIGHT
     _random_state = CONST.MIN_SAMPLES_SPLIT_RANDOM_STATE
+    early_stopping_rounds: int = CONST.MODEL_TRAINER_EARLY_STOPPING_ROUNDS
+    validation_size: float = CONST.MODEL_TRAINER_VALIDATION_SIZE
+    max_bin: int = CONST.MODEL_TRAINER_MAX_BIN
+    n_jobs: int = field(default=CONST.MODEL_TRAINER_N_JOBS, metadata=NOT_IN_CACHE_KEY)
+    tuning: bool = CONST.MODEL_TRAINER_TUNING
+    tuning_trials: int = CONST.MODEL_TRAINER_TUNING_TRIALS
+    tuning_timeout: float | None = CONST.MODEL_TRAINER_TUNING_TIMEOUT
+    tuning_workers: int = CONST.MODEL_TRAINER_TUNING_WORKERS
+    tuning_threads_per_trial: int = field(default=CONST.MODEL_TRAINER_TUNING_THREADS_PER_TRIAL, metadata=NOT_IN_CACHE_KEY)
+    tuning_journal_file_path: str = os.path.join(model_trainer_dir, CONST.MODEL_TRAINER_TUNING_JOURNAL_FILE_NAME)
+    cross_validation: bool = CONST.MODEL_TRAINER_CV
+    cv_folds: int = CONST.MODEL_TRAINER_CV_FOLDS
+    cv_workers: int = field(default=CONST.MODEL_TRAINER_CV_WORKERS, metadata=NOT_IN_CACHE_KEY)
+    cv_threads_per_fold: int = field(default=CONST.MODEL_TRAINER_CV_THREADS_PER_FOLD, metadata=NOT_IN_CACHE_KEY)
 
 
 @dataclass
@@ -71,9 +127,26 @@ class ModelEvaluationConfig:
 class ModelPusherConfig:
     bucket_name: str = CONST.MODEL_BUCKET_NAME
     s3_model_key_path: str = CONST.MODEL_FILE_NAME
+    s3_reference_profile_key_path: str = S3_REFERENCE_PROFILE_KEY_PATH
 
 
 @dataclass
 class HeartAttackPredictorConfig:
     model_file_path: str = CONST.MODEL_FILE_NAME
     model_bucket_name: str = CONST.MODEL_BUCKET_NAME
+    model_refresh_interval_seconds: float = CONST.MODEL_REGISTRY_REFRESH_INTERVAL_SECONDS
+    use_compiled_model: bool = CONST.USE_COMPILED_MODEL
+
+
+@dataclass
+class ScoringServiceConfig:
+    host: str = CONST.APP_HOST or CONST.SCORING_SERVICE_DEFAULT_HOST
+    port: int = int(CONST.APP_PORT or CONST.SCORING_SERVICE_DEFAULT_PORT)
+    max_batch_size: int = CONST.SCORING_MAX_BATCH_SIZE
+    max_wait_ms: float = CONST.SCORING_MAX_WAIT_MS
+
+
+@dataclass
+class TrainingJobConfig:
+    jobs_dir: str = CONST.TRAINING_JOBS_DIR
+    lock_file_path: str = os.path.join(CONST.TRAINING_JOBS_DIR, CONST.TRAINING_JOBS_LOCK_FILE_NAME)
@@ -0,0 +1,103 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import StratifiedKFold
+
+from src.entity.artifact_entity import ClassificationMetricArtifact, CrossValidationMetricArtifact
+from src.entity.hist_training import HistTrainingSet
+
+METRICS = ("f1_score", "precision_score", "recall_score", "accuracy_score")
+
+
+def _fold_indices(y: np.ndarray, n_splits: int, random_state: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    return list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(np.zeros(len(y)), y))
+
+
+def _run_fold(train_file_path: str, fold: int, params: dict, settings: dict) -> dict[str, float]:
+    """
+    Trains on every fold but `fold` and scores on `fold`. Executed in a worker process.
+    """
+    # Memory-mapped: the workers share the pages of the saved array instead of each receiving a pickled copy
+    train_array = np.load(train_file_path, mmap_mode="r")
+    train_index, valid_index = _fold_indices(train_array[:, -1], settings["n_splits"], settings["random_state"])[fold]
+
+    training_set = HistTrainingSet.from_array(
+        train_array[train_index],
+        validation_size=settings["validation_size"] if settings["early_stopping_rounds"] else 0.0,
+        random_state=settings["random_state"],
+        max_bin=settings["max_bin"],
+        n_jobs=settings["threads_per_fold"],
+    )
+    result = training_set.fit({**params, "n_jobs": settings["threads_per_fold"]}, early_stopping_rounds=settings["early_stopping_rounds"])
+
+    valid_array = train_array[valid_index]
+    y_true, y_pred = valid_array[:, -1], result.model.predict(valid_array[:, :-1])
+    return {
+        "f1_score": f1_score(y_true, y_pred),
+        "precision_score": precision_score(y_true, y_pred),
+        "recall_score": recall_score(y_true, y_pred),
+        "accuracy_score": accuracy_score(y_true, y_pred),
+    }
+
+
+class CrossValidation:
+    """
+    Stratified k-fold cross-validation of the XGBoost model, the folds trained concurrently in a process pool.
+
+    The workers memory-map the training array saved on disk, so it is neither pickled to them nor copied
+    whole into each one; every worker recomputes the same seeded split and only copies its own fold.
+    Each fold trains like the final model (hist matrices, early stopping on a holdout of the fold's
+    training part) with threads_per_fold threads, so n_workers * threads_per_fold should not exceed the cores.
+    """
+
+    def __init__(
+        self,
+        n_splits: int = 5,
+        n_workers: int = 1,
+        threads_per_fold: int = 1,
+        early_stopping_rounds: int | None = None,
+        validation_size: float = 0.1,
+        max_bin: int = 256,
+        random_state: int = 42,
+    ):
+        """
+        :param n_splits: Number of folds
+        :param n_workers: Processes training folds concurrently (1: run in this process)
+        :param threads_per_fold: XGBoost threads of each fold
+        :param early_stopping_rounds: Early stopping patience of each fold, None to build all the trees
+        :param validation_size: Share of each fold's training part held out for early stopping
+        :param max_bin: Maximum number of histogram bins per feature
+        :param random_state: Seed of the fold split and of the holdout split
+        """
+        if n_splits < 2:
+            raise ValueError(f"Cross-validation needs at least 2 folds, got {n_splits}")
+        self.n_workers = max(1, min(n_workers, n_splits))
+        self.settings = {
+            "n_splits": n_splits,
+            "threads_per_fold": threads_per_fold,
+            "early_stopping_rounds": early_stopping_rounds,
+            "validation_size": validation_size,
+            "max_bin": max_bin,
+            "random_state": random_state,
+        }
+
+    def run(self, train_file_path: str, params: dict) -> CrossValidationMetricArtifact:
+        """
+        Cross-validates a model with XGBClassifier-style params on the training array saved at train_file_path
+        (features followed by the target column). Returns the mean and variance of each metric over the folds.
+        """
+        folds = range(self.settings["n_splits"])
+        if self.n_workers == 1:
+            fold_scores = [_run_fold(train_file_path, fold, params, self.settings) for fold in folds]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                fold_scores = list(pool.map(_run_fold, [train_file_path] * len(folds), folds, [params] * len(folds), [self.settings] * len(folds)))
+
+        scores = {metric: np.array([fold[metric] for fold in fold_scores]) for metric in METRICS}
+        return CrossValidationMetricArtifact(
+            n_splits=self.settings["n_splits"],
+            mean=ClassificationMetricArtifact(**{metric: float(values.mean()) for metric, values in scores.items()}),
+            variance=ClassificationMetricArtifact(**{metric: float(values.var(ddof=1)) for metric, values in scores.items()}),
+        )
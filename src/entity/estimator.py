@@ -1,11 +1,26 @@
 import sys
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from sklearn.pipeline import Pipeline
 
+from src.entity.api_model import HeartAttackData
+from src.entity.fast_predictor import FastRowPredictor
+from src.entity.tree_ensemble import CompiledTreeEnsemble
 from src.exception import MyException
 from src.logger import logging
+from src.utils.metrics import PREDICTION_BATCH_SIZE, PREDICTION_STAGE_LATENCY, prediction_metrics
+
+# Inputs accepted by the batch prediction methods
+BatchInput = list[HeartAttackData] | pd.DataFrame | np.ndarray
+
+# Bound once: the single-row fast path is only tens of microseconds, so skip the per-call label lookup
+_TO_DATAFRAME_LATENCY = prediction_metrics.histogram(PREDICTION_STAGE_LATENCY, stage="to_dataframe")
+_TRANSFORM_LATENCY = prediction_metrics.histogram(PREDICTION_STAGE_LATENCY, stage="transform")
+_PREDICT_LATENCY = prediction_metrics.histogram(PREDICTION_STAGE_LATENCY, stage="predict")
+_FAST_PATH_LATENCY = prediction_metrics.histogram(PREDICTION_STAGE_LATENCY, stage="fast_path")
+_BATCH_SIZE = prediction_metrics.histogram(PREDICTION_BATCH_SIZE)
 
 
 class TargetValueMapping:
@@ -39,11 +54,14 @@ class MyModel:
             logging.info("Starting prediction process.")
 
             # Step 1: Apply scaling transformations using the pre-trained preprocessing object
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            with _TRANSFORM_LATENCY.time():
+                transformed_feature = self.preprocessing_object.transform(dataframe)
 
             # Step 2: Perform prediction using the trained model
             logging.info("Using the trained model to get predictions")
-            predictions = self.trained_model_object.predict(transformed_feature)
+            _BATCH_SIZE.observe(transformed_feature.shape[0])
+            with _PREDICT_LATENCY.time():
+                predictions = self.trained_model_object.predict(transformed_feature)
 
             return predictions
 
@@ -51,6 +69,124 @@ class MyModel:
             logging.error("Error occurred in predict method", exc_info=True)
             raise MyException(e, sys) from e
 
+    def _batch_to_dataframe(self, data: BatchInput) -> pd.DataFrame:
+        """
+        Converts a list of HeartAttackData, a DataFrame or a 2-D array (columns in training order)
+        into the DataFrame layout the preprocessing object was fitted on.
+        """
+        if isinstance(data, pd.DataFrame):
+            return data
+        if isinstance(data, np.ndarray):
+            columns = list(getattr(self.preprocessing_object, "feature_names_in_", HeartAttackData.model_fields))
+            if data.ndim != 2 or data.shape[1] != len(columns):
+                raise ValueError(f"Expected a 2-D array with {len(columns)} columns {columns}, got shape {data.shape}")
+            return pd.DataFrame(data, columns=columns, copy=False)
+        return HeartAttackData.batch_to_dataframe(list(data))
+
+    def transform_batch(self, data: BatchInput) -> np.ndarray:
+        """
+        Runs the preprocessing object once over the whole batch.
+        """
+        try:
+            with _TO_DATAFRAME_LATENCY.time():
+                dataframe = self._batch_to_dataframe(data)
+            with _TRANSFORM_LATENCY.time():
+                return self.preprocessing_object.transform(dataframe)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_batch(self, data: BatchInput) -> np.ndarray:
+        """
+        Predicts labels for a whole batch with a single transform and a single model call.
+        Returns one label per input row.
+        """
+        try:
+            transformed_feature = self.transform_batch(data)
+            logging.info(f"Predicting labels for batch of {transformed_feature.shape[0]} rows")
+            _BATCH_SIZE.observe(transformed_feature.shape[0])
+            with _PREDICT_LATENCY.time():
+                return np.asarray(self.trained_model_object.predict(transformed_feature))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_proba_batch(self, data: BatchInput) -> np.ndarray:
+        """
+        Predicts the probability of a heart attack (positive class) for a whole batch.
+        Returns one probability per input row.
+        """
+        try:
+            transformed_feature = self.transform_batch(data)
+            logging.info(f"Predicting probabilities for batch of {transformed_feature.shape[0]} rows")
+            _BATCH_SIZE.observe(transformed_feature.shape[0])
+            with _PREDICT_LATENCY.time():
+                return np.asarray(self.trained_model_object.predict_proba(transformed_feature))[:, 1]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_fast_predictor(self) -> FastRowPredictor | None:
+        """
+        Builds (once) and returns the pandas-free single-row predictor,
+        or None when the fitted objects are not supported by it.
+        """
+        # getattr: models pickled before the fast path existed do not carry the attribute
+        fast_predictor = getattr(self, "_fast_predictor", None)
+        if fast_predictor is None:
+            try:
+                fast_predictor = FastRowPredictor(self.preprocessing_object, self.trained_model_object)
+            except (ValueError, AttributeError) as e:
+                logging.warning(f"Fast single-row predictor unavailable, falling back to pipeline: {e}")
+                fast_predictor = False
+            self._fast_predictor = fast_predictor
+        return fast_predictor or None
+
+    def predict_one(self, data: HeartAttackData) -> int:
+        """
+        Predicts the label for a single record, bypassing pandas and the sklearn pipeline when possible.
+        """
+        try:
+            fast_predictor = self.get_fast_predictor()
+            if fast_predictor is None:
+                return int(self.predict_batch([data])[0])
+            _BATCH_SIZE.observe(1)
+            with _FAST_PATH_LATENCY.time():
+                return fast_predictor.predict(data)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_proba_one(self, data: HeartAttackData) -> float:
+        """
+        Predicts the heart attack probability for a single record, bypassing pandas when possible.
+        """
+        try:
+            fast_predictor = self.get_fast_predictor()
+            if fast_predictor is None:
+                return float(self.predict_proba_batch([data])[0])
+            _BATCH_SIZE.observe(1)
+            with _FAST_PATH_LATENCY.time():
+                return fast_predictor.predict_proba(data)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def compile(self) -> "MyModel":
+        """
+        Returns a copy of this model whose XGBoost classifier is replaced by a CompiledTreeEnsemble.
+        The copy needs neither xgboost to be unpickled nor to predict, and holds only NumPy arrays.
+        """
+        try:
+            if isinstance(self.trained_model_object, CompiledTreeEnsemble):
+                return self
+            compiled = CompiledTreeEnsemble.from_booster(self.trained_model_object)
+            logging.info(f"Compiled {type(self.trained_model_object).__name__} into {compiled}")
+            return MyModel(preprocessing_object=self.preprocessing_object, trained_model_object=compiled)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def __getstate__(self) -> dict:
+        # The fast predictor is derived state (and holds thread-locals); rebuild it after unpickling
+        state = self.__dict__.copy()
+        state.pop("_fast_predictor", None)
+        return state
+
     def __repr__(self) -> str:
         return f"{type(self.trained_model_object).__name__}()"
 
@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+from src.entity.api_model import HeartAttackData
+
+
+class FastRowPredictor:
+    """
+    Pandas-free single-row inference path for a fitted MyModel.
+
+    The fitted StandardScaler statistics and the ColumnTransformer output column order are
+    extracted once, so a HeartAttackData record can be written straight into a preallocated
+    float32 row and scored with the booster's `inplace_predict` (or the model's `predict_proba`
+    for non-XGBoost models such as CompiledTreeEnsemble). Only ColumnTransformers made of
+    StandardScaler and passthrough parts are supported; anything else raises ValueError so the
+    caller can fall back to the regular pipeline.
+    """
+
+    def __init__(self, preprocessing_object: Pipeline | ColumnTransformer, trained_model_object: object):
+        """
+        :param preprocessing_object: Fitted preprocessing pipeline of MyModel
+        :param trained_model_object: Fitted XGBClassifier of MyModel
+        """
+        column_transformer = preprocessing_object.steps[-1][1] if isinstance(preprocessing_object, Pipeline) else preprocessing_object
+        if not isinstance(column_transformer, ColumnTransformer):
+            raise ValueError(f"Unsupported preprocessing object: {type(column_transformer).__name__}")
+        if getattr(trained_model_object, "objective", None) != "binary:logistic":
+            raise ValueError(f"Unsupported model objective: {getattr(trained_model_object, 'objective', None)}")
+
+        feature_names = list(column_transformer.feature_names_in_)
+        fields, mean, scale = [], [], []
+        for _, transformer, columns in column_transformer.transformers_:
+            names = self._column_names(columns, feature_names)
+            if transformer == "drop" or not names:
+                continue
+            # Fitted ColumnTransformers store a "passthrough" remainder as an identity FunctionTransformer
+            if transformer == "passthrough" or (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+                col_mean, col_scale = np.zeros(len(names)), np.ones(len(names))
+            elif isinstance(transformer, StandardScaler):
+                col_mean = transformer.mean_ if transformer.with_mean else np.zeros(len(names))
+                col_scale = transformer.scale_ if transformer.with_std else np.ones(len(names))
+            else:
+                raise ValueError(f"Unsupported transformer: {type(transformer).__name__}")
+            fields.extend(names)
+            mean.extend(col_mean)
+            scale.extend(col_scale)
+
+        unknown = set(fields) - set(HeartAttackData.model_fields)
+        if unknown:
+            raise ValueError(f"Columns {sorted(unknown)} are not fields of HeartAttackData")
+
+        self.fields: tuple[str, ...] = tuple(fields)
+        self.mean = np.asarray(mean, dtype=np.float64).reshape(1, -1)
+        self.inv_scale = 1.0 / np.asarray(scale, dtype=np.float64).reshape(1, -1)
+        self.classes = np.asarray(getattr(trained_model_object, "classes_", [0, 1]))
+        self.trained_model_object = trained_model_object
+        # XGBClassifier: score through the booster's inplace_predict; other models (e.g. CompiledTreeEnsemble) through predict_proba
+        self.booster = trained_model_object.get_booster() if hasattr(trained_model_object, "get_booster") else None
+        self.iteration_range = self._iteration_range(trained_model_object)
+        self._local = threading.local()
+
+    @staticmethod
+    def _column_names(columns, feature_names: list[str]) -> list[str]:
+        if isinstance(columns, str):
+            return [columns]
+        columns = list(columns)
+        if columns and isinstance(columns[0], (bool, np.bool_)):
+            return [name for name, keep in zip(feature_names, columns, strict=True) if keep]
+        return [feature_names[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+
+    @staticmethod
+    def _iteration_range(trained_model_object: object) -> tuple[int, int]:
+        # Mirror XGBClassifier.predict, which only uses trees up to best_iteration after early stopping
+        try:
+            return (0, trained_model_object.best_iteration + 1)
+        except AttributeError:
+            return (0, 0)
+
+    def _buffers(self) -> tuple[np.ndarray, np.ndarray]:
+        # Per-thread preallocated rows, so concurrent requests never share a buffer
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = (np.empty((1, len(self.fields)), dtype=np.float64), np.empty((1, len(self.fields)), dtype=np.float32))
+            self._local.buffers = buffers
+        return buffers
+
+    def transform(self, data: HeartAttackData) -> np.ndarray:
+        """
+        Writes the scaled feature row for one record into the thread's preallocated float32 buffer.
+        """
+        work, row = self._buffers()
+        for i, name in enumerate(self.fields):
+            work[0, i] = getattr(data, name)
+        np.subtract(work, self.mean, out=work)
+        np.multiply(work, self.inv_scale, out=work)
+        np.copyto(row, work, casting="same_kind")
+        return row
+
+    def predict_proba(self, data: HeartAttackData) -> float:
+        """
+        Returns the probability of a heart attack (positive class) for one record.
+        """
+        row = self.transform(data)
+        if self.booster is None:
+            return float(self.trained_model_object.predict_proba(row)[0, 1])
+        return float(self.booster.inplace_predict(row, iteration_range=self.iteration_range)[0])
+
+    def predict(self, data: HeartAttackData) -> int:
+        """
+        Returns the predicted label for one record.
+        """
+        return int(self.classes[int(self.predict_proba(data) > 0.5)])
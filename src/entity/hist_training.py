@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+
+@dataclass
+class HistFitResult:
+    model: xgb.XGBClassifier
+    # Accuracy on the training matrix at the kept round, from the evaluation log of the training pass
+    train_accuracy: float
+    best_iteration: int
+    # Stopping metric on the validation matrix at the kept round, None without a validation set
+    validation_score: float | None = None
+
+
+class HistTrainingSet:
+    """
+    Training data for XGBoost's hist method, quantized once into QuantileDMatrix objects.
+
+    Building a QuantileDMatrix sketches the quantiles of every feature and stores the data as bin indices,
+    so holding the matrices lets every fit on the same data (the final fit, tuning trials, ...) skip that
+    work and the float copy a DMatrix would keep. The validation matrix reuses the training bins (ref=),
+    as XGBoost requires to evaluate it.
+    """
+
+    def __init__(self, x_train, y_train, x_valid=None, y_valid=None, max_bin: int = 256, n_jobs: int | None = None):
+        """
+        :param x_valid: Validation features for early stopping, None to train without
+        :param max_bin: Maximum number of bins per feature
+        :param n_jobs: Threads used to build the matrices
+        """
+        self.dtrain = xgb.QuantileDMatrix(x_train, label=y_train, max_bin=max_bin, nthread=n_jobs)
+        self.dvalid = None if x_valid is None else xgb.QuantileDMatrix(x_valid, label=y_valid, ref=self.dtrain, nthread=n_jobs)
+
+    @classmethod
+    def from_array(
+        cls, train_array: np.ndarray, validation_size: float = 0.0, random_state: int | None = None, max_bin: int = 256, n_jobs: int | None = None
+    ) -> "HistTrainingSet":
+        """
+        Builds the matrices from an array of features followed by the target column, holding out a stratified
+        validation_size share of the rows as validation set (none when validation_size is 0).
+        """
+        x, y = train_array[:, :-1], train_array[:, -1]
+        if not validation_size:
+            return cls(x, y, max_bin=max_bin, n_jobs=n_jobs)
+        x_train, x_valid, y_train, y_valid = train_test_split(x, y, test_size=validation_size, stratify=y, random_state=random_state)
+        return cls(x_train, y_train, x_valid, y_valid, max_bin=max_bin, n_jobs=n_jobs)
+
+    def fit(
+        self, params: dict, early_stopping_rounds: int | None = None, stopping_metric: str = "logloss", callbacks: list | None = None
+    ) -> HistFitResult:
+        """
+        Trains a binary:logistic model with XGBClassifier-style params (n_estimators is the maximum number of rounds).
+
+        With a validation set and early_stopping_rounds, boosting stops once stopping_metric has not improved on
+        the validation set for that many rounds, and only the trees up to the best round are kept.
+        """
+        params = dict(params)
+        num_boost_round = params.pop("n_estimators", 100)
+        if "random_state" in params:
+            params["seed"] = params.pop("random_state")
+        if "n_jobs" in params:
+            params["nthread"] = params.pop("n_jobs")
+        params.update(objective="binary:logistic", tree_method="hist", eval_metric=["error", stopping_metric])
+
+        # The training matrix is evaluated from XGBoost's prediction cache, so its accuracy comes almost for free
+        evals = [(self.dtrain, "train")] if self.dvalid is None else [(self.dtrain, "train"), (self.dvalid, "validation")]
+        evals_result: dict = {}
+        booster = xgb.train(
+            params,
+            self.dtrain,
+            num_boost_round=num_boost_round,
+            evals=evals,
+            early_stopping_rounds=early_stopping_rounds if self.dvalid is not None else None,
+            evals_result=evals_result,
+            callbacks=callbacks,
+            verbose_eval=False,
+        )
+        best_iteration = booster.best_iteration if self.dvalid is not None and early_stopping_rounds else booster.num_boosted_rounds() - 1
+        # Dropping the trees boosted after the best round shrinks the saved model
+        booster = booster[: best_iteration + 1]
+
+        # Wrapped in an XGBClassifier so MyModel, FastRowPredictor and CompiledTreeEnsemble handle it like a fitted one
+        model = xgb.XGBClassifier()
+        model.load_model(bytearray(booster.save_raw("ubj")))
+        return HistFitResult(
+            model=model,
+            train_accuracy=1.0 - evals_result["train"]["error"][best_iteration],
+            best_iteration=best_iteration,
+            validation_score=None if self.dvalid is None else evals_result["validation"][stopping_metric][best_iteration],
+        )
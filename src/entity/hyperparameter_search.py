@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+
+from src.entity.hist_training import HistTrainingSet
+from src.logger import logging
+
+STUDY_NAME = "model_trainer"
+
+
+def _import_optuna():
+    # optuna is a dev dependency: only needed when tuning is enabled
+    try:
+        import optuna
+    except ImportError as e:
+        raise ImportError("Hyperparameter tuning needs optuna, install the dev dependencies (uv sync --group dev)") from e
+    return optuna
+
+
+def _storage(journal_file_path: str):
+    optuna = _import_optuna()
+    from optuna.storages.journal import JournalFileBackend
+
+    # A journal file can be shared by processes without a database server
+    return optuna.storages.JournalStorage(JournalFileBackend(journal_file_path))
+
+
+def suggest_xgboost_params(trial) -> dict:
+    """
+    XGBoost search space, taken from notebooks/02_model_exploration_training.ipynb.
+    """
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 100, 1000, step=50),
+        "max_depth": trial.suggest_int("max_depth", 3, 30),
+        "learning_rate": trial.suggest_float("learning_rate", 0.001, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+        "scale_pos_weight": trial.suggest_float("scale_pos_weight", 1, 10),
+    }
+
+
+class _PruningCallback(xgb.callback.TrainingCallback):
+    """
+    Reports the validation AUC to the trial every `interval` boosting rounds and stops boosting once the pruner gives up on the trial.
+    """
+
+    def __init__(self, trial, interval: int):
+        self.trial = trial
+        self.interval = interval
+        self.pruned = False
+
+    def after_iteration(self, model, epoch: int, evals_log: dict) -> bool:
+        if (epoch + 1) % self.interval:
+            return False
+        self.trial.report(evals_log["validation"]["auc"][-1], step=epoch + 1)
+        self.pruned = self.trial.should_prune()
+        return self.pruned
+
+
+def _run_worker(journal_file_path: str, train_file_path: str, settings: dict, seed: int) -> None:
+    """
+    Runs trials of the shared study until its trial budget or the timeout is used up. Executed in a worker process.
+    """
+    optuna = _import_optuna()
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    # Quantized once per worker, every trial of the worker trains on the same matrices
+    training_set = HistTrainingSet.from_array(
+        np.load(train_file_path, mmap_mode="r"),
+        validation_size=settings["validation_size"],
+        random_state=settings["random_state"],
+        max_bin=settings["max_bin"],
+        n_jobs=settings["threads_per_trial"],
+    )
+
+    def objective(trial) -> float:
+        pruning_callback = _PruningCallback(trial, settings["report_interval"])
+        result = training_set.fit(
+            {**suggest_xgboost_params(trial), "n_jobs": settings["threads_per_trial"], "random_state": settings["random_state"]},
+            early_stopping_rounds=settings["early_stopping_rounds"],
+            stopping_metric="auc",
+            callbacks=[pruning_callback],
+        )
+        if pruning_callback.pruned:
+            raise optuna.TrialPruned()
+        return result.validation_score
+
+    study = optuna.load_study(
+        study_name=STUDY_NAME,
+        storage=_storage(journal_file_path),
+        sampler=optuna.samplers.TPESampler(seed=seed),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=settings["startup_trials"], n_warmup_steps=settings["report_interval"]),
+    )
+    study.optimize(
+        objective,
+        timeout=settings["timeout"],
+        callbacks=[optuna.study.MaxTrialsCallback(settings["n_trials"], states=None)],
+    )
+
+
+class HyperparameterSearch:
+    """
+    Budgeted search of XGBoost hyperparameters with optuna.
+
+    Trials run concurrently in n_workers processes that share one study through a journal file, each trial
+    training with threads_per_trial threads (so n_workers * threads_per_trial should not exceed the cores).
+    A trial trains on the transformed training data minus a stratified validation split and is scored by
+    its validation ROC AUC (the notebook's metric) at its best round. Each worker quantizes the data once
+    and reuses the matrices for all its trials. The AUC is reported every report_interval boosting rounds
+    and trials below the median of earlier trials at the same round are pruned.
+
+    The search stops after n_trials trials (pruned ones included) or timeout seconds. The journal is kept,
+    so running again with the same journal file continues the study within the same budget.
+    """
+
+    def __init__(
+        self,
+        journal_file_path: str,
+        validation_size: float,
+        n_trials: int = 50,
+        timeout: float | None = None,
+        n_workers: int = 1,
+        threads_per_trial: int = 1,
+        report_interval: int = 25,
+        early_stopping_rounds: int | None = None,
+        max_bin: int = 256,
+        random_state: int = 42,
+    ):
+        """
+        :param journal_file_path: Study storage shared by the workers
+        :param validation_size: Share of the training data held out to score trials (the final fit's early-stopping share)
+        :param n_trials: Trial budget of the whole search
+        :param timeout: Seconds after which workers stop starting new trials, None for no limit
+        :param n_workers: Processes running trials concurrently (1: run in this process)
+        :param threads_per_trial: XGBoost threads of each trial
+        :param report_interval: Boosting rounds between intermediate scores (pruning checks)
+        :param early_stopping_rounds: Stop a trial once its validation AUC has not improved for that many rounds, None to build all its trees
+        :param max_bin: Maximum number of histogram bins per feature
+        :param random_state: Seed of the validation split and the models; the samplers use random_state + worker index
+        """
+        self.journal_file_path = journal_file_path
+        self.n_workers = max(1, n_workers)
+        self.settings = {
+            "n_trials": n_trials,
+            "timeout": timeout,
+            "threads_per_trial": threads_per_trial,
+            "validation_size": validation_size,
+            "report_interval": report_interval,
+            "early_stopping_rounds": early_stopping_rounds,
+            "max_bin": max_bin,
+            "random_state": random_state,
+            "startup_trials": min(5, n_trials),
+        }
+
+    def run(self, train_file_path: str) -> tuple[dict, float]:
+        """
+        Tunes on the training array saved at train_file_path (features followed by the target column).
+        Returns the best parameters and their validation ROC AUC.
+        """
+        optuna = _import_optuna()
+        os.makedirs(os.path.dirname(self.journal_file_path), exist_ok=True)
+        storage = _storage(self.journal_file_path)
+        optuna.create_study(study_name=STUDY_NAME, storage=storage, direction="maximize", load_if_exists=True)
+
+        random_state = self.settings["random_state"]
+        if self.n_workers == 1:
+            _run_worker(self.journal_file_path, train_file_path, self.settings, random_state)
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [
+                    pool.submit(_run_worker, self.journal_file_path, train_file_path, self.settings, random_state + worker)
+                    for worker in range(self.n_workers)
+                ]
+                for future in futures:
+                    future.result()
+
+        study = optuna.load_study(study_name=STUDY_NAME, storage=storage)
+        states = [trial.state for trial in study.trials]
+        num_completed, num_pruned = states.count(optuna.trial.TrialState.COMPLETE), states.count(optuna.trial.TrialState.PRUNED)
+        if not num_completed:
+            raise ValueError(f"No tuning trial completed ({len(states)} trials, {num_pruned} pruned)")
+        logging.info(f"Tuning: {num_completed} trials completed, {num_pruned} pruned; best validation ROC AUC {study.best_value:.5f}")
+        return study.best_params, study.best_value
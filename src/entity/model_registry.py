@@ -0,0 +1,154 @@
+import sys
+import threading
+import time
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.entity.estimator import MyModel
+from src.exception import MyException
+from src.logger import logging
+from src.utils.metrics import PREDICTION_STAGE_LATENCY, prediction_metrics
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of the production model stored in S3.
+
+    The model is downloaded and unpickled once per (bucket, key) and then served from memory.
+    Every `refresh_interval_seconds` the S3 object's ETag is checked on a background thread and
+    the model is reloaded only when the ETag has changed. Requests keep being served by the
+    current model while a refresh is in flight.
+    """
+
+    _instances: dict[tuple[str, str], "ModelRegistry"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, bucket_name: str, model_path: str, refresh_interval_seconds: float, use_compiled_model: bool = False):
+        """
+        :param bucket_name: Name of your model bucket
+        :param model_path: Location of your model in bucket
+        :param refresh_interval_seconds: Minimum time between two ETag checks
+        :param use_compiled_model: Serve a CompiledTreeEnsemble instead of the XGBoost classifier
+        """
+        self.bucket_name = bucket_name
+        self.model_path = model_path
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.use_compiled_model = use_compiled_model
+        self.s3 = SimpleStorageService()
+        self._model: MyModel | None = None
+        self._etag: str | None = None
+        self._last_checked: float = 0.0
+        self._lock = threading.Lock()
+        # Signalled when the in-flight refresh ends, so only one refresh downloads and swaps at a time
+        self._refresh_done = threading.Condition(self._lock)
+        self._refreshing = False
+
+    @classmethod
+    def get_instance(cls, bucket_name: str, model_path: str, refresh_interval_seconds: float, use_compiled_model: bool = False) -> "ModelRegistry":
+        """
+        Returns the shared registry for the given bucket and key, creating it on first use.
+        """
+        key = (bucket_name, model_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(bucket_name, model_path, refresh_interval_seconds, use_compiled_model)
+            return cls._instances[key]
+
+    @property
+    def etag(self) -> str | None:
+        return self._etag
+
+    def get_model(self) -> MyModel:
+        """
+        Returns the cached model, loading it synchronously on first use and
+        scheduling a background ETag check once the refresh interval has elapsed.
+        """
+        try:
+            if self._model is None:
+                with self._lock:
+                    if self._model is None:
+                        self._load()
+            elif time.monotonic() - self._last_checked >= self.refresh_interval_seconds:
+                self._schedule_refresh()
+            return self._model
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def set_model(self, model: MyModel, etag: str | None = None) -> None:
+        """
+        Atomically swaps the served model, e.g. right after a new model has been pushed.
+        """
+        with self._lock:
+            self._model = model
+            self._etag = etag
+            self._last_checked = time.monotonic()
+        logging.info(f"Model registry for s3://{self.bucket_name}/{self.model_path} swapped to etag {etag}")
+
+    def invalidate(self) -> None:
+        """
+        Forces the next `get_model` call to check S3 for a newer model.
+        """
+        with self._lock:
+            self._last_checked = 0.0
+
+    def reload(self) -> None:
+        """
+        Synchronously checks S3 and swaps in the model if its ETag changed, e.g. right after a retrain pushed a new model.
+        A background refresh in flight is waited for first, as it may have checked S3 before the push.
+        """
+        if self._model is None:
+            self.get_model()
+            return
+        with self._lock:
+            while self._refreshing:
+                self._refresh_done.wait()
+            self._refreshing = True
+            self._last_checked = time.monotonic()
+        self._refresh()
+
+    def _prepare(self, model: MyModel) -> MyModel:
+        if not isinstance(model, MyModel):
+            return model
+        if self.use_compiled_model:
+            try:
+                model = model.compile()
+            except MyException:
+                logging.exception("Could not compile model, serving the XGBoost classifier instead")
+        # Build the single-row fast path at load time so the first request does not pay for it
+        model.get_fast_predictor()
+        return model
+
+    def _load(self) -> None:
+        etag = self.s3.get_object_etag(bucket_name=self.bucket_name, s3_key=self.model_path)
+        with prediction_metrics.time(PREDICTION_STAGE_LATENCY, stage="model_load"):
+            model = self.s3.load_model(model_name=self.model_path, bucket_name=self.bucket_name, etag=etag)
+            model = self._prepare(model)
+        self._model, self._etag = model, etag
+        self._last_checked = time.monotonic()
+        logging.info(f"Model registry loaded s3://{self.bucket_name}/{self.model_path} with etag {etag}")
+
+    def _schedule_refresh(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._last_checked = time.monotonic()
+        threading.Thread(target=self._refresh, name="model-registry-refresh", daemon=True).start()
+
+    def _refresh(self) -> None:
+        try:
+            etag = self.s3.get_object_etag(bucket_name=self.bucket_name, s3_key=self.model_path)
+            if etag == self._etag:
+                logging.debug("Model registry: S3 model unchanged, keeping cached model")
+                return
+            logging.info(f"Model registry: S3 etag changed {self._etag} -> {etag}, reloading model")
+            with prediction_metrics.time(PREDICTION_STAGE_LATENCY, stage="model_load"):
+                model = self.s3.load_model(model_name=self.model_path, bucket_name=self.bucket_name, etag=etag)
+                model = self._prepare(model)
+            self.set_model(model, etag=etag)
+        except Exception:
+            # Keep serving the current model; the next interval will retry.
+            logging.exception("Model registry refresh failed, keeping cached model")
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._refresh_done.notify_all()
@@ -0,0 +1,176 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Floor applied to bin proportions so PSI stays finite for empty bins
+PSI_EPSILON = 1e-4
+
+
+class ReferenceProfile:
+    """
+    Compact per-feature sketch of the data a model was trained on, stored next to the model.
+
+    Numeric features are summarized by quantile-bin histograms: the interior bin edges and the share of
+    rows in each bin, with a last bin for missing values. Categorical features keep the share of every
+    category, plus an "other" bin for unseen categories and a missing-value bin. New data is compared
+    with the profile by counting it into the same bins (see DriftScorer), so the training data itself
+    is never needed again.
+    """
+
+    def __init__(self, features: dict[str, dict]):
+        """
+        :param features: {column: {"edges": [...], "proportions": [...]}} for numeric columns and
+                         {column: {"categories": [...], "proportions": [...]}} for categorical ones
+        """
+        self.features = features
+
+    @classmethod
+    def from_sample(cls, sample: pd.DataFrame, numeric_columns: list[str], categorical_columns: list[str], n_bins: int) -> "ReferenceProfile":
+        """
+        Builds the profile from a (uniformly sampled) DataFrame, with at most n_bins quantile bins per numeric column.
+        """
+        features = {}
+        for column in numeric_columns:
+            if column not in sample.columns:
+                continue
+            values = pd.to_numeric(sample[column], errors="coerce").to_numpy(dtype=np.float64)
+            present = values[~np.isnan(values)]
+            edges = np.unique(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1])) if present.size else np.empty(0)
+            counts = cls.numeric_bin_counts(values, edges)
+            features[column] = {"edges": edges.tolist(), "proportions": (counts / max(len(values), 1)).tolist()}
+        for column in categorical_columns:
+            if column not in sample.columns:
+                continue
+            values = sample[column]
+            categories = sorted(str(category) for category in values.dropna().unique())
+            counts = cls.categorical_bin_counts(values, categories)
+            features[column] = {"categories": categories, "proportions": (counts / max(len(values), 1)).tolist()}
+        return cls(features)
+
+    @staticmethod
+    def numeric_bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """
+        Counts values into the bins delimited by edges; the last of the len(edges) + 2 bins counts NaNs.
+        """
+        bins = np.searchsorted(edges, values, side="right")
+        bins[np.isnan(values)] = len(edges) + 1
+        return np.bincount(bins, minlength=len(edges) + 2)
+
+    @staticmethod
+    def categorical_bin_counts(values: pd.Series, categories: list[str]) -> np.ndarray:
+        """
+        Counts values per category, followed by an "other" bin for unseen categories and a missing-value bin.
+        """
+        # Factorize once, then map the few distinct values onto the profile's bins; code -1 (missing) picks the last entry
+        codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+        bins = pd.Index(categories).get_indexer(uniques.astype(str))
+        bins[bins < 0] = len(categories)
+        return np.bincount(np.append(bins, len(categories) + 1)[codes], minlength=len(categories) + 2)
+
+    def save(self, file_path: str) -> None:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as profile_file:
+            json.dump({"features": self.features}, profile_file)
+
+    @classmethod
+    def from_json(cls, content: str | bytes) -> "ReferenceProfile":
+        return cls(json.loads(content)["features"])
+
+
+class ReferenceProfileBuilder:
+    """
+    Collects a bounded uniform sample of the rows passed to `update`, chunk by chunk, and builds a ReferenceProfile from it.
+
+    Every row gets a random key and the sample_size rows with the smallest keys are kept (bottom-k sampling),
+    so memory stays bounded however many chunks are seen and the result does not depend on chunk boundaries.
+    """
+
+    def __init__(self, numeric_columns: list[str], categorical_columns: list[str], n_bins: int, sample_size: int, seed: int = 42):
+        """
+        :param numeric_columns: Columns summarized by quantile-bin histograms
+        :param categorical_columns: Columns summarized by category shares
+        :param n_bins: Maximum number of quantile bins per numeric column
+        :param sample_size: Number of rows the bin edges and shares are computed from
+        :param seed: Seed of the sampling keys
+        """
+        self.numeric_columns = numeric_columns
+        self.categorical_columns = categorical_columns
+        self.n_bins = n_bins
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+        self._sample: pd.DataFrame | None = None
+        self._keys = np.empty(0)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        columns = [column for column in self.numeric_columns + self.categorical_columns if column in chunk.columns]
+        keys = np.concatenate([self._keys, self._rng.random(len(chunk))])
+        sample = chunk[columns] if self._sample is None else pd.concat([self._sample, chunk[columns]])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[: self.sample_size]
+            keys, sample = keys[keep], sample.iloc[keep]
+        self._keys, self._sample = keys, sample
+
+    def build(self) -> ReferenceProfile:
+        sample = pd.DataFrame() if self._sample is None else self._sample
+        return ReferenceProfile.from_sample(sample, self.numeric_columns, self.categorical_columns, self.n_bins)
+
+
+class DriftScorer:
+    """
+    Scores how far new data has drifted from a ReferenceProfile.
+
+    Chunks passed to `update` are counted into the profile's bins with one vectorized pass per column.
+    `scores` then reports, per feature, the Population Stability Index over all bins (missing values included)
+    and a Kolmogorov-Smirnov style statistic: the largest gap between the binned CDFs of the present values.
+    """
+
+    def __init__(self, profile: ReferenceProfile, psi_threshold: float):
+        """
+        :param profile: Profile of the data the production model was trained on
+        :param psi_threshold: PSI at or above which a feature counts as drifted (0.1: moderate, 0.2: significant shift)
+        """
+        self.profile = profile
+        self.psi_threshold = psi_threshold
+        self._counts = {column: np.zeros(len(feature["proportions"]), dtype=np.int64) for column, feature in profile.features.items()}
+        self._edges = {column: np.asarray(feature["edges"]) for column, feature in profile.features.items() if "edges" in feature}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for column, counts in self._counts.items():
+            if column not in chunk.columns:
+                continue
+            if column in self._edges:
+                values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64)
+                counts += ReferenceProfile.numeric_bin_counts(values, self._edges[column])
+            else:
+                counts += ReferenceProfile.categorical_bin_counts(chunk[column], self.profile.features[column]["categories"])
+
+    @staticmethod
+    def _ks_statistic(expected: np.ndarray, actual: np.ndarray) -> float:
+        # Missing values (last bin) are left out of the distribution of present values
+        expected, actual = expected[:-1], actual[:-1]
+        if expected.sum() == 0 or actual.sum() == 0:
+            return 0.0
+        return float(np.max(np.abs(np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum())))
+
+    def scores(self) -> dict:
+        """
+        Returns {"features": {column: {"psi", "ks"}}, "max_psi", "drifted_features", "drift_detected"}.
+        """
+        features = {}
+        for column, counts in self._counts.items():
+            if counts.sum() == 0:
+                continue
+            expected = np.maximum(np.asarray(self.profile.features[column]["proportions"]), PSI_EPSILON)
+            actual = np.maximum(counts / counts.sum(), PSI_EPSILON)
+            psi = float(np.sum((actual - expected) * np.log(actual / expected)))
+            ks = self._ks_statistic(np.asarray(self.profile.features[column]["proportions"]), counts.astype(np.float64))
+            features[column] = {"psi": psi, "ks": ks}
+        drifted = [column for column, score in features.items() if score["psi"] >= self.psi_threshold]
+        return {
+            "features": features,
+            "max_psi": max((score["psi"] for score in features.values()), default=0.0),
+            "drifted_features": drifted,
+            "drift_detected": bool(drifted),
+        }
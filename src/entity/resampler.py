@@ -0,0 +1,121 @@
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import imblearn
+import numpy as np
+from imblearn.combine import SMOTEENN
+from imblearn.over_sampling import SMOTE, RandomOverSampler
+from imblearn.under_sampling import EditedNearestNeighbours, RandomUnderSampler
+from sklearn.neighbors import NearestNeighbors
+
+from src.logger import logging
+
+# Class-rebalancing methods, from the most to the least expensive
+RESAMPLING_METHODS: tuple[str, ...] = ("smoteenn", "smote", "random_over", "random_under", "none")
+
+
+class CachedResampler:
+    """
+    Class-rebalancing stage with a persistent cache of its outputs.
+
+    `method` selects the sampler: "smoteenn" (SMOTE oversampling followed by Edited Nearest Neighbours
+    cleaning, the original behaviour), "smote", "random_over", "random_under" or "none". The nearest-neighbour
+    searches of SMOTE and ENN run on n_jobs cores.
+
+    Resampled arrays are cached under cache_dir, keyed by a hash of the input arrays and of every setting
+    that changes the output (method, random_state, imblearn version; not n_jobs). A re-run on unchanged data
+    loads the cached arrays instead of resampling. The oldest entries are removed beyond max_cache_entries.
+    """
+
+    def __init__(
+        self,
+        method: str = "smoteenn",
+        n_jobs: int | None = None,
+        random_state: int | None = 42,
+        cache_dir: str | None = None,
+        max_cache_entries: int = 8,
+    ):
+        """
+        :param method: One of RESAMPLING_METHODS
+        :param n_jobs: Cores used by the nearest-neighbour searches (-1: all)
+        :param random_state: Seed of the sampler, part of the cache key
+        :param cache_dir: Directory of cached results, falsy to disable caching
+        :param max_cache_entries: Number of cached results kept
+        """
+        if method not in RESAMPLING_METHODS:
+            raise ValueError(f"Unknown resampling method {method!r}, expected one of {RESAMPLING_METHODS}")
+        self.method = method
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.cache_dir = cache_dir
+        self.max_cache_entries = max_cache_entries
+
+    def build_sampler(self):
+        if self.method == "smoteenn":
+            # SMOTE's default k_neighbors=5 means 6 neighbours including the sample itself
+            smote = SMOTE(
+                sampling_strategy="minority", random_state=self.random_state, k_neighbors=NearestNeighbors(n_neighbors=6, n_jobs=self.n_jobs)
+            )
+            enn = EditedNearestNeighbours(sampling_strategy="all", n_jobs=self.n_jobs)
+            return SMOTEENN(sampling_strategy="minority", random_state=self.random_state, smote=smote, enn=enn)
+        if self.method == "smote":
+            return SMOTE(
+                sampling_strategy="minority", random_state=self.random_state, k_neighbors=NearestNeighbors(n_neighbors=6, n_jobs=self.n_jobs)
+            )
+        if self.method == "random_over":
+            return RandomOverSampler(sampling_strategy="minority", random_state=self.random_state)
+        if self.method == "random_under":
+            return RandomUnderSampler(sampling_strategy="majority", random_state=self.random_state)
+        return None
+
+    def cache_key(self, x: np.ndarray, y: np.ndarray) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        settings = {"method": self.method, "random_state": self.random_state, "imblearn": imblearn.__version__}
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        for array in (x, y):
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(memoryview(array).cast("B"))
+        return digest.hexdigest()
+
+    def _prune_cache(self) -> None:
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.npz")):
+            with contextlib.suppress(FileNotFoundError):
+                entries.append((os.path.getmtime(path), path))
+        entries = [path for _, path in sorted(entries)]
+        for path in entries[: max(0, len(entries) - self.max_cache_entries)]:
+            # The train and test resamples may prune at the same time
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def fit_resample(self, x: np.ndarray, y) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the rebalanced (x, y), from the cache when the same inputs were resampled with the same settings before.
+        """
+        y = np.asarray(y)
+        sampler = self.build_sampler()
+        if sampler is None:
+            return x, y
+        if not self.cache_dir:
+            return sampler.fit_resample(x, y)
+
+        cache_path = os.path.join(self.cache_dir, f"{self.cache_key(x, y)}.npz")
+        if os.path.exists(cache_path):
+            logging.info(f"Loading resampled arrays from cache {cache_path}")
+            os.utime(cache_path)
+            with np.load(cache_path) as cached:
+                return cached["x"], cached["y"]
+
+        x_resampled, y_resampled = sampler.fit_resample(x, y)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as cache_file:
+            np.savez(cache_file, x=x_resampled, y=y_resampled)
+        os.replace(tmp_path, cache_path)
+        self._prune_cache()
+        return x_resampled, y_resampled
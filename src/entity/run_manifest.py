@@ -0,0 +1,116 @@
+import dataclasses
+import json
+import os
+import typing
+from datetime import datetime
+
+import numpy as np
+
+RUN_RUNNING = "running"
+RUN_FAILED = "failed"
+RUN_FINISHED = "finished"
+
+
+def _to_json(value: object) -> object:
+    if isinstance(value, np.ndarray | np.generic):
+        return value.tolist()
+    return str(value)
+
+
+def _from_dict(artifact_type: type, data: dict) -> object:
+    hints = typing.get_type_hints(artifact_type)
+    values = {}
+    for field in dataclasses.fields(artifact_type):
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        # Optional artifacts (X | None) are rebuilt as X
+        field_type = next((arg for arg in typing.get_args(hints[field.name]) if arg is not type(None)), hints[field.name])
+        if dataclasses.is_dataclass(field_type) and isinstance(value, dict):
+            value = _from_dict(field_type, value)
+        values[field.name] = value
+    return artifact_type(**values)
+
+
+class RunManifest:
+    """
+    Checkpoint file of a training run, kept in the run's artifact directory.
+
+    It records the run's status and, for every completed stage, the stage's artifact (as JSON) and completion
+    time. A run restarted with the same run ID reads it back to skip the stages that already completed, and
+    resumes from the first one that did not, in the same artifact directory.
+    The file is rewritten with write-then-rename after every change, so a crash never leaves it half-written.
+    """
+
+    def __init__(self, file_path: str, run_id: str, artifact_dir: str):
+        """
+        :param file_path: Location of the manifest, read back when it exists
+        :param run_id: ID of the run, the name of its artifact directory
+        :param artifact_dir: Artifact directory of the run; completed stages whose files under it are missing are run again
+        """
+        self.file_path = file_path
+        self.artifact_dir = os.path.normpath(artifact_dir)
+        self.content = {"run_id": run_id, "status": RUN_RUNNING, "stages": {}}
+        if os.path.exists(file_path):
+            with open(file_path) as manifest_file:
+                self.content = json.load(manifest_file)
+
+    @property
+    def run_id(self) -> str:
+        return self.content["run_id"]
+
+    @property
+    def completed_stages(self) -> list[str]:
+        return list(self.content["stages"])
+
+    def _write(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(self.content, manifest_file, indent=4, default=_to_json)
+        os.replace(tmp_path, self.file_path)
+
+    def _files_exist(self, data: dict) -> bool:
+        for value in data.values():
+            if isinstance(value, dict) and not self._files_exist(value):
+                return False
+            if isinstance(value, str) and os.path.normpath(value).startswith(self.artifact_dir + os.sep) and not os.path.exists(value):
+                return False
+        return True
+
+    def completed_artifact(self, stage: str, artifact_type: type) -> object | None:
+        """
+        Returns the artifact recorded for stage, or None when the stage has not completed or its output files are gone.
+        """
+        entry = self.content["stages"].get(stage)
+        if entry is None or not self._files_exist(entry["artifact"]):
+            return None
+        return _from_dict(artifact_type, entry["artifact"])
+
+    def record(self, stage: str, artifact: object) -> None:
+        """
+        Marks stage as completed with artifact. Its output files must already be on disk.
+        """
+        self.content["stages"][stage] = {"artifact": dataclasses.asdict(artifact), "completed_at": datetime.now().isoformat(timespec="seconds")}
+        self.content["status"] = RUN_RUNNING
+        self.content.pop("failed_stage", None)
+        self.content.pop("error", None)
+        self._write()
+
+    def discard(self, stages: typing.Iterable[str]) -> None:
+        """
+        Forgets stages (the ones after a stage that has to run again, whose outputs it replaces).
+        """
+        for stage in stages:
+            self.content["stages"].pop(stage, None)
+        self._write()
+
+    def record_failure(self, stage: str | None, error: str) -> None:
+        self.content.update(status=RUN_FAILED, failed_stage=stage, error=error)
+        self._write()
+
+    def finish(self) -> None:
+        self.content["status"] = RUN_FINISHED
+        self.content.pop("failed_stage", None)
+        self.content.pop("error", None)
+        self._write()
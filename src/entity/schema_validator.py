@@ -0,0 +1,171 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from src.entity.api_model import HeartAttackData
+
+
+def field_name(column: str) -> str:
+    """
+    Returns the HeartAttackData field name of a dataset column ("Heart rate" -> "heart_rate").
+    """
+    return column.lower().replace(" ", "_").replace("-", "_")
+
+
+def iter_chunks(data: pd.DataFrame | Iterable[pd.DataFrame], chunk_size: int) -> Iterable[pd.DataFrame]:
+    """
+    Yields a DataFrame in slices of chunk_size rows (without copying), or passes an iterable of chunks through.
+    """
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, max(len(data), 1), chunk_size):
+            yield data.iloc[start : start + chunk_size]
+    else:
+        yield from data
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    name: str
+    expected_dtype: str
+    lower: float = -np.inf
+    upper: float = np.inf
+    lower_inclusive: bool = True
+    upper_inclusive: bool = True
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.expected_dtype != "object"
+
+
+class SchemaValidator:
+    """
+    Validates data against the schema columns and the Field bounds of an API model, one chunk at a time.
+
+    The schema and bounds are compiled once into per-column rules, and every chunk is checked with a few
+    vectorized NumPy passes per column whose results are folded into running totals, so memory use is
+    bounded by the chunk size. A DataFrame already in memory is checked in slices without being copied.
+
+    The report holds, per column: the dtypes seen and whether they match the schema, null counts,
+    values that are not numbers in numeric columns, out-of-range counts and min/max/mean
+    (or the value counts of categorical columns).
+    """
+
+    def __init__(self, schema_columns: dict[str, str], bounds_model: type[BaseModel] = HeartAttackData):
+        """
+        :param schema_columns: {column name: dtype} as listed under `columns` in schema.yaml
+        :param bounds_model: Pydantic model whose Field constraints (ge/gt/le/lt) bound the matching columns
+        """
+        model_fields = bounds_model.model_fields
+        self.rules: tuple[ColumnRule, ...] = tuple(
+            self._compile_rule(name, dtype, model_fields.get(field_name(name))) for name, dtype in schema_columns.items()
+        )
+
+    @staticmethod
+    def _compile_rule(name: str, dtype: str, field_info) -> ColumnRule:
+        bounds = {}
+        if field_info is not None:
+            if field_info.annotation is bool:
+                bounds = {"lower": 0, "upper": 1}
+            for constraint in field_info.metadata:
+                if getattr(constraint, "ge", None) is not None:
+                    bounds |= {"lower": constraint.ge, "lower_inclusive": True}
+                if getattr(constraint, "gt", None) is not None:
+                    bounds |= {"lower": constraint.gt, "lower_inclusive": False}
+                if getattr(constraint, "le", None) is not None:
+                    bounds |= {"upper": constraint.le, "upper_inclusive": True}
+                if getattr(constraint, "lt", None) is not None:
+                    bounds |= {"upper": constraint.lt, "upper_inclusive": False}
+        return ColumnRule(name=name, expected_dtype=dtype, **bounds)
+
+    @staticmethod
+    def _new_totals(rule: ColumnRule) -> dict:
+        totals = {"dtypes": set(), "null_count": 0}
+        if rule.is_numeric:
+            totals |= {"invalid_count": 0, "out_of_range_count": 0, "count": 0, "sum": 0.0, "min": np.inf, "max": -np.inf}
+        else:
+            totals["value_counts"] = {}
+        return totals
+
+    @staticmethod
+    def _check_numeric(rule: ColumnRule, column: pd.Series, totals: dict) -> None:
+        if column.dtype.kind in "biuf":
+            values = column.to_numpy(dtype=np.float64)
+            nulls = np.isnan(values)
+            invalid = 0
+        else:
+            # Strings such as "na" or "1,5" in a numeric column: nulls stay nulls, anything unparsable is invalid
+            values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+            nulls = column.isna().to_numpy()
+            invalid = int(np.count_nonzero(np.isnan(values) & ~nulls))
+        present = values[~np.isnan(values)]
+        below = present < rule.lower if rule.lower_inclusive else present <= rule.lower
+        above = present > rule.upper if rule.upper_inclusive else present >= rule.upper
+        totals["null_count"] += int(np.count_nonzero(nulls))
+        totals["invalid_count"] += invalid
+        totals["out_of_range_count"] += int(np.count_nonzero(below | above))
+        if present.size:
+            totals["count"] += present.size
+            totals["sum"] += float(present.sum())
+            totals["min"] = min(totals["min"], float(present.min()))
+            totals["max"] = max(totals["max"], float(present.max()))
+
+    @staticmethod
+    def _check_categorical(column: pd.Series, totals: dict) -> None:
+        totals["null_count"] += int(column.isna().sum())
+        for value, count in column.value_counts().items():
+            totals["value_counts"][str(value)] = totals["value_counts"].get(str(value), 0) + int(count)
+
+    @staticmethod
+    def _column_report(rule: ColumnRule, totals: dict) -> dict:
+        dtypes = sorted(totals["dtypes"])
+        report = {
+            "expected_dtype": rule.expected_dtype,
+            "dtypes": dtypes,
+            "dtype_mismatch": dtypes != [rule.expected_dtype],
+            "null_count": totals["null_count"],
+        }
+        if not rule.is_numeric:
+            return report | {"value_counts": totals["value_counts"]}
+        count = totals["count"]
+        return report | {
+            "invalid_count": totals["invalid_count"],
+            "out_of_range_count": totals["out_of_range_count"],
+            "lower_bound": None if np.isinf(rule.lower) else rule.lower,
+            "upper_bound": None if np.isinf(rule.upper) else rule.upper,
+            "min": totals["min"] if count else None,
+            "max": totals["max"] if count else None,
+            "mean": totals["sum"] / count if count else None,
+        }
+
+    def validate(self, data: pd.DataFrame | Iterable[pd.DataFrame], chunk_size: int = 1_000_000) -> dict:
+        """
+        Checks a DataFrame, or the chunks of one, against the compiled rules.
+
+        Returns {"num_rows", "missing_columns", "unexpected_columns", "columns": {name: column report}}.
+        """
+        totals = {rule.name: self._new_totals(rule) for rule in self.rules}
+        num_rows = 0
+        seen_columns: set[str] = set()
+        for chunk in iter_chunks(data, chunk_size):
+            num_rows += len(chunk)
+            seen_columns.update(chunk.columns)
+            for rule in self.rules:
+                if rule.name not in chunk.columns:
+                    continue
+                column = chunk[rule.name]
+                totals[rule.name]["dtypes"].add(str(column.dtype))
+                if rule.is_numeric:
+                    self._check_numeric(rule, column, totals[rule.name])
+                else:
+                    self._check_categorical(column, totals[rule.name])
+
+        expected_columns = [rule.name for rule in self.rules]
+        return {
+            "num_rows": num_rows,
+            "missing_columns": [name for name in expected_columns if name not in seen_columns],
+            "unexpected_columns": sorted(seen_columns - set(expected_columns)),
+            "columns": {rule.name: self._column_report(rule, totals[rule.name]) for rule in self.rules if rule.name in seen_columns},
+        }
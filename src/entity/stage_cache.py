@@ -0,0 +1,156 @@
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import load_object, rebase_paths, save_object
+
+ARTIFACT_FILE_NAME = "artifact.joblib"
+META_FILE_NAME = "meta.json"
+FILES_DIR_NAME = "files"
+
+
+def _update_with_path(digest, path: str) -> None:
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                _update_with_path(digest, file_path)
+        return
+    with open(path, "rb") as file_obj:
+        while block := file_obj.read(1 << 20):
+            digest.update(block)
+
+
+def _link_tree(src: str, dst: str) -> None:
+    """
+    Hard-links src (a file or a directory tree) to dst, copying where hard links are not possible; existing files are kept.
+    """
+    if os.path.isdir(src):
+        for root, _, files in os.walk(src):
+            target_root = os.path.join(dst, os.path.relpath(root, src))
+            os.makedirs(target_root, exist_ok=True)
+            for name in files:
+                _link_tree(os.path.join(root, name), os.path.join(target_root, name))
+        return
+    if os.path.exists(dst):
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class StageCache:
+    """
+    Content-addressed cache of training pipeline stage outputs, shared by all runs.
+
+    A stage's key hashes the stage name, its config dataclass (minus the fields whose metadata sets
+    cache_key=False), the source file of its component, the contents of its input files and any other
+    inputs (upstream artifacts, the version of the MongoDB collection, the ETag of the production model,
+    ...). Paths under the run's artifact directory are made relative first, so the run timestamp does not
+    change the key.
+
+    On a hit the cached output files are hard-linked into the current run's artifact directory and the
+    cached artifact is returned with its paths moved onto the current run, so every run directory stays
+    a complete record and downstream stages cannot tell a cached stage from a computed one.
+
+    Layout: <cache_dir>/<stage>/<key>/artifact.joblib, meta.json, files/<path relative to the run directory>
+    """
+
+    def __init__(self, cache_dir: str, artifact_dir: str):
+        """
+        :param cache_dir: Directory shared by all runs
+        :param artifact_dir: Artifact directory of the current run
+        """
+        self.cache_dir = cache_dir
+        self.artifact_dir = os.path.normpath(artifact_dir)
+
+    def _normalize(self, value: object) -> str:
+        if dataclasses.is_dataclass(value):
+            # Fields marked cache_key=False (thread and process counts) do not change the output, so they stay out of the key
+            fields = {field.name: field for field in dataclasses.fields(value)}
+            excluded = {name for name, field in fields.items() if not field.metadata.get("cache_key", True)}
+            # Plain class attributes (e.g. ModelTrainerConfig's hyperparameters) are not dataclass fields but shape the output too
+            class_attributes = {
+                name: attr for name, attr in vars(type(value)).items() if not name.startswith("__") and not callable(attr) and name not in fields
+            }
+            value = {**class_attributes, **{name: attr for name, attr in dataclasses.asdict(value).items() if name not in excluded}}
+        return json.dumps(value, sort_keys=True, default=str).replace(self.artifact_dir, "<run>")
+
+    def fingerprint(self, stage: str, config: object, input_files: list[str] = (), inputs: dict | None = None, source_file: str | None = None) -> str:
+        """
+        Returns the cache key of a stage run with the given config and inputs.
+        """
+        try:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(stage.encode())
+            digest.update(self._normalize(config).encode())
+            digest.update(self._normalize({name: self._normalize(value) for name, value in (inputs or {}).items()}).encode())
+            paths = list(input_files) if source_file is None else [source_file, *input_files]
+            for path in paths:
+                digest.update(self._normalize(path).encode())
+                _update_with_path(digest, path)
+            return digest.hexdigest()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _output_paths(self, artifact: object) -> list[str]:
+        paths = []
+        for field in dataclasses.fields(artifact):
+            value = getattr(artifact, field.name)
+            if dataclasses.is_dataclass(value):
+                paths.extend(self._output_paths(value))
+            elif isinstance(value, str) and os.path.normpath(value).startswith(self.artifact_dir + os.sep) and os.path.exists(value):
+                paths.append(os.path.normpath(value))
+        return paths
+
+    def load(self, stage: str, key: str) -> object | None:
+        """
+        Returns the cached artifact of stage for key with its files linked into the current run, or None on a miss.
+        """
+        try:
+            entry_dir = os.path.join(self.cache_dir, stage, key)
+            if not os.path.exists(os.path.join(entry_dir, META_FILE_NAME)):
+                return None
+            with open(os.path.join(entry_dir, META_FILE_NAME)) as meta_file:
+                meta = json.load(meta_file)
+            files_dir = os.path.join(entry_dir, FILES_DIR_NAME)
+            if os.path.isdir(files_dir):
+                _link_tree(files_dir, self.artifact_dir)
+            os.utime(os.path.join(entry_dir, META_FILE_NAME))
+            return rebase_paths(load_object(os.path.join(entry_dir, ARTIFACT_FILE_NAME)), meta["artifact_dir"], self.artifact_dir)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def save(self, stage: str, key: str, artifact: object) -> None:
+        """
+        Stores artifact and the output files it references under key. All output files must have been written.
+        """
+        try:
+            entry_dir = os.path.join(self.cache_dir, stage, key)
+            if os.path.exists(entry_dir):
+                return
+            tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            for path in self._output_paths(artifact):
+                _link_tree(path, os.path.join(tmp_dir, FILES_DIR_NAME, os.path.relpath(path, self.artifact_dir)))
+            save_object(os.path.join(tmp_dir, ARTIFACT_FILE_NAME), artifact)
+            # meta.json is written last: its presence marks a complete entry
+            with open(os.path.join(tmp_dir, META_FILE_NAME), "w") as meta_file:
+                json.dump({"stage": stage, "artifact_dir": self.artifact_dir}, meta_file)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Another run stored the same entry first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            logging.info(f"Cached {stage} outputs under {entry_dir}")
+        except Exception as e:
+            raise MyException(e, sys) from e
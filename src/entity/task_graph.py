@@ -0,0 +1,126 @@
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from src.logger import logging
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+@dataclass
+class Task:
+    name: str
+    fn: Callable[..., object]
+    inputs: tuple[str, ...] = ()
+    executor: str = THREAD
+    when: Callable[..., bool] | None = None
+
+
+class TaskGraph:
+    """
+    DAG of tasks with declared inputs, run by a scheduler as soon as their inputs are ready.
+
+    A task is called with the outputs of its inputs as positional arguments, in declaration order, and its
+    return value is its output. Tasks run on a thread pool (I/O, and numpy/sklearn work that releases the GIL)
+    or on a process pool (pure-Python or non-thread-safe work such as matplotlib rendering; the function and
+    its inputs must be picklable). Independent tasks overlap, so a run takes about as long as its critical path.
+
+    A task whose `when` predicate (called with the same arguments) returns False is skipped, and so is every
+    task downstream of it. Tasks must be added after their inputs, which keeps the graph acyclic. With
+    max_threads <= 1 every task runs inline, one after another, in the order it was added.
+    """
+
+    def __init__(self, max_threads: int = 4, max_processes: int = 1):
+        """
+        :param max_threads: Size of the thread pool, <= 1 to run every task inline
+        :param max_processes: Size of the process pool, only started when a process task is ready to run
+        """
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.tasks: dict[str, Task] = {}
+        self.failed_task: str | None = None
+        self.durations: dict[str, float] = {}
+
+    def add(
+        self, name: str, fn: Callable[..., object], inputs: tuple[str, ...] = (), executor: str = THREAD, when: Callable[..., bool] | None = None
+    ) -> None:
+        if name in self.tasks:
+            raise ValueError(f"Task {name!r} already added")
+        unknown = [input_name for input_name in inputs if input_name not in self.tasks]
+        if unknown:
+            raise ValueError(f"Task {name!r} depends on tasks not added yet: {unknown}")
+        if executor not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown executor {executor!r}, expected {THREAD!r} or {PROCESS!r}")
+        self.tasks[name] = Task(name=name, fn=fn, inputs=tuple(inputs), executor=executor, when=when)
+
+    def run(self) -> dict[str, object]:
+        """
+        Runs every task and returns {task name: output} (skipped tasks are left out).
+        The first failing task cancels the tasks not started yet; its error is re-raised once the running ones finish.
+        """
+        results: dict[str, object] = {}
+        skipped: set[str] = set()
+        remaining = dict(self.tasks)
+        running: dict[Future, tuple[Task, float]] = {}
+        pools: dict[str, Executor] = {}
+
+        def ready_tasks() -> list[tuple[Task, list]]:
+            ready = []
+            for task in list(remaining.values()):
+                if any(input_name in skipped for input_name in task.inputs):
+                    skipped.add(task.name)
+                    del remaining[task.name]
+                elif all(input_name in results for input_name in task.inputs):
+                    del remaining[task.name]
+                    args = [results[input_name] for input_name in task.inputs]
+                    if task.when is not None and not task.when(*args):
+                        logging.info(f"Skipping task {task.name}")
+                        skipped.add(task.name)
+                    else:
+                        ready.append((task, args))
+            return ready
+
+        try:
+            if self.max_threads <= 1:
+                while remaining:
+                    for task, args in ready_tasks():
+                        self.failed_task, start = task.name, time.perf_counter()
+                        results[task.name] = task.fn(*args)
+                        self.durations[task.name] = time.perf_counter() - start
+                self.failed_task = None
+                return results
+
+            while remaining or running:
+                while True:
+                    ready = ready_tasks()
+                    if not ready:
+                        break
+                    for task, args in ready:
+                        if task.executor not in pools:
+                            pools[task.executor] = (
+                                ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="pipeline-task")
+                                if task.executor == THREAD
+                                else ProcessPoolExecutor(max_workers=self.max_processes, mp_context=multiprocessing.get_context("spawn"))
+                            )
+                        running[pools[task.executor].submit(task.fn, *args)] = (task, time.perf_counter())
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, start = running.pop(future)
+                    self.durations[task.name] = time.perf_counter() - start
+                    error = future.exception()
+                    if error is not None:
+                        self.failed_task = task.name
+                        for other in running:
+                            other.cancel()
+                        raise error
+                    results[task.name] = future.result()
+                    logging.info(f"Task {task.name} finished in {self.durations[task.name]:.2f}s")
+            return results
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
@@ -1,10 +1,13 @@
 import sys
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel
 
+from src.entity.api_model import HeartAttackData
 from src.entity.config_entity import HeartAttackPredictorConfig
-from src.entity.s3_estimator import S3Estimator
+from src.entity.estimator import BatchInput
+from src.entity.model_registry import ModelRegistry
 from src.exception import MyException
 from src.logger import logging
 
@@ -12,6 +15,17 @@ from src.logger import logging
 class HeartAttackClaassifier(BaseModel):
     prediction_pipeline_config: HeartAttackPredictorConfig
 
+    def get_model_registry(self) -> ModelRegistry:
+        """
+        Returns the process-wide registry serving the production model from memory.
+        """
+        return ModelRegistry.get_instance(
+            bucket_name=self.prediction_pipeline_config.model_bucket_name,
+            model_path=self.prediction_pipeline_config.model_file_path,
+            refresh_interval_seconds=self.prediction_pipeline_config.model_refresh_interval_seconds,
+            use_compiled_model=self.prediction_pipeline_config.use_compiled_model,
+        )
+
     def predict(self, dataframe: pd.DataFrame) -> int:
         """
         This is the method of VehicleDataClassifier
@@ -19,13 +33,42 @@ class HeartAttackClaassifier(BaseModel):
         """
         try:
             logging.info("Entered predict method of VehicleDataClassifier class")
-            model = S3Estimator(
-                bucket_name=self.prediction_pipeline_config.model_bucket_name,
-                model_path=self.prediction_pipeline_config.model_file_path,
-            )
+            model = self.get_model_registry().get_model()
             result = model.predict(dataframe)
 
             return result[0]
 
         except Exception as e:
             raise MyException(e, sys)
+
+    def predict_one(self, data: HeartAttackData) -> int:
+        """
+        Predicts the label for a single validated record without building a DataFrame.
+        Returns: Prediction as int
+        """
+        try:
+            return self.get_model_registry().get_model().predict_one(data)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_batch(self, data: BatchInput) -> np.ndarray:
+        """
+        Predicts labels for many patients at once.
+        data: list of HeartAttackData, DataFrame or 2-D array in training column order
+        Returns: one label per row
+        """
+        try:
+            return self.get_model_registry().get_model().predict_batch(data)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def predict_proba_batch(self, data: BatchInput) -> np.ndarray:
+        """
+        Predicts heart attack probabilities for many patients at once.
+        data: list of HeartAttackData, DataFrame or 2-D array in training column order
+        Returns: one probability per row
+        """
+        try:
+            return self.get_model_registry().get_model().predict_proba_batch(data)
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import math
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from src.entity.api_model import HeartAttackData
+from src.entity.config_entity import HeartAttackPredictorConfig, ScoringServiceConfig
+from src.exception import MyException
+from src.logger import logging
+from src.pipline.prediction_pipeline import HeartAttackClaassifier
+from src.utils.metrics import PREDICTION_STAGE_LATENCY, prediction_metrics
+
+# XGBClassifier.predict thresholds the positive-class probability at 0.5 for binary models
+POSITIVE_THRESHOLD = 0.5
+
+BatchPredictFn = Callable[[list[HeartAttackData]], tuple[np.ndarray, np.ndarray]]
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent single-record requests into micro-batches and scores each batch
+    with one vectorized model call on a dedicated inference thread.
+
+    Whatever is already queued is taken immediately; the batcher only waits (up to
+    `max_wait_ms`) for more requests while the batch is below `max_batch_size`. Under load
+    requests pile up while the previous batch is running, so batches fill without waiting.
+    """
+
+    def __init__(self, predict_fn: BatchPredictFn, max_batch_size: int, max_wait_ms: float):
+        """
+        :param predict_fn: Scores a list of records, returns (labels, probabilities)
+        :param max_batch_size: Maximum number of records per model call
+        :param max_wait_ms: Maximum time the first request of a batch waits for others
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring-inference")
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run(), name="scoring-micro-batcher")
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, record: HeartAttackData) -> tuple[int, float]:
+        """
+        Queues one record and waits for its (label, probability).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future, time.perf_counter()))
+        return await future
+
+    async def run_in_executor(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _collect_batch(self) -> list[tuple[HeartAttackData, asyncio.Future, float]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            started = time.perf_counter()
+            queue_wait = prediction_metrics.histogram(PREDICTION_STAGE_LATENCY, stage="queue_wait")
+            for _, _, enqueued_at in batch:
+                queue_wait.observe(started - enqueued_at)
+            records = [record for record, _, _ in batch]
+            try:
+                labels, probabilities = await self.run_in_executor(self.predict_fn, records)
+            except Exception as e:
+                logging.exception("Micro-batch prediction failed")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), label, probability in zip(batch, labels, probabilities, strict=True):
+                if not future.done():
+                    future.set_result((int(label), float(probability)))
+
+
+class ScoringService:
+    """
+    Minimal ASGI application exposing the production model over HTTP.
+
+    Routes:
+        GET  /health         -> {"status": "ok"}
+        POST /predict        -> HeartAttackData in, {"prediction", "probability"} out (micro-batched)
+        POST /predict/batch  -> list of HeartAttackData in, {"predictions", "probabilities"} out
+        GET  /metrics        -> per-stage latency and batch-size histograms, Prometheus text format
+        GET  /metrics/summary -> {stage: {"count", "mean", "p50", "p95", "p99"}} in seconds
+    """
+
+    def __init__(self, scoring_service_config: ScoringServiceConfig, prediction_pipeline_config: HeartAttackPredictorConfig):
+        """
+        :param scoring_service_config: Batching and server configuration
+        :param prediction_pipeline_config: Which model to serve
+        """
+        self.scoring_service_config = scoring_service_config
+        self.classifier = HeartAttackClaassifier(prediction_pipeline_config=prediction_pipeline_config)
+        self.batcher = MicroBatcher(
+            predict_fn=self.predict_records,
+            max_batch_size=scoring_service_config.max_batch_size,
+            max_wait_ms=scoring_service_config.max_wait_ms,
+        )
+        self._batch_adapter = TypeAdapter(list[HeartAttackData])
+        self._routes: dict[tuple[str, str], Callable[[bytes], Awaitable[tuple[int, object]]]] = {
+            ("GET", "/health"): self._health,
+            ("POST", "/predict"): self._predict,
+            ("POST", "/predict/batch"): self._predict_batch,
+            ("GET", "/metrics"): self._metrics,
+            ("GET", "/metrics/summary"): self._metrics_summary,
+        }
+
+    def predict_records(self, records: list[HeartAttackData]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a list of records with one vectorized model call.
+        Returns: (labels, probabilities)
+        """
+        try:
+            probabilities = self.classifier.predict_proba_batch(records)
+            return (probabilities > POSITIVE_THRESHOLD).astype(int), probabilities
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    async def _health(self, body: bytes) -> tuple[int, object]:
+        return 200, {"status": "ok"}
+
+    async def _predict(self, body: bytes) -> tuple[int, object]:
+        record = HeartAttackData.model_validate_json(body)
+        label, probability = await self.batcher.submit(record)
+        return 200, {"prediction": label, "probability": probability}
+
+    async def _predict_batch(self, body: bytes) -> tuple[int, object]:
+        records = self._batch_adapter.validate_json(body)
+        if not records:
+            return 200, {"predictions": [], "probabilities": []}
+        # Client-side batches are already vectorized, so they skip the micro-batch queue
+        labels, probabilities = await self.batcher.run_in_executor(self.predict_records, records)
+        return 200, {"predictions": labels.tolist(), "probabilities": probabilities.tolist()}
+
+    async def _metrics(self, body: bytes) -> tuple[int, object]:
+        return 200, prediction_metrics.render_prometheus()
+
+    async def _metrics_summary(self, body: bytes) -> tuple[int, object]:
+        summary = prediction_metrics.summary()
+        # NaN is not valid JSON; stages without observations report null quantiles
+        return 200, {
+            stage: {key: None if isinstance(value, float) and math.isnan(value) else value for key, value in stats.items()}
+            for stage, stats in summary.items()
+        }
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.batcher.start()
+                    # Load the model (and its fast path) before accepting traffic
+                    await self.batcher.run_in_executor(lambda: self.classifier.get_model_registry().get_model())
+                    logging.info("Scoring service started")
+                    await send({"type": "lifespan.startup.complete"})
+                except Exception as e:
+                    logging.exception("Scoring service failed to start")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+            elif message["type"] == "lifespan.shutdown":
+                await self.batcher.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks, more_body = [], True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _send_response(send, status: int, payload: object) -> None:
+        # str payloads are Prometheus text; bytes are pre-serialized JSON
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), b"text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            content_type = b"application/json"
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        handler = self._routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            await self._send_response(send, 404, {"detail": "Not Found"})
+            return
+        started = time.perf_counter()
+        try:
+            status, payload = await handler(await self._read_body(receive))
+        except ValidationError as e:
+            status, payload = 422, e.json().encode()
+        except Exception as e:
+            logging.error(f"Scoring request failed: {e}", exc_info=True)
+            status, payload = 500, {"detail": "Prediction failed"}
+        if scope["path"].startswith("/predict"):
+            prediction_metrics.observe(PREDICTION_STAGE_LATENCY, time.perf_counter() - started, stage="request")
+        await self._send_response(send, status, payload)
+
+
+def create_app() -> ScoringService:
+    return ScoringService(scoring_service_config=ScoringServiceConfig(), prediction_pipeline_config=HeartAttackPredictorConfig())
@@ -0,0 +1,200 @@
+import fcntl
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from src.entity.config_entity import HeartAttackPredictorConfig, TrainingJobConfig
+from src.exception import MyException
+from src.logger import logging
+from src.pipline.prediction_pipeline import HeartAttackClaassifier
+from src.pipline.training_pipeline import TRAINING_PIPELINE_STAGES, TrainingPipeline
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class TrainingJobStatus:
+    job_id: str
+    status: str = JOB_PENDING
+    stage: str | None = None
+    completed_stages: list[str] = field(default_factory=list)
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    finished_at: str | None = None
+    model_pushed: bool = False
+    error: str | None = None
+    run_id: str | None = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == JOB_SUCCEEDED:
+            return 1.0
+        return len(self.completed_stages) / len(TRAINING_PIPELINE_STAGES)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+
+def _status_file_path(jobs_dir: str, job_id: str) -> str:
+    return os.path.join(jobs_dir, f"{job_id}.json")
+
+
+def write_job_status(jobs_dir: str, status: TrainingJobStatus) -> None:
+    # Write-then-rename so readers never see a half-written status file
+    os.makedirs(jobs_dir, exist_ok=True)
+    path = _status_file_path(jobs_dir, status.job_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as status_file:
+        json.dump(asdict(status), status_file, indent=4)
+    os.replace(tmp_path, path)
+
+
+def read_job_status(jobs_dir: str, job_id: str) -> TrainingJobStatus:
+    try:
+        with open(_status_file_path(jobs_dir, job_id)) as status_file:
+            return TrainingJobStatus(**json.load(status_file))
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def run_training_job(job_id: str, training_job_config: TrainingJobConfig, run_id: str | None = None) -> bool:
+    """
+    Entry point executed in the worker process. Runs the whole training pipeline (or resumes run_id),
+    recording per-stage progress and the pipeline's run ID in the job's status file.
+
+    Returns: True when a new model was pushed to S3
+    """
+    jobs_dir = training_job_config.jobs_dir
+    status = read_job_status(jobs_dir, job_id)
+    os.makedirs(jobs_dir, exist_ok=True)
+    with open(training_job_config.lock_file_path, "a+b") as lock_file:
+        try:
+            # Guards against a second retrain started from another server process on this host
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            status.status, status.error = JOB_FAILED, "Another training job is already running"
+            status.finished_at = datetime.now().isoformat(timespec="seconds")
+            write_job_status(jobs_dir, status)
+            return False
+
+        def report_progress(stage: str) -> None:
+            if status.stage is not None:
+                status.completed_stages.append(status.stage)
+            status.status, status.stage = JOB_RUNNING, stage
+            write_job_status(jobs_dir, status)
+            logging.info(f"Training job {job_id}: entering stage {stage}")
+
+        try:
+            training_pipeline = TrainingPipeline(progress_callback=report_progress, run_id=run_id)
+            status.run_id = training_pipeline.run_id
+            model_pusher_artifact = training_pipeline.run_pipeline()
+            if status.stage is not None:
+                status.completed_stages.append(status.stage)
+            status.status, status.stage = JOB_SUCCEEDED, None
+            status.model_pushed = model_pusher_artifact is not None
+        except Exception as e:
+            status.status, status.error = JOB_FAILED, str(e)
+            logging.error(f"Training job {job_id} failed:\n{traceback.format_exc()}")
+        finally:
+            status.finished_at = datetime.now().isoformat(timespec="seconds")
+            write_job_status(jobs_dir, status)
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    return status.model_pushed
+
+
+class TrainingJobRunner:
+    """
+    Runs TrainingPipeline jobs in a background process so the caller (e.g. the Streamlit script thread)
+    never blocks. At most one job runs at a time; submitting while a job is active returns that job's ID.
+    When a job pushes a new model, the in-memory model registry is reloaded so predictions switch to it.
+    """
+
+    _instance: "TrainingJobRunner | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, training_job_config: TrainingJobConfig, prediction_pipeline_config: HeartAttackPredictorConfig):
+        """
+        :param training_job_config: Where job status files and the cross-process lock live
+        :param prediction_pipeline_config: The served model to hot-swap after a successful job
+        """
+        self.training_job_config = training_job_config
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self._executor = self._new_executor()
+        self._lock = threading.Lock()
+        self._active_job_id: str | None = None
+        self._active_future: Future | None = None
+
+    @staticmethod
+    def _new_executor() -> ProcessPoolExecutor:
+        # spawn: every job must re-import config_entity so it gets a fresh TIMESTAMP artifact directory
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @classmethod
+    def get_instance(cls) -> "TrainingJobRunner":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(training_job_config=TrainingJobConfig(), prediction_pipeline_config=HeartAttackPredictorConfig())
+            return cls._instance
+
+    @property
+    def active_job_id(self) -> str | None:
+        with self._lock:
+            if self._active_future is not None and not self._active_future.done():
+                return self._active_job_id
+            return None
+
+    def submit(self, run_id: str | None = None) -> str:
+        """
+        Starts a training job in the background, or returns the ID of the job already running.
+        :param run_id: Run ID of a failed job to resume from its first incomplete stage
+        """
+        try:
+            with self._lock:
+                if self._active_future is not None and not self._active_future.done():
+                    logging.info(f"Training job {self._active_job_id} already running, not starting another one")
+                    return self._active_job_id
+                job_id = datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:8]
+                write_job_status(self.training_job_config.jobs_dir, TrainingJobStatus(job_id=job_id))
+                future = self._executor.submit(run_training_job, job_id, self.training_job_config, run_id)
+                self._active_job_id, self._active_future = job_id, future
+            future.add_done_callback(lambda f: self._on_job_done(job_id, f))
+            logging.info(f"Submitted training job {job_id}")
+            return job_id
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_status(self, job_id: str) -> TrainingJobStatus:
+        return read_job_status(self.training_job_config.jobs_dir, job_id)
+
+    def _on_job_done(self, job_id: str, future: Future) -> None:
+        try:
+            model_pushed = future.result()
+        except Exception as e:
+            # The worker process died without recording its own outcome (e.g. BrokenProcessPool)
+            logging.error(f"Training job {job_id} crashed: {e}")
+            status = self.get_status(job_id)
+            status.status, status.error = JOB_FAILED, str(e)
+            status.finished_at = datetime.now().isoformat(timespec="seconds")
+            write_job_status(self.training_job_config.jobs_dir, status)
+            with self._lock:
+                # A crashed worker breaks the pool for good; start a fresh one for the next job
+                self._executor.shutdown(wait=False)
+                self._executor = self._new_executor()
+            return
+        if not model_pushed:
+            return
+        try:
+            logging.info(f"Training job {job_id} pushed a new model, hot-swapping the served model")
+            HeartAttackClaassifier(prediction_pipeline_config=self.prediction_pipeline_config).get_model_registry().reload()
+        except Exception:
+            logging.exception("Hot-swap after training job failed; the registry will pick the model up on its next refresh")
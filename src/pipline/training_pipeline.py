@@ -1,11 +1,17 @@
+import inspect
+import os
 import sys
+from collections.abc import Callable
 
+from src.cloud_storage.aws_storage import SimpleStorageService
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 from src.components.data_validation import DataValidation
-from src.components.model_evaluation import ModelEvaluation
+from src.components.model_evaluation import ModelEvaluation, ProductionModelScore, render_production_model_plots
 from src.components.model_pusher import ModelPusher
 from src.components.model_trainer import ModelTrainer
+from src.constants import RUN_MANIFEST_FILE_NAME
+from src.data_access.proj1_data import Proj1Data
 from src.entity.artifact_entity import (
     DataIngestionArtifact,
     DataTransformationArtifact,
@@ -14,6 +20,7 @@ from src.entity.artifact_entity import (
     ModelPusherArtifact,
     ModelTrainerArtifact,
 )
+from src.entity.artifact_store import ArtifactStore
 from src.entity.config_entity import (
     DataIngestionConfig,
     DataTransformationConfig,
@@ -21,19 +28,73 @@ from src.entity.config_entity import (
     ModelEvaluationConfig,
     ModelPusherConfig,
     ModelTrainerConfig,
+    training_pipeline_config,
 )
+from src.entity.run_manifest import RunManifest
+from src.entity.stage_cache import StageCache
+from src.entity.task_graph import PROCESS, TaskGraph
 from src.exception import MyException
 from src.logger import logging
+from src.utils.main_utils import rebase_paths
+
+# Stage names reported to the progress callback, in execution order
+TRAINING_PIPELINE_STAGES: tuple[str, ...] = (
+    "data_ingestion",
+    "data_validation",
+    "data_transformation",
+    "model_trainer",
+    "model_evaluation",
+    "model_pusher",
+)
+STAGE_ARTIFACT_TYPES: dict[str, type] = {
+    "data_ingestion": DataIngestionArtifact,
+    "data_validation": DataValidationArtifact,
+    "data_transformation": DataTransformationArtifact,
+    "model_trainer": ModelTrainerArtifact,
+    "model_evaluation": ModelEvaluationArtifact,
+    "model_pusher": ModelPusherArtifact,
+}
 
 
 class TrainingPipeline:
-    def __init__(self):
-        self.data_ingestion_config = DataIngestionConfig()
-        self.data_validation_config = DataValidationConfig()
-        self.data_transformation_config = DataTransformationConfig()
-        self.model_trainer_config = ModelTrainerConfig()
-        self.model_evaluation_config = ModelEvaluationConfig()
-        self.model_pusher_config = ModelPusherConfig()
+    def __init__(self, progress_callback: Callable[[str], None] | None = None, run_id: str | None = None):
+        """
+        :param progress_callback: Optional callable invoked with the stage name before each stage starts
+        :param run_id: ID of an earlier run to resume (defaults to TRAINING_PIPELINE_RUN_ID). The run continues in its
+                       artifact directory from the first stage its manifest does not list as completed.
+        """
+        try:
+            self.progress_callback = progress_callback
+            in_memory = training_pipeline_config.in_memory_artifacts
+            self.artifact_store = ArtifactStore(keep_in_memory=in_memory, async_writes=in_memory)
+            self.data_ingestion_config = DataIngestionConfig()
+            self.data_validation_config = DataValidationConfig()
+            self.data_transformation_config = DataTransformationConfig()
+            self.model_trainer_config = ModelTrainerConfig()
+            self.model_evaluation_config = ModelEvaluationConfig()
+            self.model_pusher_config = ModelPusherConfig()
+
+            run_id = run_id or training_pipeline_config.resume_run_id
+            self.run_id = run_id or training_pipeline_config.timestamp
+            self.artifact_dir = os.path.join(os.path.dirname(training_pipeline_config.artifact_dir), self.run_id)
+            manifest_file_path = os.path.join(self.artifact_dir, RUN_MANIFEST_FILE_NAME)
+            if run_id:
+                if not os.path.exists(manifest_file_path):
+                    raise FileNotFoundError(f"Cannot resume run {run_id}: no run manifest at {manifest_file_path}")
+                # Every stage writes into the resumed run's directory instead of a new one
+                for stage in TRAINING_PIPELINE_STAGES:
+                    config = getattr(self, f"{stage}_config")
+                    setattr(self, f"{stage}_config", rebase_paths(config, training_pipeline_config.artifact_dir, self.artifact_dir))
+            self.run_manifest = RunManifest(file_path=manifest_file_path, run_id=self.run_id, artifact_dir=self.artifact_dir)
+            self._resuming = bool(run_id)
+
+            self.stage_cache = (
+                StageCache(cache_dir=training_pipeline_config.stage_cache_dir, artifact_dir=self.artifact_dir)
+                if training_pipeline_config.stage_cache
+                else None
+            )
+        except Exception as e:
+            raise MyException(e, sys) from e
 
     def start_data_ingestion(self) -> DataIngestionArtifact:
         """
@@ -42,7 +103,7 @@ class TrainingPipeline:
         try:
             logging.info("Entered start_data_ingestion method of TrainingPipeline class")
             logging.info("Getting the data from mongodb")
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config, artifact_store=self.artifact_store)
             data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
             logging.info("Got the data from mongodb")
             logging.info("Exited start_data_ingestion method of TrainingPipeline class")
@@ -57,7 +118,11 @@ class TrainingPipeline:
         logging.info("Entered the start_data_validation method of TrainPipeline class")
 
         try:
-            data_validation = DataValidation(data_ingestion_artifact=data_ingestion_artifact, data_validation_config=self.data_validation_config)
+            data_validation = DataValidation(
+                data_ingestion_artifact=data_ingestion_artifact,
+                data_validation_config=self.data_validation_config,
+                artifact_store=self.artifact_store,
+            )
 
             data_validation_artifact = data_validation.initiate_data_validation()
 
@@ -79,6 +144,7 @@ class TrainingPipeline:
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_transformation_config=self.data_transformation_config,
                 data_validation_artifact=data_validation_artifact,
+                artifact_store=self.artifact_store,
             )
             data_transformation_artifact = data_transformation.initiate_data_transformation()
             return data_transformation_artifact
@@ -90,15 +156,37 @@ class TrainingPipeline:
         This method of TrainPipeline class is responsible for starting model training
         """
         try:
-            model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact, model_trainer_config=self.model_trainer_config)
+            model_trainer = ModelTrainer(
+                data_transformation_artifact=data_transformation_artifact,
+                model_trainer_config=self.model_trainer_config,
+                artifact_store=self.artifact_store,
+            )
             model_trainer_artifact = model_trainer.initiate_model_trainer()
             return model_trainer_artifact
 
         except Exception as e:
             raise MyException(e, sys)
 
+    def start_production_model_scoring(self, data_ingestion_artifact: DataIngestionArtifact) -> ProductionModelScore:
+        """
+        This method of TrainPipeline class is responsible for downloading and scoring the production model
+        """
+        try:
+            model_evaluation = ModelEvaluation(
+                model_evaluation_config=self.model_evaluation_config,
+                data_ingestion_artifact=data_ingestion_artifact,
+                model_trainer_artifact=None,
+                artifact_store=self.artifact_store,
+            )
+            return model_evaluation.score_production_model()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def start_model_evaluation(
-        self, data_ingestion_artifact: DataIngestionArtifact, model_trainer_artifact: ModelTrainerArtifact
+        self,
+        data_ingestion_artifact: DataIngestionArtifact,
+        model_trainer_artifact: ModelTrainerArtifact,
+        production_model_score: ProductionModelScore | None = None,
     ) -> ModelEvaluationArtifact:
         """
         This method of TrainPipeline class is responsible for starting model evaluation
@@ -108,41 +196,251 @@ class TrainingPipeline:
                 model_evaluation_config=self.model_evaluation_config,
                 data_ingestion_artifact=data_ingestion_artifact,
                 model_trainer_artifact=model_trainer_artifact,
+                artifact_store=self.artifact_store,
             )
-            model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
+            model_evaluation_artifact = model_evaluation.initiate_model_evaluation(production_model_score=production_model_score)
             return model_evaluation_artifact
         except Exception as e:
             raise MyException(e, sys)
 
-    def start_model_pusher(self, model_evaluation_artifact: ModelEvaluationArtifact) -> ModelPusherArtifact:
+    def start_model_pusher(
+        self, model_evaluation_artifact: ModelEvaluationArtifact, data_validation_artifact: DataValidationArtifact | None = None
+    ) -> ModelPusherArtifact:
         """
         This method of TrainPipeline class is responsible for starting model pushing
         """
         try:
-            model_pusher = ModelPusher(model_evaluation_artifact=model_evaluation_artifact, model_pusher_config=self.model_pusher_config)
+            model_pusher = ModelPusher(
+                model_evaluation_artifact=model_evaluation_artifact,
+                model_pusher_config=self.model_pusher_config,
+                artifact_store=self.artifact_store,
+                data_validation_artifact=data_validation_artifact,
+            )
             model_pusher_artifact = model_pusher.initiate_model_pusher()
             return model_pusher_artifact
         except Exception as e:
             raise MyException(e, sys)
 
-    def run_pipeline(self) -> None:
+    def _report_progress(self, stage: str) -> None:
+        if self.progress_callback is not None:
+            self.progress_callback(stage)
+
+    @staticmethod
+    def _s3_object_etag(bucket_name: str, s3_key: str) -> str | None:
+        s3 = SimpleStorageService()
+        if not s3.s3_key_path_available(bucket_name=bucket_name, s3_key=s3_key):
+            return None
+        return s3.get_object_etag(bucket_name=bucket_name, s3_key=s3_key)
+
+    def _run_cached(
+        self,
+        stage: str,
+        run_fn: Callable[[], object],
+        component: type,
+        config: object,
+        input_files: list[str] = (),
+        inputs: Callable[[], dict] | None = None,
+    ) -> object:
         """
-        This method of TrainPipeline class is responsible for running the pipeline
+        Runs a stage through the stage cache: returns the cached artifact when the stage already ran with the
+        same component source, config, input file contents and inputs, otherwise runs it and caches its outputs.
+
+        :param inputs: Returns the stage's inputs that are not files (upstream artifacts, data versions); only called when caching
         """
-        try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
-                data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact
+        if self.stage_cache is None:
+            return run_fn()
+        key = self.stage_cache.fingerprint(
+            stage, config, input_files=input_files, inputs=inputs() if inputs else None, source_file=inspect.getsourcefile(component)
+        )
+        artifact = self.stage_cache.load(stage, key)
+        if artifact is not None:
+            logging.info(f"Reusing cached {stage} outputs ({key})")
+            return artifact
+        artifact = run_fn()
+        # Cached files are taken from disk, so pending asynchronous writes must land first
+        self.artifact_store.flush()
+        self.stage_cache.save(stage, key, artifact)
+        return artifact
+
+    def _run_stage(self, stage: str, run_fn: Callable[[], object], cacheable: bool = True, **cache_kwargs) -> object:
+        """
+        Runs one stage and checkpoints its artifact in the run manifest. While resuming, stages the manifest lists
+        as completed are not run again: their recorded artifact is returned instead.
+
+        :param cacheable: Whether the stage may be served from the stage cache (see _run_cached for cache_kwargs)
+        """
+        self._report_progress(stage)
+        if self._resuming:
+            artifact = self.run_manifest.completed_artifact(stage, STAGE_ARTIFACT_TYPES[stage])
+            if artifact is not None:
+                logging.info(f"Run {self.run_id}: {stage} already completed, skipping it")
+                return artifact
+            # Stages after the first incomplete one run again, whatever the manifest says about them
+            self._resuming = False
+            self.run_manifest.discard(TRAINING_PIPELINE_STAGES[TRAINING_PIPELINE_STAGES.index(stage) :])
+            logging.info(f"Resuming run {self.run_id} from {stage}")
+        artifact = self._run_cached(stage, run_fn, **cache_kwargs) if cacheable else run_fn()
+        # The checkpoint may only point at files that are on disk
+        self.artifact_store.flush()
+        self.run_manifest.record(stage, artifact)
+        return artifact
+
+    def _is_checkpointed(self, stage: str) -> bool:
+        """
+        Whether a resumed run will take stage (and every stage before it) from the run manifest.
+        """
+        stages = TRAINING_PIPELINE_STAGES[: TRAINING_PIPELINE_STAGES.index(stage) + 1]
+        return self._resuming and all(self.run_manifest.completed_artifact(name, STAGE_ARTIFACT_TYPES[name]) is not None for name in stages)
+
+    def _retraining_needed(self, data_validation_artifact: DataValidationArtifact) -> bool:
+        return not (training_pipeline_config.skip_without_drift and data_validation_artifact.drift_detected is False)
+
+    def build_task_graph(self) -> TaskGraph:
+        """
+        Expresses the pipeline as a DAG of stages and their inputs. Besides the stage chain, the production model is
+        downloaded and scored on the test set while the new model is transformed and trained, and its plots are
+        rendered in a worker process.
+        """
+        graph = TaskGraph(max_threads=training_pipeline_config.max_workers)
+        graph.add(
+            "data_ingestion",
+            lambda: self._run_stage(
+                "data_ingestion",
+                self.start_data_ingestion,
+                component=DataIngestion,
+                config=self.data_ingestion_config,
+                inputs=lambda: {"collection": Proj1Data().get_collection_version(collection_name=self.data_ingestion_config.collection_name)},
+            ),
+        )
+        graph.add(
+            "data_validation",
+            lambda data_ingestion_artifact: self._run_stage(
+                "data_validation",
+                lambda: self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact),
+                component=DataValidation,
+                config=self.data_validation_config,
+                input_files=[data_ingestion_artifact.trained_file_path, data_ingestion_artifact.test_file_path],
+                inputs=lambda: {
+                    "reference_profile": self._s3_object_etag(
+                        self.data_validation_config.bucket_name, self.data_validation_config.s3_reference_profile_key_path
+                    )
+                },
+            ),
+            inputs=("data_ingestion",),
+        )
+        graph.add(
+            "data_transformation",
+            lambda data_ingestion_artifact, data_validation_artifact: self._run_stage(
+                "data_transformation",
+                lambda: self.start_data_transformation(
+                    data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact
+                ),
+                component=DataTransformation,
+                config=self.data_transformation_config,
+                input_files=[data_ingestion_artifact.trained_file_path, data_ingestion_artifact.test_file_path],
+                inputs=lambda: {"data_validation": data_validation_artifact},
+            ),
+            inputs=("data_ingestion", "data_validation"),
+            when=lambda data_ingestion_artifact, data_validation_artifact: self._retraining_needed(data_validation_artifact),
+        )
+        graph.add(
+            "model_trainer",
+            lambda data_transformation_artifact: self._run_stage(
+                "model_trainer",
+                lambda: self.start_model_trainer(data_transformation_artifact=data_transformation_artifact),
+                component=ModelTrainer,
+                config=self.model_trainer_config,
+                input_files=[
+                    data_transformation_artifact.transformed_object_file_path,
+                    data_transformation_artifact.transformed_train_file_path,
+                    data_transformation_artifact.transformed_test_file_path,
+                ],
+            ),
+            inputs=("data_transformation",),
+        )
+        evaluation_inputs = ("data_ingestion", "model_trainer")
+        # A resumed run whose evaluation is checkpointed does not need the production model again
+        if not self._is_checkpointed("model_evaluation"):
+            graph.add(
+                "production_model_score",
+                lambda data_ingestion_artifact, data_validation_artifact: self.start_production_model_scoring(data_ingestion_artifact),
+                inputs=("data_ingestion", "data_validation"),
+                when=lambda data_ingestion_artifact, data_validation_artifact: self._retraining_needed(data_validation_artifact),
             )
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(
-                data_ingestion_artifact=data_ingestion_artifact, model_trainer_artifact=model_trainer_artifact
+            graph.add(
+                "production_model_plots",
+                render_production_model_plots,
+                inputs=("production_model_score",),
+                executor=PROCESS,
+                when=lambda production_model_score: production_model_score.f1_score is not None,
             )
-            if not model_evaluation_artifact.is_model_accepted:
+            evaluation_inputs += ("production_model_score",)
+        graph.add(
+            "model_evaluation",
+            lambda data_ingestion_artifact, model_trainer_artifact, production_model_score=None: self._run_stage(
+                "model_evaluation",
+                lambda: self.start_model_evaluation(
+                    data_ingestion_artifact=data_ingestion_artifact,
+                    model_trainer_artifact=model_trainer_artifact,
+                    production_model_score=production_model_score,
+                ),
+                component=ModelEvaluation,
+                config=self.model_evaluation_config,
+                input_files=[data_ingestion_artifact.test_file_path, model_trainer_artifact.trained_model_file_path],
+                inputs=lambda: {
+                    "model_trainer": model_trainer_artifact,
+                    "production_model": self._s3_object_etag(
+                        self.model_evaluation_config.bucket_name, self.model_evaluation_config.s3_model_key_path
+                    ),
+                },
+            ),
+            inputs=evaluation_inputs,
+        )
+        graph.add(
+            "model_pusher",
+            lambda model_evaluation_artifact, data_validation_artifact: self._run_stage(
+                "model_pusher",
+                lambda: self.start_model_pusher(
+                    model_evaluation_artifact=model_evaluation_artifact, data_validation_artifact=data_validation_artifact
+                ),
+                cacheable=False,
+            ),
+            inputs=("model_evaluation", "data_validation"),
+            when=lambda model_evaluation_artifact, data_validation_artifact: model_evaluation_artifact.is_model_accepted,
+        )
+        return graph
+
+    def run_pipeline(self) -> ModelPusherArtifact | None:
+        """
+        This method of TrainPipeline class is responsible for running the pipeline
+        Returns the model pusher artifact, or None when the trained model was not accepted
+        (or retraining was skipped because the new data has not drifted)
+        """
+        graph = None
+        try:
+            logging.info(f"Training run {self.run_id} (resume it with TRAINING_PIPELINE_RUN_ID={self.run_id})")
+            graph = self.build_task_graph()
+            results = graph.run()
+            if "data_transformation" not in results:
+                logging.info("No drift from the production model's training data, skipping retraining.")
+            elif not results["model_evaluation"].is_model_accepted:
                 logging.info("Model not accepted.")
-                return None
-            self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            logging.info("Task durations: " + ", ".join(f"{name} {duration:.2f}s" for name, duration in graph.durations.items()))
+
+            # The run's artifact directory must be complete before the pipeline returns
+            self.artifact_store.close()
+            self.run_manifest.finish()
+            return results.get("model_pusher")
 
         except Exception as e:
+            try:
+                self.artifact_store.close()
+            except Exception:
+                logging.exception("Writing artifacts failed while handling a pipeline failure")
+            failed_stage = graph.failed_task if graph is not None else None
+            try:
+                self.run_manifest.record_failure(failed_stage, str(e))
+                logging.info(f"Run {self.run_id} failed in {failed_stage}; resume it with TRAINING_PIPELINE_RUN_ID={self.run_id}")
+            except Exception:
+                logging.exception("Updating the run manifest failed while handling a pipeline failure")
             raise MyException(e, sys) from e
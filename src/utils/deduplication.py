@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+
+def row_fingerprints(dataframe: pd.DataFrame) -> np.ndarray:
+    """
+    Returns a 64-bit fingerprint of every row, computed from its values only (not the index).
+
+    Numeric columns are hashed as float64, so a row gets the same fingerprint whether a chunk stored
+    a column as int64 or, because of a missing value elsewhere in the chunk, as float64.
+    """
+    key = pd.DataFrame(
+        {column: values.astype(np.float64) if values.dtype.kind in "biuf" else values for column, values in dataframe.items()}, copy=False
+    )
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+class StreamingDeduplicator:
+    """
+    Drops rows whose fingerprint has been seen before, across any number of chunks.
+
+    The fingerprints of the rows kept so far are held as a few sorted uint64 runs (8 bytes per unique row).
+    New fingerprints are looked up in every run with a binary search and appended as a new run, and runs
+    are merged whenever the newest one grows close to the size of its predecessor, so there are
+    O(log n) runs and every fingerprint is re-sorted O(log n) times in total. Two different rows share a
+    fingerprint with probability ~n^2 / 2^65 (about 3e-4 for 100M unique rows).
+    """
+
+    def __init__(self):
+        self._runs: list[np.ndarray] = []
+        self.num_rows = 0
+        self.num_duplicates = 0
+
+    @property
+    def num_unique(self) -> int:
+        return self.num_rows - self.num_duplicates
+
+    def _seen(self, fingerprints: np.ndarray) -> np.ndarray:
+        # Sorted needles make every binary search start where the previous one ended
+        seen = np.zeros(len(fingerprints), dtype=bool)
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, fingerprints), len(run) - 1)
+            seen |= run[positions] == fingerprints
+        return seen
+
+    def _add_run(self, sorted_fingerprints: np.ndarray) -> None:
+        self._runs.append(sorted_fingerprints)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            newest = self._runs.pop()
+            # A stable sort of two concatenated sorted runs is a linear merge (timsort)
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], newest]), kind="stable")
+
+    def unique_mask(self, fingerprints: np.ndarray) -> np.ndarray:
+        """
+        Returns a mask keeping the first occurrence of every fingerprint not seen in earlier calls, and records them as seen.
+        """
+        unique_fingerprints, first_index = np.unique(fingerprints, return_index=True)
+        is_new = ~self._seen(unique_fingerprints)
+        keep = np.zeros(len(fingerprints), dtype=bool)
+        keep[first_index[is_new]] = True
+        if is_new.any():
+            self._add_run(unique_fingerprints[is_new])
+        self.num_rows += len(fingerprints)
+        self.num_duplicates += len(fingerprints) - int(np.count_nonzero(is_new))
+        return keep
+
+    def drop_duplicates(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns dataframe without the rows seen before (in this chunk or earlier ones), in their original order.
+        """
+        return dataframe[self.unique_mask(row_fingerprints(dataframe))]
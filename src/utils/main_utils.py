@@ -1,10 +1,15 @@
+import dataclasses
 import json
 import os
+import shutil
+import struct
 import sys
+from collections.abc import Iterator
 
 import dill  # nosec B403
 import joblib
 import numpy as np
+import pandas as pd
 import yaml
 
 from src.exception import MyException
@@ -55,8 +60,11 @@ def save_numpy_array_data(file_path: str, array: np.ndarray):
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
-        with open(file_path, "wb") as file_obj:
+        # Written aside and renamed, so a file hard-linked elsewhere (e.g. the stage cache) is never modified
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as file_obj:
             np.save(file_obj, array)
+        os.replace(tmp_path, file_path)
     except Exception as e:
         raise MyException(e, sys) from e
 
@@ -80,9 +88,287 @@ def save_object(file_path: str, obj: object) -> None:
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         # with open(file_path, "wb") as file_obj:
-        joblib.dump(obj, file_path)
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as file_obj:
+            joblib.dump(obj, file_obj)
+        os.replace(tmp_path, file_path)
 
         logging.info("Exited the save_object method of utils")
 
     except Exception as e:
         raise MyException(e, sys) from e
+
+
+def rebase_paths(obj: object, old_dir: str, new_dir: str) -> object:
+    """
+    Returns a copy of a dataclass (config or artifact) with every path under old_dir moved to new_dir, nested dataclasses included.
+    """
+    old_dir = os.path.normpath(old_dir)
+    changes = {}
+    for field in dataclasses.fields(obj):
+        value = getattr(obj, field.name)
+        if dataclasses.is_dataclass(value):
+            changes[field.name] = rebase_paths(value, old_dir, new_dir)
+        elif isinstance(value, str) and os.path.normpath(value).startswith(old_dir + os.sep):
+            changes[field.name] = os.path.join(new_dir, os.path.relpath(value, old_dir))
+    return dataclasses.replace(obj, **changes)
+
+
+# Marker file of a column directory written by save_dataframe (".cols" extension)
+COLUMNS_MANIFEST_FILE_NAME = "manifest.json"
+
+
+def _save_columns(dir_path: str, dataframe: pd.DataFrame) -> None:
+    os.makedirs(dir_path, exist_ok=True)
+    manifest = {"num_rows": len(dataframe), "columns": []}
+    for index, (name, column) in enumerate(dataframe.items()):
+        entry = {"name": name, "file": f"col_{index:03d}.npy", "categories": None}
+        if column.dtype.kind in "biufM":
+            values = column.to_numpy()
+        else:
+            # Strings are dictionary-encoded: int32 codes (-1 = missing) plus the distinct values
+            codes, categories = pd.factorize(column.to_numpy(dtype=object))
+            values = codes.astype(np.int32)
+            entry["categories"] = f"col_{index:03d}.categories.npy"
+            np.save(os.path.join(dir_path, entry["categories"]), np.asarray(categories, dtype=str))
+        np.save(os.path.join(dir_path, entry["file"]), values)
+        manifest["columns"].append(entry)
+    with open(os.path.join(dir_path, COLUMNS_MANIFEST_FILE_NAME), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+
+
+def _load_columns(dir_path: str, mmap: bool) -> pd.DataFrame:
+    with open(os.path.join(dir_path, COLUMNS_MANIFEST_FILE_NAME)) as manifest_file:
+        manifest = json.load(manifest_file)
+    columns = {}
+    for entry in manifest["columns"]:
+        values = np.load(os.path.join(dir_path, entry["file"]), mmap_mode="r" if mmap else None)
+        if entry["categories"] is not None:
+            # Decode with one gather; the appended NaN is what code -1 picks up
+            categories = np.load(os.path.join(dir_path, entry["categories"])).astype(object)
+            values = np.append(categories, np.nan)[values]
+        columns[entry["name"]] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def save_dataframe(file_path: str, dataframe: pd.DataFrame) -> None:
+    """
+    Save a DataFrame in the format given by the file extension:
+    .csv, .parquet (requires pyarrow) or .cols (a directory with one .npy file per column).
+    The data is written to a temporary path and renamed, so readers never see a partial file.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.tmp"
+        if file_path.endswith(".cols"):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            _save_columns(tmp_path, dataframe)
+            shutil.rmtree(file_path, ignore_errors=True)
+        elif file_path.endswith(".parquet"):
+            dataframe.to_parquet(tmp_path, index=False)
+        else:
+            dataframe.to_csv(tmp_path, index=False, header=True)
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def load_dataframe(file_path: str, mmap: bool = True) -> pd.DataFrame:
+    """
+    Load a DataFrame saved by save_dataframe. Column directories (.cols) are memory-mapped unless mmap is False,
+    and Parquet files are memory-mapped by pyarrow; both keep their dtypes without any parsing.
+    """
+    try:
+        if file_path.endswith(".cols"):
+            return _load_columns(file_path, mmap=mmap)
+        if file_path.endswith(".parquet"):
+            return pd.read_parquet(file_path, memory_map=mmap)
+        return pd.read_csv(file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def iter_dataframe_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Reads a DataFrame saved by save_dataframe in chunks of at most chunk_size rows, without loading the whole file.
+    Column directories are memory-mapped and sliced; CSV and Parquet files are parsed one chunk at a time.
+    """
+    try:
+        if file_path.endswith(".cols"):
+            dataframe = _load_columns(file_path, mmap=True)
+            for start in range(0, len(dataframe), chunk_size):
+                yield dataframe.iloc[start : start + chunk_size]
+        elif file_path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file_path, memory_map=True).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(file_path, chunksize=chunk_size)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+# Bytes reserved for the header of a .npy file written in chunks (magic, version, length and padded header dict)
+_NPY_HEADER_SIZE = 128
+
+
+def _write_npy_header(file_obj, dtype: np.dtype, num_rows: int) -> None:
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (num_rows,)})
+    header_len = _NPY_HEADER_SIZE - 10
+    file_obj.seek(0)
+    file_obj.write(np.lib.format.magic(1, 0) + struct.pack("<H", header_len) + header.ljust(header_len - 1).encode("latin1") + b"\n")
+
+
+class ChunkedDataFrameWriter:
+    """
+    Writes a DataFrame chunk by chunk in the format given by the file extension (see save_dataframe),
+    holding at most one chunk in memory. Like save_dataframe the data goes to a temporary path that is
+    renamed on close, so readers never see a partial file; use it as a context manager to discard the
+    temporary file when writing fails.
+
+    Chunks are aligned on the columns of the first chunk (or the columns given). In a column directory,
+    a numeric column whose dtype widens in a later chunk (e.g. int64 -> float64 once a value is missing)
+    has the rows written so far converted once, and string columns share one dictionary across chunks.
+    """
+
+    def __init__(self, file_path: str, columns: list[str] | None = None):
+        """
+        :param file_path: Destination path, its extension selects .csv, .parquet or .cols
+        :param columns: Column order of the written data (default: columns of the first chunk)
+        """
+        try:
+            self.file_path = file_path
+            self.columns = columns
+            self.num_rows = 0
+            self._tmp_path = f"{file_path}.tmp"
+            self._column_files: list[dict] = []
+            self._parquet_writer = None
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            self._remove_tmp()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def __enter__(self) -> "ChunkedDataFrameWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _remove_tmp(self) -> None:
+        if os.path.isdir(self._tmp_path):
+            shutil.rmtree(self._tmp_path)
+        elif os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _open_column_files(self, dataframe: pd.DataFrame) -> None:
+        os.makedirs(self._tmp_path)
+        for index, (name, column) in enumerate(dataframe.items()):
+            entry = {"name": name, "file": f"col_{index:03d}.npy", "categories": None}
+            if column.dtype.kind in "biufM":
+                entry["dtype"] = column.dtype
+            else:
+                entry["dtype"], entry["categories"], entry["codes"] = np.dtype(np.int32), f"col_{index:03d}.categories.npy", {}
+            entry["file_obj"] = open(os.path.join(self._tmp_path, entry["file"]), "wb")  # noqa: SIM115
+            entry["file_obj"].write(b"\0" * _NPY_HEADER_SIZE)
+            self._column_files.append(entry)
+
+    def _widen_column(self, entry: dict, dtype: np.dtype) -> None:
+        # Rewrite the rows written so far in the wider dtype, one block at a time
+        path = os.path.join(self._tmp_path, entry["file"])
+        entry["file_obj"].close()
+        old_path = f"{path}.old"
+        os.replace(path, old_path)
+        old_values = np.memmap(old_path, dtype=entry["dtype"], mode="r", offset=_NPY_HEADER_SIZE, shape=(self.num_rows,))
+        entry["file_obj"] = open(path, "wb")  # noqa: SIM115
+        entry["file_obj"].write(b"\0" * _NPY_HEADER_SIZE)
+        for start in range(0, self.num_rows, 1_000_000):
+            entry["file_obj"].write(old_values[start : start + 1_000_000].astype(dtype).tobytes())
+        del old_values
+        os.remove(old_path)
+        entry["dtype"] = dtype
+
+    def _write_columns(self, dataframe: pd.DataFrame) -> None:
+        if not self._column_files:
+            self._open_column_files(dataframe)
+        for entry, (_, column) in zip(self._column_files, dataframe.items(), strict=True):
+            if entry["categories"] is None:
+                dtype = np.result_type(entry["dtype"], column.dtype)
+                if dtype != entry["dtype"]:
+                    self._widen_column(entry, dtype)
+                values = column.to_numpy(dtype=dtype)
+            else:
+                # Map the chunk's codes onto the shared dictionary; the appended -1 is what code -1 picks up
+                codes, categories = pd.factorize(column.to_numpy(dtype=object))
+                shared_codes = [entry["codes"].setdefault(category, len(entry["codes"])) for category in categories]
+                values = np.append(np.asarray(shared_codes, dtype=np.int32), np.int32(-1))[codes]
+            entry["file_obj"].write(np.ascontiguousarray(values).tobytes())
+
+    def _close_columns(self) -> None:
+        manifest = {"num_rows": self.num_rows, "columns": []}
+        for entry in self._column_files:
+            _write_npy_header(entry["file_obj"], entry["dtype"], self.num_rows)
+            entry["file_obj"].close()
+            if entry["categories"] is not None:
+                np.save(os.path.join(self._tmp_path, entry["categories"]), np.asarray(list(entry["codes"]), dtype=str))
+            manifest["columns"].append({"name": entry["name"], "file": entry["file"], "categories": entry["categories"]})
+        with open(os.path.join(self._tmp_path, COLUMNS_MANIFEST_FILE_NAME), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+
+    def write(self, dataframe: pd.DataFrame) -> None:
+        """
+        Appends the rows of dataframe.
+        """
+        try:
+            if self.columns is None:
+                self.columns = list(dataframe.columns)
+            dataframe = dataframe.reindex(columns=self.columns)
+            if len(dataframe) == 0:
+                return
+            if self.file_path.endswith(".cols"):
+                self._write_columns(dataframe)
+            elif self.file_path.endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if self._parquet_writer is None:
+                    table = pa.Table.from_pandas(dataframe, preserve_index=False)
+                    self._parquet_writer = pq.ParquetWriter(self._tmp_path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(dataframe, schema=self._parquet_writer.schema, preserve_index=False, safe=False)
+                self._parquet_writer.write_table(table)
+            else:
+                dataframe.to_csv(self._tmp_path, index=False, header=self.num_rows == 0, mode="w" if self.num_rows == 0 else "a")
+            self.num_rows += len(dataframe)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def close(self) -> None:
+        """
+        Finishes the file and moves it to file_path.
+        """
+        try:
+            if self.num_rows == 0:
+                save_dataframe(self.file_path, pd.DataFrame(columns=self.columns or []))
+                return
+            if self.file_path.endswith(".cols"):
+                self._close_columns()
+                shutil.rmtree(self.file_path, ignore_errors=True)
+            elif self._parquet_writer is not None:
+                self._parquet_writer.close()
+            os.replace(self._tmp_path, self.file_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def abort(self) -> None:
+        """
+        Discards the rows written so far.
+        """
+        for entry in self._column_files:
+            entry["file_obj"].close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        self._remove_tmp()
@@ -0,0 +1,180 @@
+import bisect
+import math
+import threading
+import time
+from collections.abc import Sequence
+
+PREDICTION_STAGE_LATENCY = "prediction_stage_latency_seconds"
+PREDICTION_BATCH_SIZE = "prediction_batch_size"
+
+# 10us .. ~42s in sqrt(2) steps: quantile estimates stay within ~20% on any serving stage
+LATENCY_BUCKETS: tuple[float, ...] = tuple(10e-6 * 2 ** (i / 2) for i in range(45))
+BATCH_SIZE_BUCKETS: tuple[float, ...] = tuple(float(2**i) for i in range(18))
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram with fixed upper bounds, Prometheus style.
+    Observing a value is one bisect and three additions under a lock.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self) -> "_Timer":
+        """
+        Context manager observing the elapsed wall time in seconds.
+        """
+        return _Timer(self)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+            self._count = 0
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        """
+        Returns (per-bucket counts including +Inf, sum, count).
+        """
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the q-quantile by linear interpolation inside the bucket holding it,
+        like Prometheus' histogram_quantile. Returns NaN when nothing was observed.
+        """
+        counts, _, count = self.snapshot()
+        if count == 0:
+            return math.nan
+        rank, cumulative = q * count, 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class MetricsRegistry:
+    """
+    Collection of labelled histogram families that can be rendered in the Prometheus text format
+    or summarized as p50/p95/p99 from Python.
+    """
+
+    def __init__(self):
+        self._families: dict[str, tuple[str, tuple[float, ...]]] = {}
+        self._series: dict[str, dict[tuple[tuple[str, str], ...], Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def register_histogram(self, name: str, documentation: str, buckets: Sequence[float]) -> None:
+        with self._lock:
+            self._families[name] = (documentation, tuple(buckets))
+            self._series.setdefault(name, {})
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """
+        Returns the histogram of one labelled series, creating it on first use.
+        Hot paths can keep the returned object: it stays registered for the life of the process.
+        """
+        key = tuple(sorted(labels.items()))
+        series = self._series[name]
+        histogram = series.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(key, Histogram(self._families[name][1]))
+        return histogram
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self.histogram(name, **labels).observe(value)
+
+    def time(self, name: str, **labels: str) -> _Timer:
+        """
+        Context manager observing the elapsed wall time in seconds.
+        """
+        return _Timer(self.histogram(name, **labels))
+
+    def reset(self) -> None:
+        """
+        Zeroes every series in place, e.g. between benchmark runs.
+        """
+        with self._lock:
+            for series in self._series.values():
+                for histogram in series.values():
+                    histogram.reset()
+
+    def summary(self, name: str = PREDICTION_STAGE_LATENCY, label: str = "stage") -> dict[str, dict[str, float]]:
+        """
+        Returns {label value: {"count", "mean", "p50", "p95", "p99"}} for one histogram family.
+        """
+        result = {}
+        for key, histogram in list(self._series.get(name, {}).items()):
+            _, total, count = histogram.snapshot()
+            result[dict(key).get(label, "")] = {
+                "count": count,
+                "mean": total / count if count else math.nan,
+                "p50": histogram.quantile(0.50),
+                "p95": histogram.quantile(0.95),
+                "p99": histogram.quantile(0.99),
+            }
+        return result
+
+    @staticmethod
+    def _format_labels(labels: Sequence[tuple[str, str]]) -> str:
+        if not labels:
+            return ""
+        escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self) -> str:
+        """
+        Renders every histogram in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for name, (documentation, buckets) in list(self._families.items()):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in list(self._series[name].items()):
+                counts, total, count = histogram.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets, math.inf), counts, strict=True):
+                    cumulative += bucket_count
+                    le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                    lines.append(f"{name}_bucket{self._format_labels((*key, ('le', le)))} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(key)} {total!r}")
+                lines.append(f"{name}_count{self._format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+prediction_metrics = MetricsRegistry()
+prediction_metrics.register_histogram(PREDICTION_STAGE_LATENCY, "Latency of each prediction stage in seconds.", LATENCY_BUCKETS)
+prediction_metrics.register_histogram(PREDICTION_BATCH_SIZE, "Number of rows per model call.", BATCH_SIZE_BUCKETS)